@@ -0,0 +1,75 @@
+# Benchmark the conversion of a code-heavy page.
+#
+# Usage: python scripts/benchmark_code_blocks.py [BLOCKS] [ROUNDS]
+
+import sys
+import timeit
+from itertools import cycle, islice
+
+import markdown
+from bs4 import BeautifulSoup as Soup
+
+from mkdocs_llmstxt._internal.converter import _converter
+from mkdocs_llmstxt._internal.preprocess import autoclean
+
+_CODE = '''```python{options}
+def fibonacci(n: int) -> int:  # (1)!
+    """Return the n-th Fibonacci number."""
+    if n < 2:
+        return n
+    return fibonacci(n - 1) + fibonacci(n - 2)
+
+
+print([fibonacci(i) for i in range(10)])
+```
+
+1. Annotation.
+'''
+
+# Code blocks with different line numbers styles, as rendered by Material for MkDocs.
+_VARIANTS = [
+    ("", {}),
+    (' linenums="1"', {}),
+    (' linenums="1"', {"linenums_style": "pymdownx-inline"}),
+    (' linenums="1"', {"linenums_style": "inline"}),
+]
+_HIGHLIGHT = {"anchor_linenums": True, "line_spans": "__span", "pygments_lang_class": True}
+
+
+def _fixture(blocks: int) -> str:
+    html = []
+    for options, config in islice(cycle(_VARIANTS), blocks):
+        html.append(
+            markdown.markdown(
+                _CODE.format(options=options),
+                extensions=["pymdownx.highlight", "pymdownx.superfences"],
+                extension_configs={"pymdownx.highlight": {**_HIGHLIGHT, **config}},
+            ),
+        )
+    return "\n".join(html)
+
+
+def main(blocks: int = 200, rounds: int = 10) -> None:
+    html = _fixture(blocks)
+    soups = []
+
+    def parse() -> None:
+        soups[:] = [Soup(html, "html.parser")]
+
+    def clean() -> None:
+        autoclean(soups[-1])
+
+    def convert() -> None:
+        _converter.convert_soup(soups[-1])
+
+    print(f"{blocks} code blocks, {len(html)} bytes of HTML, best of {rounds} rounds:")
+    parsing = min(timeit.repeat(parse, number=1, repeat=rounds))
+    cleaning = min(timeit.repeat(clean, setup=parse, number=1, repeat=rounds))
+    conversion = min(timeit.repeat(convert, setup="parse(); clean()", number=1, repeat=rounds, globals=locals()))
+    print(f"  parsing:    {parsing * 1000:7.1f} ms")
+    print(f"  autoclean:  {cleaning * 1000:7.1f} ms")
+    print(f"  conversion: {conversion * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
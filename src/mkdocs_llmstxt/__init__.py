@@ -5,10 +5,41 @@ MkDocs plugin to generate an /llms.txt file.
 
 from __future__ import annotations
 
+from mkdocs_llmstxt._internal.conversion import ConversionOptions, ConversionResult, convert_pages
 from mkdocs_llmstxt._internal.plugin import MkdocsLLMsTxtPlugin
-from mkdocs_llmstxt._internal.preprocess import autoclean
+from mkdocs_llmstxt._internal.preprocess import BatchPage, autoclean
+from mkdocs_llmstxt._internal.tracing import (
+    Span,
+    TraceListener,
+    add_trace_listener,
+    remove_trace_listener,
+    trace_count,
+    trace_span,
+)
+from mkdocs_llmstxt._internal.writers import (
+    OutputContext,
+    OutputWriter,
+    PageRecord,
+    add_output_writer,
+    remove_output_writer,
+)
 
 __all__: list[str] = [
+    "BatchPage",
+    "ConversionOptions",
+    "ConversionResult",
     "MkdocsLLMsTxtPlugin",
+    "OutputContext",
+    "OutputWriter",
+    "PageRecord",
+    "Span",
+    "TraceListener",
+    "add_output_writer",
+    "add_trace_listener",
     "autoclean",
+    "convert_pages",
+    "remove_output_writer",
+    "remove_trace_listener",
+    "trace_count",
+    "trace_span",
 ]
@@ -0,0 +1,88 @@
+# Single-file bundle of the generated outputs.
+
+from __future__ import annotations
+
+import tarfile
+import zipfile
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from mkdocs.exceptions import PluginError
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+_BUNDLE_FORMATS = {".tar.gz": "gztar", ".tgz": "gztar", ".tar": "tar", ".zip": "zip"}
+
+
+def _bundle_format(name: str) -> str:
+    """Return the archive format for a bundle file name.
+
+    Parameters:
+        name: The bundle file name.
+
+    Raises:
+        PluginError: When the extension is not supported.
+
+    Returns:
+        One of `gztar`, `tar` or `zip`.
+    """
+    for suffix, archive_format in _BUNDLE_FORMATS.items():
+        if name.endswith(suffix):
+            return archive_format
+    raise PluginError(f"Unsupported bundle extension for '{name}', use one of {', '.join(_BUNDLE_FORMATS)}")
+
+
+class _Bundle:
+    """An archive to which generated files are streamed as soon as they are written."""
+
+    def __init__(self, archive: tarfile.TarFile | zipfile.ZipFile, root: Path) -> None:
+        """Initialize the bundle.
+
+        Parameters:
+            archive: The opened archive.
+            root: The directory against which archive member names are computed.
+        """
+        self.archive = archive
+        self.root = root
+
+    def add(self, path: Path) -> None:
+        """Stream a file from disk into the archive.
+
+        The member name is the path relative to the site directory,
+        so that it matches the URL path of the file.
+
+        Parameters:
+            path: The path of the file to add.
+        """
+        arcname = path.relative_to(self.root).as_posix()
+        if isinstance(self.archive, zipfile.ZipFile):
+            self.archive.write(path, arcname)
+        else:
+            self.archive.add(path, arcname, recursive=False)
+
+
+@contextmanager
+def _open_bundle(path: Path, root: Path) -> Iterator[_Bundle]:
+    """Open a bundle for writing.
+
+    Parameters:
+        path: The path of the archive to create.
+        root: The directory against which archive member names are computed.
+
+    Yields:
+        The bundle.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    archive_format = _bundle_format(path.name)
+    archive: tarfile.TarFile | zipfile.ZipFile
+    if archive_format == "zip":
+        archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+    elif archive_format == "gztar":
+        archive = tarfile.open(path, "w:gz")  # noqa: SIM115
+    else:
+        archive = tarfile.open(path, "w")  # noqa: SIM115
+    with archive:
+        yield _Bundle(archive, root)
@@ -0,0 +1,152 @@
+# Persistent cache of page conversions, stored in a single SQLite file.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from typing import TYPE_CHECKING, Any
+
+from mkdocs_llmstxt._internal.debug import _get_version
+from mkdocs_llmstxt._internal.logger import _get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+_logger = _get_logger(__name__)
+
+# Bump when the conversion changes without a new release, or when the schema changes.
+_CACHE_FORMAT = 1
+_DISTRIBUTIONS = ("mkdocs-llmstxt", "beautifulsoup4", "markdownify", "mdformat", "mdformat-tables")
+
+
+def _fingerprint(settings: dict[str, Any], *parts: bytes) -> bytes:
+    """Compute the fingerprint of everything a conversion depends on, besides the page itself.
+
+    Parameters:
+        settings: The conversion settings, serializable to JSON.
+        *parts: Other dependencies, like the digest of the pre-processing module.
+
+    Returns:
+        The fingerprint.
+    """
+    versions = {dist: _get_version(dist) for dist in _DISTRIBUTIONS}
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([_CACHE_FORMAT, versions, settings], sort_keys=True).encode())
+    for part in parts:
+        digest.update(part)
+    return digest.digest()
+
+
+class _ConversionCache:
+    """A cache of converted pages, keyed by machine-independent digests.
+
+    Keys are computed from the page's destination URI, relative to the site directory,
+    its HTML, the URLs its links are rewritten to, and a fingerprint of the conversion settings,
+    so that cache files can be shared between machines and between builds of different versions of a site.
+    Entries that were not used by a build are removed when the cache is closed.
+    """
+
+    def __init__(self, path: Path, fingerprint: bytes) -> None:
+        """Open the cache, creating it if needed.
+
+        Parameters:
+            path: The path of the SQLite file.
+            fingerprint: The fingerprint of the conversion settings.
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self.pruned = 0
+        self._used: set[bytes] = set()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS pages (key BLOB PRIMARY KEY, markdown TEXT NOT NULL)")
+
+    def key(self, page_uri: str, html: str, links: bytes) -> bytes:
+        """Compute the key of a page.
+
+        Parameters:
+            page_uri: The destination URI of the page.
+            html: The HTML of the page.
+            links: A digest of the URLs the page's links are rewritten to.
+
+        Returns:
+            The key.
+        """
+        digest = hashlib.blake2b(self.fingerprint, digest_size=16)
+        digest.update(links)
+        digest.update(page_uri.encode())
+        digest.update(b"\0")
+        digest.update(html.encode())
+        return digest.digest()
+
+    def get(self, key: bytes) -> str | None:
+        """Return the Markdown of a page, if it was cached.
+
+        Parameters:
+            key: The key of the page.
+
+        Returns:
+            The Markdown, or none.
+        """
+        row = self._connection.execute("SELECT markdown FROM pages WHERE key = ?", (key,)).fetchone()
+        self._used.add(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key: bytes, markdown: str) -> None:
+        """Cache the Markdown of a page.
+
+        Parameters:
+            key: The key of the page.
+            markdown: The Markdown.
+        """
+        self._connection.execute("INSERT OR REPLACE INTO pages (key, markdown) VALUES (?, ?)", (key, markdown))
+        self._used.add(key)
+
+    def merge(self, paths: Iterable[Path]) -> None:
+        """Import the entries of other cache files, keeping existing entries.
+
+        Parameters:
+            paths: The paths of the other cache files. Missing files are skipped.
+        """
+        for path in paths:
+            if not path.exists():
+                _logger.debug(f"Conversion cache to import not found: {path}")
+                continue
+            try:
+                self._connection.execute("ATTACH DATABASE ? AS other", (str(path),))
+                try:
+                    imported = self._connection.execute(
+                        "INSERT OR IGNORE INTO pages (key, markdown) SELECT key, markdown FROM other.pages",
+                    ).rowcount
+                    self._connection.commit()
+                finally:
+                    self._connection.execute("DETACH DATABASE other")
+            except sqlite3.DatabaseError as error:
+                _logger.warning(f"Could not import conversion cache {path}: {error}")
+                continue
+            _logger.debug(f"Imported {imported} entries from conversion cache {path}")
+
+    def close(self, *, prune: bool = True) -> None:
+        """Save the cache and close it.
+
+        Parameters:
+            prune: Whether to remove the entries that were not looked up or stored since the cache was opened.
+        """
+        if prune:
+            self._connection.execute("CREATE TEMP TABLE used (key BLOB PRIMARY KEY)")
+            self._connection.executemany("INSERT INTO used (key) VALUES (?)", ((key,) for key in self._used))
+            self.pruned = self._connection.execute("DELETE FROM pages WHERE key NOT IN (SELECT key FROM used)").rowcount
+        self._connection.commit()
+        if self.pruned:
+            # Reclaim the space of removed entries, since cache files are saved and restored by CI.
+            self._connection.execute("VACUUM")
+        self._connection.close()
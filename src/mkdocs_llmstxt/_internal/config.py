@@ -6,6 +6,14 @@ from mkdocs.config import config_options as mkconf
 from mkdocs.config.base import Config as BaseConfig
 
 
+class _OutputConfig(BaseConfig):
+    """Configuration options of an additional llms output."""
+
+    markdown_description = mkconf.Optional(mkconf.Type(str))
+    full_output = mkconf.Optional(mkconf.Type(str))
+    sections = mkconf.DictOfItems(mkconf.ListOfItems(mkconf.Type((str, dict))))
+
+
 class _PluginConfig(BaseConfig):
     """Configuration options for the plugin."""
 
@@ -14,6 +22,35 @@ class _PluginConfig(BaseConfig):
     base_url = mkconf.Optional(mkconf.Type(str))
     markdown_description = mkconf.Optional(mkconf.Type(str))
     full_output = mkconf.Optional(mkconf.Type(str))
+    full_output_index = mkconf.Optional(mkconf.Type(str))
+    full_output_dedupe = mkconf.Type(bool, default=False)
+    full_output_dedupe_min_size = mkconf.Type(int, default=200)
+    bundle = mkconf.Optional(mkconf.Type(str))
+    fragment_cache = mkconf.ListOfItems(mkconf.Type(str), default=[])
+    fragment_cache_size = mkconf.Type(int, default=512)
+    mkdocstrings_objects = mkconf.Type(bool, default=False)
+    engine = mkconf.Choice(("markdownify", "streaming"), default="markdownify")
+    max_html_size = mkconf.Optional(mkconf.Type(int))
+    max_conversion_time = mkconf.Optional(mkconf.Type((int, float)))
+    max_nesting_depth = mkconf.Optional(mkconf.Type(int))
+    threads = mkconf.Type(int, default=1)
+    token_counter = mkconf.Optional(mkconf.File(exists=True))
+    token_counts = mkconf.Type(bool, default=False)
+    small_output = mkconf.Optional(mkconf.Type(str))
+    small_output_budget = mkconf.Type(int, default=50_000)
+    jsonl_output = mkconf.Optional(mkconf.Type(str))
+    metrics_file = mkconf.Optional(mkconf.Type(str))
+    memory_profile = mkconf.Type(bool, default=False)
+    memory_threshold = mkconf.Optional(mkconf.Type(int))
+    size_report = mkconf.Optional(mkconf.Type(str))
+    cache_file = mkconf.Optional(mkconf.Type(str))
+    cache_import = mkconf.ListOfItems(mkconf.Type(str), default=[])
+    lazy_serve = mkconf.Type(bool, default=False)
+    link_check = mkconf.Optional(mkconf.Choice(("warn", "fail")))
+    convert = mkconf.Type(bool, default=True)
+    outline_output = mkconf.Optional(mkconf.Type(str))
+    outline_depth = mkconf.Type(int, default=3)
+    split_level = mkconf.Optional(mkconf.Type(int))
     sections = mkconf.DictOfItems(
         # Each list item can either be:
         #
@@ -23,3 +60,4 @@ class _PluginConfig(BaseConfig):
         # We therefore accept both `str` and `dict` values.
         mkconf.ListOfItems(mkconf.Type((str, dict))),
     )
+    outputs = mkconf.DictOfItems(mkconf.SubConfig(_OutputConfig), default={})
@@ -0,0 +1,133 @@
+# Conversion of pages outside of MkDocs builds.
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from pathlib import PurePosixPath
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+from mkdocs_llmstxt._internal.limits import _convert_within_limits
+from mkdocs_llmstxt._internal.plugin import _generate_page_markdown
+from mkdocs_llmstxt._internal.preprocess import _load_preprocess_module
+from mkdocs_llmstxt._internal.streaming import _generate_page_markdown_streaming
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from types import ModuleType
+
+
+@dataclass(frozen=True)
+class ConversionOptions:
+    """Options of [`convert_pages`][mkdocs_llmstxt.convert_pages]."""
+
+    base_url: str = ""
+    """The base URL relative links are made absolute against. Empty to keep them relative."""
+    autoclean: bool = True
+    """Whether to remove elements that are not useful in Markdown, see [`autoclean`][mkdocs_llmstxt.autoclean]."""
+    preprocess: str | None = None
+    """The path of a Python module containing a `preprocess` function, like the plugin's `preprocess` option."""
+    engine: Literal["markdownify", "streaming"] = "markdownify"
+    """The conversion engine. The streaming engine does not support `preprocess`, setting both raises a `ValueError`."""
+    max_html_size: int | None = None
+    """The maximum size of the HTML of a page, in bytes, above which it is converted to plain text."""
+    max_conversion_time: float | None = None
+    """The maximum conversion time of a page, in seconds, above which it is converted to plain text."""
+    max_nesting_depth: int | None = None
+    """The maximum nesting depth of HTML elements, above which a page is converted to plain text."""
+    threads: int = 1
+    """The number of threads converting pages. Pages are converted in the calling thread when it is 1."""
+    max_in_flight: int | None = None
+    """The maximum number of pages read from the input but not yielded yet. Defaults to twice the number of threads."""
+
+    def __post_init__(self) -> None:
+        # Unlike the plugin, which warns and falls back to markdownify, fail early on explicit options.
+        if self.engine == "streaming" and self.preprocess is not None:
+            raise ValueError("The 'streaming' engine does not support 'preprocess'")
+
+
+class ConversionResult(NamedTuple):
+    """A page converted by [`convert_pages`][mkdocs_llmstxt.convert_pages]."""
+
+    uri: str
+    """The URI of the page, as given in the input."""
+    markdown: str
+    """The Markdown content."""
+    fallback: bool
+    """Whether the page exceeded a conversion limit and was converted to plain text."""
+
+
+def _convert(html: str, uri: str, options: ConversionOptions, module: ModuleType | None) -> ConversionResult:
+    convert = (
+        partial(
+            _generate_page_markdown_streaming,
+            html,
+            should_autoclean=options.autoclean,
+            base_uri=options.base_url,
+            page_uri=uri,
+        )
+        if options.engine == "streaming"
+        else partial(
+            _generate_page_markdown,
+            html,
+            should_autoclean=options.autoclean,
+            preprocess=module,
+            path=str(PurePosixPath(uri).with_suffix(".md")),
+            base_uri=options.base_url,
+            page_uri=uri,
+        )
+    )
+    markdown, error = _convert_within_limits(
+        html,
+        convert,
+        max_size=options.max_html_size,
+        max_depth=options.max_nesting_depth,
+        max_time=options.max_conversion_time,
+    )
+    return ConversionResult(uri, markdown, fallback=error is not None)
+
+
+def convert_pages(
+    pages: Iterable[tuple[str, str]],
+    options: ConversionOptions | None = None,
+) -> Iterator[ConversionResult]:
+    """Convert HTML pages to Markdown, yielding each page as soon as it is converted.
+
+    The input is consumed lazily, and at most `max_in_flight` pages are held at once,
+    so memory use does not depend on the number of pages.
+    With several threads, pages are yielded in the order they finish converting.
+
+    Parameters:
+        pages: The HTML of each page and its URI, relative to the site root (for example `usage/index.html`),
+            used to resolve relative links.
+        options: The conversion options.
+
+    Yields:
+        The converted pages.
+    """
+    options = options or ConversionOptions()
+    # The pre-processing module is loaded once, before converting pages.
+    module = _load_preprocess_module(options.preprocess) if options.preprocess else None
+    if options.threads <= 1:
+        for html, uri in pages:
+            yield _convert(html, uri, options, module)
+        return
+
+    max_in_flight = options.max_in_flight or 2 * options.threads
+    executor = ThreadPoolExecutor(options.threads, thread_name_prefix="mkdocs-llmstxt")
+    in_flight: set[Future[ConversionResult]] = set()
+    try:
+        for html, uri in pages:
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            in_flight.add(executor.submit(_convert, html, uri, options, module))
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Stop early when the consumer stops iterating, or when a conversion fails.
+        executor.shutdown(cancel_futures=True)
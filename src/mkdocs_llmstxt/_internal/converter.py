@@ -0,0 +1,137 @@
+# HTML to Markdown conversion.
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+
+import soupsieve
+from markdownify import ATX, MarkdownConverter
+
+from mkdocs_llmstxt._internal.limits import _check_deadline
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable, Sequence
+
+    from bs4 import Tag
+
+
+def _language_callback(tag: Tag) -> str:
+    for css_class in chain(tag.get("class") or (), (tag.parent.get("class") or ()) if tag.parent else ()):
+        if css_class.startswith("language-"):
+            return css_class[9:]
+    return ""
+
+
+_CONVERTER_OPTIONS: dict[str, Any] = {
+    "bullets": "-",
+    "code_language_callback": _language_callback,
+    "escape_underscores": False,
+    "heading_style": ATX,
+}
+
+
+class _FragmentCache:
+    """A bounded LRU cache of converted HTML fragments, safe to use from several threads."""
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize the cache.
+
+        Parameters:
+            maxsize: The maximum number of fragments to keep.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> str | None:
+        """Return a cached conversion, marking it as recently used.
+
+        Parameters:
+            key: The fragment key.
+
+        Returns:
+            The cached Markdown, or none.
+        """
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: str) -> None:
+        """Cache a conversion, evicting the least recently used one if the cache is full.
+
+        Parameters:
+            key: The fragment key.
+            value: The converted Markdown.
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Empty the cache and reset statistics."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Elements whose conversion depends on their neighbours, not only on their own HTML and ancestors:
+# list items are numbered by position, lists end differently depending on the next element,
+# and table rows are detected as header rows from their siblings and parents.
+_CONTEXT_DEPENDENT_TAGS = frozenset(("li", "ol", "tbody", "tfoot", "thead", "tr", "ul"))
+
+
+class _MarkdownConverter(MarkdownConverter):
+    """A Markdown converter that can memoize the conversion of repeated fragments.
+
+    It also aborts conversions running past the deadline set with `_time_limit`.
+    """
+
+    def __init__(self, *, fragment_selectors: Sequence[str] = (), fragment_cache_size: int = 512, **options: Any):
+        """Initialize the converter.
+
+        Parameters:
+            fragment_selectors: CSS selectors of the elements whose conversion should be memoized.
+            fragment_cache_size: The maximum number of memoized fragments.
+            **options: Options passed to [`markdownify.MarkdownConverter`][].
+        """
+        super().__init__(**options)
+        self._fragment_pattern = soupsieve.compile(", ".join(fragment_selectors)) if fragment_selectors else None
+        self.fragment_cache = _FragmentCache(fragment_cache_size)
+
+    def process_tag(self, node: Tag, *args: Any, **kwargs: Any) -> str:
+        # Only self-contained blocks are memoized: their conversion depends on their own HTML,
+        # on the conversion context (`parent_tags`), and on the name and classes of their parent,
+        # used for example by `_language_callback` and for images, but not on their siblings.
+        _check_deadline()
+        if (
+            self._fragment_pattern is None
+            or node.name in _CONTEXT_DEPENDENT_TAGS
+            or not self._fragment_pattern.match(node)
+        ):
+            return super().process_tag(node, *args, **kwargs)  # type: ignore[misc]
+        digest = hashlib.blake2b(str(node).encode(), digest_size=16).digest()
+        context = tuple(frozenset(arg) if isinstance(arg, set) else arg for arg in chain(args, kwargs.values()))
+        parent = (node.parent.name, tuple(node.parent.get("class") or ())) if node.parent else None
+        key = (digest, context, tuple(kwargs), parent)
+        if (markdown := self.fragment_cache.get(key)) is None:
+            markdown = super().process_tag(node, *args, **kwargs)  # type: ignore[misc]
+            self.fragment_cache.set(key, markdown)
+        return markdown
+
+
+_converter = _MarkdownConverter(**_CONVERTER_OPTIONS)
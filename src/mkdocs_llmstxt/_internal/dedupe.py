@@ -0,0 +1,105 @@
+# De-duplication of pages and blocks in the full output.
+
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+_re_fence = re.compile(r"^ *(`{3,}|~{3,})")
+
+
+def _blocks(markdown: str) -> Iterator[tuple[str, bool]]:
+    """Split Markdown into blocks separated by blank lines.
+
+    Code fences are never split, even when they contain blank lines.
+    Joining the yielded texts gives back the original Markdown.
+
+    Parameters:
+        markdown: The Markdown text.
+
+    Yields:
+        Texts, and whether they are blocks (or blank lines).
+    """
+    block: list[str] = []
+    fence = ""
+    for line in markdown.splitlines(keepends=True):
+        if match := _re_fence.match(line):
+            marker = match.group(1)
+            if not fence:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence) and not line.strip()[len(marker) :]:
+                fence = ""
+        elif not fence and not line.strip():
+            if block:
+                yield "".join(block), True
+                block = []
+            yield line, False
+            continue
+        block.append(line)
+    if block:
+        yield "".join(block), True
+
+
+class _Occurrence(NamedTuple):
+    title: str
+    md_url: str
+
+
+class _Deduplicator:
+    """Remember pages and blocks written to the full output, to replace repetitions with references."""
+
+    def __init__(self, min_size: int) -> None:
+        """Initialize the deduplicator.
+
+        Parameters:
+            min_size: The minimum size of blocks to de-duplicate, in characters.
+        """
+        self.min_size = min_size
+        self.pages: dict[bytes, str] = {}
+        self.blocks: dict[bytes, _Occurrence] = {}
+        self.replaced = 0
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def first_page(self, page_uri: str, content: str) -> str | None:
+        """Return the URI of a previously written page with the same content, or remember this one.
+
+        Parameters:
+            page_uri: The page URI.
+            content: The Markdown content of the page.
+
+        Returns:
+            The URI of the first page written with this content, or none if it is new.
+        """
+        first_uri = self.pages.setdefault(self._digest(content), page_uri)
+        return None if first_uri == page_uri else first_uri
+
+    def dedupe(self, content: str, title: str, md_url: str) -> str:
+        """Replace blocks already written by references to the page they first appeared in.
+
+        Parameters:
+            content: The Markdown content of the page.
+            title: The title of the page.
+            md_url: The URL of the Markdown version of the page.
+
+        Returns:
+            The de-duplicated Markdown.
+        """
+        parts = []
+        for text, is_block in _blocks(content):
+            if is_block and len(text.strip()) >= self.min_size:
+                occurrence = self.blocks.setdefault(self._digest(text.strip()), _Occurrence(title, md_url))
+                if occurrence.md_url != md_url:
+                    indent = text[: len(text) - len(text.lstrip(" "))]
+                    parts.append(f"{indent}*Same as in [{occurrence.title}]({occurrence.md_url}).*\n")
+                    self.replaced += 1
+                    continue
+            parts.append(text)
+        return "".join(parts)
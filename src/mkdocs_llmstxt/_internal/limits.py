@@ -0,0 +1,232 @@
+# Per-page conversion limits and plain-text fallback.
+
+from __future__ import annotations
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+class _ConversionLimitError(Exception):
+    """Raised when a page exceeds one of the configured conversion limits."""
+
+
+_deadline: ContextVar[tuple[float, float] | None] = ContextVar("_deadline", default=None)
+
+
+@contextmanager
+def _time_limit(seconds: float | None) -> Iterator[None]:
+    """Set a deadline for the conversion running in the current context.
+
+    Converters call [`_check_deadline`][] regularly to enforce it.
+
+    Parameters:
+        seconds: The maximum conversion time, or none for no limit.
+
+    Yields:
+        Nothing.
+    """
+    if seconds is None:
+        yield
+        return
+    token = _deadline.set((time.monotonic() + seconds, seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _check_deadline() -> None:
+    """Abort the current conversion if its deadline has passed.
+
+    Raises:
+        _ConversionLimitError: When the deadline has passed.
+    """
+    if (deadline := _deadline.get()) is not None and time.monotonic() > deadline[0]:
+        raise _ConversionLimitError(f"conversion took more than {deadline[1]} seconds")
+
+
+_VOID_ELEMENTS = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"},
+)
+
+
+class _DepthChecker(HTMLParser):
+    """Measure the nesting depth of HTML elements, stopping as soon as a maximum is exceeded."""
+
+    def __init__(self, max_depth: int) -> None:
+        super().__init__(convert_charrefs=True)
+        self.max_depth = max_depth
+        self.stack: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:  # noqa: ARG002
+        if tag in _VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        if len(self.stack) > self.max_depth:
+            raise _ConversionLimitError(f"elements are nested more than {self.max_depth} levels deep")
+
+    def handle_endtag(self, tag: str) -> None:
+        # Like BeautifulSoup, close all elements up to the matching open one, and ignore unmatched end tags.
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index] == tag:
+                del self.stack[index:]
+                return
+
+
+def _check_limits(html: str, *, max_size: int | None = None, max_depth: int | None = None) -> None:
+    """Check that a page can be converted within the size and depth limits.
+
+    Parameters:
+        html: The HTML content.
+        max_size: The maximum size of the HTML, in bytes.
+        max_depth: The maximum nesting depth of elements.
+
+    Raises:
+        _ConversionLimitError: When a limit is exceeded.
+    """
+    if max_size is not None and (size := len(html.encode())) > max_size:
+        raise _ConversionLimitError(f"HTML is {size} bytes, more than {max_size}")
+    if max_depth is not None:
+        checker = _DepthChecker(max_depth)
+        checker.feed(html)
+        checker.close()
+
+
+_BLOCK_ELEMENTS = frozenset(
+    {
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "br",
+        "dd",
+        "details",
+        "div",
+        "dl",
+        "dt",
+        "figcaption",
+        "figure",
+        "footer",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "hr",
+        "li",
+        "main",
+        "nav",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "summary",
+        "table",
+        "tr",
+        "ul",
+    },
+)
+_SKIPPED_ELEMENTS = frozenset({"script", "style", "template", "svg"})
+_re_blank_lines = re.compile(r"\n(?:[ \t]*\n)+")
+_re_spaces = re.compile(r"[ \t\r\f\v]+")
+
+
+class _TextExtractor(HTMLParser):
+    """Extract the text of an HTML document, one line per block element."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.skipped: list[str] = []
+        self.pre = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self.skipped:
+            if tag not in _VOID_ELEMENTS:
+                self.skipped.append(tag)
+            return
+        if tag in _SKIPPED_ELEMENTS or (tag == "a" and "headerlink" in (dict(attrs).get("class") or "").split()):
+            self.skipped.append(tag)
+            return
+        if tag == "pre":
+            self.pre += 1
+        if tag in _BLOCK_ELEMENTS:
+            self.parts.append("\n\n" if tag != "br" else "\n")
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:  # noqa: ARG002
+        if not self.skipped and tag in _BLOCK_ELEMENTS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.skipped:
+            if tag in self.skipped:
+                while self.skipped.pop() != tag:
+                    pass
+            return
+        if tag == "pre" and self.pre:
+            self.pre -= 1
+        if tag in _BLOCK_ELEMENTS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data: str) -> None:
+        if self.skipped:
+            return
+        if not self.pre:
+            data = _re_spaces.sub(" ", data.replace("\n", " "))
+            if not self.parts or self.parts[-1].endswith("\n"):
+                data = data.lstrip(" ")
+        if data:
+            self.parts.append(data)
+
+
+def _extract_text(html: str) -> str:
+    """Extract the text of a page, as a cheap fallback for Markdown conversion.
+
+    Parameters:
+        html: The HTML content.
+
+    Returns:
+        The text, with paragraphs separated by blank lines.
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    text = _re_blank_lines.sub("\n\n", "".join(extractor.parts))
+    return "\n".join(line.rstrip() for line in text.strip().split("\n")) + "\n"
+
+
+def _convert_within_limits(
+    html: str,
+    convert: Callable[[], str],
+    *,
+    max_size: int | None = None,
+    max_depth: int | None = None,
+    max_time: float | None = None,
+) -> tuple[str, Exception | None]:
+    """Convert a page, falling back to its plain text when it exceeds a conversion limit.
+
+    Parameters:
+        html: The HTML content.
+        convert: The function converting the page to Markdown.
+        max_size: The maximum size of the HTML, in bytes.
+        max_depth: The maximum nesting depth of elements.
+        max_time: The maximum conversion time, in seconds.
+
+    Returns:
+        The Markdown or plain text, and the reason of the fallback, if any.
+    """
+    try:
+        _check_limits(html, max_size=max_size, max_depth=max_depth)
+        with _time_limit(max_time):
+            return convert(), None
+    except (_ConversionLimitError, RecursionError) as error:
+        return _extract_text(html), error
@@ -0,0 +1,115 @@
+# Validation of links in generated Markdown.
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, NamedTuple
+from urllib.parse import unquote
+
+from mkdocs_llmstxt._internal.tokens import _re_fence
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from mkdocs.structure.toc import AnchorLink, TableOfContents
+
+
+_re_code_span = re.compile(r"(`+).*?\1")
+_re_link = re.compile(r"\]\(<?([^\s)>]+)|<(https?://[^\s>]+)>")
+
+
+class _BrokenLink(NamedTuple):
+    page: str
+    url: str
+    reason: str
+
+
+def _toc_anchors(toc: TableOfContents | list[AnchorLink]) -> Iterator[str]:
+    for item in toc:
+        yield item.id
+        yield from _toc_anchors(item.children)
+
+
+def _markdown_links(markdown: str) -> Iterator[str]:
+    """Find the targets of links in Markdown, outside of code.
+
+    Parameters:
+        markdown: The Markdown document.
+
+    Yields:
+        The link targets.
+    """
+    fence = ""
+    for line in markdown.splitlines():
+        if match := _re_fence.match(line):
+            marker = match.group(1)
+            if not fence:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence) and not line.strip()[len(marker) :]:
+                fence = ""
+            continue
+        if fence or ("](" not in line and "<http" not in line):
+            continue
+        for match in _re_link.finditer(_re_code_span.sub("", line)):
+            yield match.group(1) or match.group(2)
+
+
+class _LinkChecker:
+    """Check links of generated pages against the URLs and anchors of the llms outputs.
+
+    Each link is checked with a couple of set lookups, so checking is linear in the total number of links.
+    """
+
+    def __init__(self, base_url: str, site_urls: Iterable[str]) -> None:
+        """Initialize the checker.
+
+        Parameters:
+            base_url: The base URL of the outputs. Only links under it are checked.
+            site_urls: The URLs of the site's files and of the llms outputs.
+        """
+        self.base_url = base_url
+        self.site_urls = set(site_urls)
+        self.anchors: dict[str, set[str]] = {}
+        self.checked = 0
+        self.outside = 0
+
+    def add_page(self, md_url: str, anchors: Iterable[str]) -> None:
+        """Register a generated page and its anchors.
+
+        Parameters:
+            md_url: The URL of the Markdown version of the page.
+            anchors: The anchors of the page, from its table of contents.
+        """
+        self.anchors[md_url] = set(anchors)
+
+    def check(self, src_uri: str, md_url: str, markdown: str) -> list[_BrokenLink]:
+        """Check the links of a generated page.
+
+        Links to site files that are not part of the llms outputs are not broken, but counted in `outside`.
+
+        Parameters:
+            src_uri: The source URI of the page.
+            md_url: The URL of the Markdown version of the page.
+            markdown: The Markdown content of the page.
+
+        Returns:
+            The broken links.
+        """
+        broken = []
+        for link in _markdown_links(markdown):
+            if link.startswith("#"):
+                url, anchor = md_url, link[1:]
+            elif link.startswith(self.base_url):
+                url, _, anchor = link.partition("#")
+                url = url.partition("?")[0]
+            else:
+                continue
+            self.checked += 1
+            if (anchors := self.anchors.get(url)) is not None:
+                if anchor and unquote(anchor) not in anchors:
+                    broken.append(_BrokenLink(src_uri, link, "unknown anchor"))
+            elif url in self.site_urls:
+                self.outside += 1
+            else:
+                broken.append(_BrokenLink(src_uri, link, "unknown page"))
+        return broken
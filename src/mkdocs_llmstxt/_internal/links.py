@@ -0,0 +1,172 @@
+# Link rewriting.
+
+from __future__ import annotations
+
+import hashlib
+import posixpath
+import re
+from html import unescape
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import unquote, urljoin, urlparse
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup as Soup
+
+
+_re_scheme = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+_re_href = re.compile(r"""\shref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE)
+
+
+class _LinkIndex:
+    """An index of the site's files, to rewrite links to the URLs they should point to in generated Markdown.
+
+    Links to pages selected in the llms outputs point to their Markdown version,
+    links to other files point to their URL on the site.
+    """
+
+    def __init__(self, base_uri: str) -> None:
+        """Initialize the index.
+
+        Parameters:
+            base_uri: The base URI of the site.
+        """
+        self.base_uri = base_uri
+        self._urls: dict[str, str] = {}
+        self._memo: dict[str, dict[str, str]] = {}
+
+    def add(self, dest_uri: str, url: str) -> None:
+        """Register the URL to use for a destination URI.
+
+        Parameters:
+            dest_uri: The destination URI of the file, relative to the site directory.
+            url: The absolute URL links to this file should use.
+        """
+        self._urls[dest_uri] = url
+
+    def page_digest(self, html: str, page_uri: str) -> bytes:
+        """Return a digest of the rewrites of a page's links, which changes when they would be rewritten differently.
+
+        Links are found without parsing the HTML, so the digest may cover more links than the ones rewritten,
+        but it does not change when files the page does not link to are added or removed.
+
+        Parameters:
+            html: The HTML of the page.
+            page_uri: The destination URI of the page.
+
+        Returns:
+            The digest.
+        """
+        current_dir = Path(page_uri).parent.as_posix()
+        digest = hashlib.blake2b(self.base_uri.encode(), digest_size=16)
+        for match in _re_href.finditer(html):
+            if href := unescape(next(group for group in match.groups() if group is not None)):
+                digest.update(f"\0{href}\0{self.rewrite(href, current_dir)}".encode())
+        return digest.digest()
+
+    def urls(self) -> set[str]:
+        """Return the URLs of all indexed files.
+
+        Returns:
+            The URLs.
+        """
+        return set(self._urls.values())
+
+    def rewrite(self, href: str, current_dir: str) -> str:
+        """Rewrite a link found in a page.
+
+        Results are memoized per page directory, since relative links resolve the same way within one.
+
+        Parameters:
+            href: The link.
+            current_dir: The directory of the page's destination URI.
+
+        Returns:
+            The rewritten link.
+        """
+        if (memo := self._memo.get(current_dir)) is None:
+            memo = self._memo[current_dir] = {}
+        if (url := memo.get(href)) is None:
+            url = memo[href] = self._rewrite(href, current_dir)
+        return url
+
+    def _rewrite(self, href: str, current_dir: str) -> str:
+        # Absolute paths, anchors and external links are left untouched.
+        if href.startswith(("/", "#")) or _re_scheme.match(href):
+            return href
+        split = min((index for index in (href.find("?"), href.find("#")) if index != -1), default=len(href))
+        path, suffix = href[:split], href[split:]
+        target = posixpath.normpath(posixpath.join(current_dir, unquote(path)))
+        if path and target != ".." and not target.startswith("../"):
+            for candidate in self._candidates(target, is_dir=path.endswith("/")):
+                if (url := self._urls.get(candidate)) is not None:
+                    return url + suffix
+        return _convert_to_absolute_link(href, self.base_uri, current_dir)
+
+    @staticmethod
+    def _candidates(target: str, *, is_dir: bool) -> list[str]:
+        # Destination URIs a link can point to, with and without `use_directory_urls`.
+        if target == ".":
+            return ["index.html"]
+        if is_dir:
+            return [f"{target}/index.html", f"{target}.html"]
+        if target.endswith("/index.html"):
+            return [target, f"{target[:-11]}.html"]
+        if target.endswith(".html"):
+            return [target, f"{target[:-5]}/index.html"]
+        if "." not in target.rsplit("/", 1)[-1]:
+            return [target, f"{target}/index.html", f"{target}.html"]
+        return [target]
+
+
+def _convert_to_absolute_links(soup: Soup, base_uri: str, page_uri: str, links: _LinkIndex | None = None) -> None:
+    """Convert relative links to absolute ones in the HTML.
+
+    Parameters:
+        soup: The soup to modify.
+        base_uri: The base URI of the site.
+        page_uri: The destination URI of the page.
+        links: An optional index of the site's files, used to rewrite links to their target URL.
+    """
+    current_dir = Path(page_uri).parent.as_posix()
+
+    # Find all anchor tags with `href` attributes.
+    for link in soup.find_all("a", href=True):
+        href = link.get("href")
+
+        # Skip if `href` is not a string or is empty.
+        if not isinstance(href, str) or not href:
+            continue
+
+        if links is None:
+            link["href"] = _convert_to_absolute_link(href, base_uri, current_dir)
+        else:
+            link["href"] = links.rewrite(href, current_dir)
+
+
+def _convert_to_absolute_link(href: str, base_uri: str, current_dir: str) -> str:
+    # Skip if it's an absolute path
+    if href.startswith("/"):
+        return href
+
+    # Skip if it's an anchor link (starts with `#`).
+    if href.startswith("#"):
+        return href
+
+    # Skip if it's an external link
+    try:
+        if urlparse(href).scheme:
+            return href
+    except ValueError:
+        # Invalid URL, return as is
+        return href
+
+    # Relative path from current directory.
+    relative_base = urljoin(base_uri, current_dir + "/") if current_dir else base_uri
+    final_href = urljoin(relative_base, href)
+
+    # Convert directory paths (ending with `/`) to point to `index.md` files.
+    if final_href.endswith("/"):
+        final_href = final_href + "index.md"
+
+    return final_href
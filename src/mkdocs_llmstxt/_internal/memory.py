@@ -0,0 +1,120 @@
+# Memory profiling of page conversions and output assembly.
+
+from __future__ import annotations
+
+import gc
+import tracemalloc
+from typing import NamedTuple
+
+from mkdocs_llmstxt._internal.tracing import Span, TraceListener
+
+
+class _MemoryRecord(NamedTuple):
+    name: str
+    peak: int
+    retained: int
+    tree: int | None = None
+
+
+def _format_size(size: int) -> str:
+    return f"{size / 1024:.1f} KiB" if abs(size) < 1024 * 1024 else f"{size / 1024 / 1024:.1f} MiB"
+
+
+class _MemoryProfiler(TraceListener):
+    """Record allocations of each page conversion and of the output assembly, with `tracemalloc`.
+
+    The peak is the highest amount of memory allocated during the step,
+    the retained size is what is still allocated when it ends,
+    and the tree size is what remains allocated after parsing the HTML into a BeautifulSoup tree.
+    """
+
+    def __init__(self, threshold: int | None = None) -> None:
+        """Initialize the profiler.
+
+        Parameters:
+            threshold: The size above which trees and retained allocations of pages are flagged, in bytes.
+        """
+        self.threshold = threshold
+        self.pages: list[_MemoryRecord] = []
+        self.assembly: _MemoryRecord | None = None
+        self._started = False
+        self._baselines: dict[str, int] = {}
+        self._tree: int | None = None
+
+    def start(self) -> None:
+        """Start tracing allocations, unless they are already traced."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started = True
+
+    def stop(self) -> None:
+        """Stop tracing allocations, if tracing was started by this profiler."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def on_span_start(self, name: str, page: str | None) -> None:  # noqa: ARG002
+        if name in ("page", "assemble"):
+            tracemalloc.reset_peak()
+            self._tree = None
+        if name in ("page", "assemble", "parse"):
+            self._baselines[name] = tracemalloc.get_traced_memory()[0]
+
+    def on_span(self, span: Span) -> None:
+        if span.name not in self._baselines:
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        if span.name != "parse":
+            # BeautifulSoup trees are reference cycles: only count what the garbage collector cannot free.
+            gc.collect()
+        current = tracemalloc.get_traced_memory()[0]
+        baseline = self._baselines.pop(span.name)
+        # Freeing more than was allocated during the step is not interesting, count it as nothing retained.
+        current = max(current, baseline)
+        if span.name == "parse":
+            self._tree = current - baseline
+        elif span.name == "page":
+            self.pages.append(_MemoryRecord(span.page or "", peak - baseline, current - baseline, self._tree))
+        else:
+            self.assembly = _MemoryRecord(span.name, peak - baseline, current - baseline)
+
+    def flagged(self) -> list[tuple[_MemoryRecord, str]]:
+        """Return the pages whose tree or retained allocations exceed the threshold.
+
+        Returns:
+            The records of flagged pages, with the reason.
+        """
+        if self.threshold is None:
+            return []
+        flagged = []
+        for record in self.pages:
+            if record.tree is not None and record.tree > self.threshold:
+                flagged.append((record, f"BeautifulSoup tree of {_format_size(record.tree)}"))
+            if record.retained > self.threshold:
+                flagged.append((record, f"{_format_size(record.retained)} retained after conversion"))
+        return flagged
+
+    def report(self, top: int = 10) -> str:
+        """Report the pages with the highest peaks, and the assembly of outputs.
+
+        Parameters:
+            top: The number of pages to report.
+
+        Returns:
+            The report.
+        """
+        lines = ["Memory profile:"]
+        if self.assembly is not None:
+            lines.append(
+                f"  outputs assembly: peak {_format_size(self.assembly.peak)}, "
+                f"retained {_format_size(self.assembly.retained)}",
+            )
+        if self.pages:
+            lines.append(f"  top {min(top, len(self.pages))} of {len(self.pages)} page(s) by peak:")
+            for record in sorted(self.pages, key=lambda record: record.peak, reverse=True)[:top]:
+                tree = f", tree {_format_size(record.tree)}" if record.tree is not None else ""
+                lines.append(
+                    f"    {record.name}: peak {_format_size(record.peak)}, "
+                    f"retained {_format_size(record.retained)}{tree}",
+                )
+        return "\n".join(lines)
@@ -0,0 +1,281 @@
+# Markdown rendering of API objects collected by mkdocstrings.
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import TYPE_CHECKING, Any
+
+from mkdocs_llmstxt._internal.logger import _get_logger
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup as Soup
+    from bs4 import Tag
+    from mkdocs.config.defaults import MkDocsConfig
+
+
+_logger = _get_logger(__name__)
+
+# Signatures longer than this are written with one parameter per line.
+_LINE_LENGTH = 88
+_re_heading = re.compile(r"^h([1-6])$")
+# Cross-references like `[title][identifier]` or `[identifier][]`, resolved by autorefs in HTML only.
+_re_crossref = re.compile(r"\[([^\]\n]+)\]\[[^\]\n]*\]")
+
+
+def _get_python_handler(config: MkDocsConfig) -> Any | None:
+    """Return the Python handler of mkdocstrings, if it is enabled.
+
+    Parameters:
+        config: The MkDocs configuration.
+
+    Returns:
+        The handler, or none if mkdocstrings or its Python handler are not available.
+    """
+    plugin = config.plugins.get("mkdocstrings")
+    if plugin is None:
+        return None
+    try:
+        return plugin.handlers.get_handler("python")
+    except Exception as error:  # noqa: BLE001
+        _logger.debug(f"Could not get the Python handler of mkdocstrings: {error}")
+        return None
+
+
+def _cell(text: Any) -> str:
+    return str(text).strip().replace("\n", " ").replace("|", "\\|")
+
+
+def _code(text: Any) -> str:
+    return f"`{_cell(text)}`" if text else ""
+
+
+def _table(headers: list[str], rows: list[list[str]]) -> str:
+    lines = ["| " + " | ".join(headers) + " |", "|" + " --- |" * len(headers)]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def _format_parameters(parameters: Any, *, skip_first: bool) -> list[str]:
+    """Format parameters as they are written in a signature.
+
+    Parameters:
+        parameters: The Griffe parameters.
+        skip_first: Whether to skip a first `self` or `cls` parameter.
+
+    Returns:
+        The formatted parameters, with `/` and `*` markers.
+    """
+    parts = []
+    previous = ""
+    for index, parameter in enumerate(parameters):
+        if index == 0 and skip_first and parameter.name in ("self", "cls"):
+            continue
+        kind = parameter.kind.value
+        if previous == "positional-only" and kind != "positional-only":
+            parts.append("/")
+        if kind == "keyword-only" and previous not in ("keyword-only", "variadic positional"):
+            parts.append("*")
+        text = {"variadic positional": "*", "variadic keyword": "**"}.get(kind, "") + parameter.name
+        if parameter.annotation is not None:
+            text += f": {parameter.annotation}"
+        if parameter.default is not None and not kind.startswith("variadic"):
+            text += f" = {parameter.default}" if parameter.annotation is not None else f"={parameter.default}"
+        parts.append(text)
+        previous = kind
+    if previous == "positional-only":
+        parts.append("/")
+    return parts
+
+
+def _signature(obj: Any) -> str:
+    """Render the signature of a function or class.
+
+    Parameters:
+        obj: The Griffe object.
+
+    Returns:
+        The signature, in a Python code block.
+    """
+    is_class = obj.kind.value == "class"
+    parameters = _format_parameters(obj.parameters, skip_first=is_class or obj.parent.kind.value == "class")
+    returns = "" if is_class or obj.returns is None else f" -> {obj.returns}"
+    signature = f"{obj.name}({', '.join(parameters)}){returns}"
+    if len(signature) > _LINE_LENGTH and parameters:
+        lines = "".join(f"    {parameter},\n" for parameter in parameters)
+        signature = f"{obj.name}(\n{lines}){returns}"
+    return f"```python\n{signature}\n```"
+
+
+def _attribute(obj: Any) -> str:
+    if obj.kind.value == "type alias":
+        return f"```python\ntype {obj.name} = {obj.value}\n```"
+    text = obj.name
+    if obj.annotation is not None:
+        text += f": {obj.annotation}"
+    if obj.value is not None:
+        text += f" = {obj.value}"
+    return f"```python\n{text}\n```"
+
+
+def _section(section: Any) -> str | None:
+    """Render a docstring section.
+
+    Parameters:
+        section: The Griffe docstring section.
+
+    Returns:
+        The Markdown, or none if the section kind is not supported.
+    """
+    kind = section.kind.value
+    value = section.value
+    title = f"**{section.title or kind.capitalize()}:**\n\n"
+    if kind == "text":
+        return value
+    if kind in ("parameters", "other parameters"):
+        rows = [
+            [
+                _code(item.name),
+                _code(item.annotation),
+                _cell(item.description),
+                _code(item.default) if item.default is not None else "*required*",
+            ]
+            for item in value
+        ]
+        return title + _table(["Name", "Type", "Description", "Default"], rows)
+    if kind in ("returns", "yields", "receives") and not any(item.name for item in value):
+        rows = [[_code(item.annotation), _cell(item.description)] for item in value]
+        return title + _table(["Type", "Description"], rows)
+    if kind in ("attributes", "type parameters", "returns", "yields", "receives"):
+        rows = [[_code(item.name), _code(item.annotation), _cell(item.description)] for item in value]
+        return title + _table(["Name", "Type", "Description"], rows)
+    if kind in ("raises", "warns"):
+        rows = [[_code(item.annotation), _cell(item.description)] for item in value]
+        return title + _table(["Type", "Description"], rows)
+    if kind in ("functions", "classes", "modules", "type aliases"):
+        rows = [[_code(item.name), _cell(item.description)] for item in value]
+        return title + _table(["Name", "Description"], rows)
+    if kind == "examples":
+        parts = [text if sub_kind.value == "text" else f"```pycon\n{text}\n```" for sub_kind, text in value]
+        return title + "\n\n".join(parts)
+    if kind == "deprecated":
+        version = f" {value.version}" if value.version else ""
+        return f"**Deprecated{version}:** {value.description}"
+    if kind == "admonition":
+        return f"**{section.title or value.kind.capitalize()}:**\n\n{value.contents}"
+    return None
+
+
+def _render_object(obj: Any, heading: Tag, *, show_signature: bool) -> str | None:
+    """Render an object, without its members.
+
+    Parameters:
+        obj: The Griffe object.
+        heading: The heading of the object in the HTML.
+        show_signature: Whether the HTML shows the signature of classes.
+
+    Returns:
+        The Markdown, or none if the object cannot be rendered.
+    """
+    level = int(match.group(1)) if (match := _re_heading.match(heading.name)) else 6
+    # Names are only wrapped in a dedicated element when signatures are separated.
+    name = heading.find(class_="doc-object-name") or heading.find("code")
+    parts = [f"{'#' * level} {name.get_text(strip=True) if name else heading['id']}"]
+    kind = obj.kind.value
+    if kind == "function" or (kind == "class" and show_signature):
+        parts.append(_signature(obj))
+    elif kind in ("attribute", "type alias"):
+        parts.append(_attribute(obj))
+    if kind == "class" and obj.bases:
+        parts.append("Bases: " + ", ".join(_code(base) for base in obj.bases))
+    if obj.docstring is not None:
+        for section in obj.docstring.parsed:
+            if (text := _section(section)) is None:
+                return None
+            parts.append(_re_crossref.sub(r"\1", text))
+    return "\n\n".join(parts)
+
+
+class _ObjectRenderer:
+    """Render the API objects of a page from the data collected by mkdocstrings."""
+
+    def __init__(self, handler: Any) -> None:
+        """Initialize the renderer.
+
+        Parameters:
+            handler: The Python handler of mkdocstrings.
+        """
+        self.handler = handler
+        self.rendered = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def _lookup(self, identifier: str) -> Any | None:
+        try:
+            # Empty options make mkdocstrings look up already collected objects only.
+            return self.handler.collect(identifier, {})
+        except Exception:  # noqa: BLE001
+            return None
+
+    def _render(self, element: Tag) -> str | None:
+        parts = []
+        for div in (element, *element.select("div.doc-object")):
+            heading = div.find(class_="doc-heading", recursive=False)
+            if heading is None or not heading.get("id"):
+                return None
+            if (obj := self._lookup(str(heading["id"]))) is None:
+                return None
+            show_signature = div.find(class_="doc-signature", recursive=False) is not None
+            if (text := _render_object(obj, heading, show_signature=show_signature)) is None:
+                return None
+            parts.append(text)
+        return "\n\n".join(parts)
+
+    def replace(self, soup: Soup) -> dict[str, str]:
+        """Replace the API objects of a page with placeholders.
+
+        Objects that cannot be found in the collected data, or that are rendered without a heading,
+        are left untouched, to be converted from HTML like the rest of the page.
+        Their members are still rendered from collected data when possible.
+
+        Parameters:
+            soup: The soup to modify.
+
+        Returns:
+            The Markdown of each object, by placeholder.
+        """
+        objects: dict[str, str] = {}
+        # Collected data is shared by all pages, and handlers are not meant to be used from several threads.
+        with self._lock:
+            self._replace(soup, objects)
+        return objects
+
+    def _replace(self, soup: Soup, objects: dict[str, str]) -> None:
+        # Top-level objects are found before replacing any, since replaced members have no parent anymore.
+        roots = [
+            element
+            for element in soup.select("div.doc-object")
+            if element.find_parent("div", class_="doc-object") is None
+        ]
+        for element in roots:
+            self._replace_object(soup, element, objects)
+
+    def _replace_object(self, soup: Soup, element: Tag, objects: dict[str, str]) -> None:
+        if (markdown := self._render(element)) is None:
+            # Root headings are hidden by default: the object itself is converted from HTML,
+            # but its members can still be rendered one by one.
+            self.fallbacks += 1
+            members = [
+                child
+                for child in element.select("div.doc-object")
+                if child.find_parent("div", class_="doc-object") is element
+            ]
+            for member in members:
+                self._replace_object(soup, member, objects)
+            return
+        placeholder = f"mkdocsllmstxtobject{len(objects)}"
+        paragraph = soup.new_tag("p")
+        paragraph.string = placeholder
+        element.replace_with(paragraph)
+        objects[placeholder] = markdown
+        self.rendered += 1
@@ -0,0 +1,79 @@
+# Outline of the selected pages, built from their table of contents.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from mkdocs_llmstxt._internal.logger import _get_logger
+from mkdocs_llmstxt._internal.tracing import trace_count, trace_span
+from mkdocs_llmstxt._internal.writers import OutputWriter, _group_sections
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+    from mkdocs.structure.toc import AnchorLink, TableOfContents
+
+    from mkdocs_llmstxt._internal.writers import OutputContext, PageRecord
+
+
+_logger = _get_logger(__name__)
+
+
+def _outline_items(toc: Iterable[AnchorLink], url: str, depth: int, indent: str) -> Iterator[str]:
+    for item in toc:
+        if item.level > depth:
+            continue
+        yield f"{indent}- [{item.title}]({url}#{item.id})"
+        yield from _outline_items(item.children, url, depth, indent + "  ")
+
+
+def _page_outline(toc: TableOfContents, url: str, depth: int) -> list[str]:
+    """Build the outline of a page, as nested list items.
+
+    Parameters:
+        toc: The table of contents of the page.
+        url: The URL of the page headings point to.
+        depth: The deepest heading level to include.
+
+    Returns:
+        The list items, without the item of the page itself.
+    """
+    items = list(toc)
+    # The page title is already the parent item, skip it when it is the only top-level heading.
+    if len(items) == 1 and items[0].level == 1:
+        items = items[0].children
+    return list(_outline_items(items, url, depth, "  "))
+
+
+class _OutlineWriter(OutputWriter):
+    """Write the outline of pages, listing their headings."""
+
+    def __init__(self, name: str, outlines: dict[str, tuple[str, list[str]]]) -> None:
+        """Initialize the writer.
+
+        Parameters:
+            name: The path of the outline, relative to the site directory.
+            outlines: The URL and outline of each page, by source URI.
+        """
+        self.name = name
+        self.outlines = outlines
+
+    def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:
+        lines = [context.header.rstrip("\n"), ""]
+        for section, section_pages in _group_sections(pages, context.sections):
+            lines += [f"## {section}", ""]
+            for page in section_pages:
+                url, items = self.outlines.get(page.src_uri, (page.md_url, []))
+                description = f": {page.description}" if page.description else ""
+                lines.append(f"- [{page.title}]({url}){description}")
+                lines.extend(items)
+            lines.append("")
+
+        outline_file = context.site_dir.joinpath(self.name)
+        outline_file.parent.mkdir(parents=True, exist_ok=True)
+        with trace_span("write"):
+            outline_file.write_text("\n".join(lines), encoding="utf8")
+        trace_count("written_files")
+        _logger.debug(f"Generated file /{self.name}")
+        return [outline_file]
@@ -3,27 +3,74 @@
 from __future__ import annotations
 
 import fnmatch
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from itertools import chain
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import TYPE_CHECKING, NamedTuple, cast
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
 
 import mdformat
 from bs4 import BeautifulSoup as Soup
-from bs4 import Tag
-from markdownify import ATX, MarkdownConverter
 from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.exceptions import PluginError
 from mkdocs.plugins import BasePlugin
 from mkdocs.structure.pages import Page
 
+from mkdocs_llmstxt._internal.bundle import _bundle_format, _open_bundle
+from mkdocs_llmstxt._internal.cache import _ConversionCache, _fingerprint
 from mkdocs_llmstxt._internal.config import _PluginConfig
+from mkdocs_llmstxt._internal.converter import _CONVERTER_OPTIONS, _converter, _MarkdownConverter
+from mkdocs_llmstxt._internal.limits import _convert_within_limits
+from mkdocs_llmstxt._internal.linkcheck import _LinkChecker, _toc_anchors
+from mkdocs_llmstxt._internal.links import _convert_to_absolute_links, _LinkIndex
 from mkdocs_llmstxt._internal.logger import _get_logger
-from mkdocs_llmstxt._internal.preprocess import _preprocess, autoclean
+from mkdocs_llmstxt._internal.memory import _MemoryProfiler
+from mkdocs_llmstxt._internal.objects import _get_python_handler, _ObjectRenderer
+from mkdocs_llmstxt._internal.outline import _OutlineWriter, _page_outline
+from mkdocs_llmstxt._internal.preprocess import (
+    BatchPage,
+    _autoclean_steps,
+    _load_preprocess_module,
+    _preprocess,
+    _run_batch_hook,
+    autoclean,
+)
+from mkdocs_llmstxt._internal.serve import _LazyApp
+from mkdocs_llmstxt._internal.sizes import _PageSizes, _size, _SizeReport
+from mkdocs_llmstxt._internal.split import _heading_ids, _toc_headings
+from mkdocs_llmstxt._internal.streaming import _generate_page_markdown_streaming
+from mkdocs_llmstxt._internal.tokens import _load_token_counter
+from mkdocs_llmstxt._internal.tracing import (
+    _OpenMetricsExporter,
+    add_trace_listener,
+    remove_trace_listener,
+    trace_count,
+    trace_span,
+)
+from mkdocs_llmstxt._internal.writers import (
+    OutputContext,
+    OutputWriter,
+    PageRecord,
+    _FullOutputWriter,
+    _JsonlWriter,
+    _LlmsTxtWriter,
+    _PagesWriter,
+    _registered_writers,
+    _SmallOutputWriter,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from types import ModuleType
     from typing import Any
 
+    from markdownify import MarkdownConverter
     from mkdocs.config.defaults import MkDocsConfig
+    from mkdocs.livereload import LiveReloadServer
     from mkdocs.structure.files import Files
     from mkdocs.structure.pages import Page
 
@@ -36,6 +83,28 @@ class _MDPageInfo(NamedTuple):
     path_md: Path
     md_url: str
     content: str
+    tokens: int | None = None
+
+
+class _PendingPage(NamedTuple):
+    future: Future[str]
+    src_uri: str
+    cache_key: bytes | None
+
+
+class _Variant(NamedTuple):
+    name: str
+    sections: dict[str, dict[str, str]]
+    markdown_description: str | None
+    full_output: str | None
+
+
+class _LazyPage(NamedTuple):
+    src_uri: str
+    html: str
+    path_md: Path
+    dest_uri: str
+    etag: str
 
 
 class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
@@ -55,8 +124,35 @@ class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
 
     _base_url: str
     _sections: dict[str, dict[str, str]]
+    _variants: list[_Variant]
     _file_uris: set[str]
+    _converter: _MarkdownConverter
+    _streaming: bool
     _md_pages: dict[str, _MDPageInfo]
+    _raw_files: dict[str, _MDPageInfo]
+    _fallbacks: list[str]
+    _count_tokens: Callable[[str], int] | None
+    _links: _LinkIndex
+    _objects: _ObjectRenderer | None
+    _metrics: _OpenMetricsExporter | None = None
+    _memory: _MemoryProfiler | None = None
+    _sizes: _SizeReport | None
+    _anchors: dict[str, list[str]]
+    _outlines: dict[str, tuple[str, list[str]]]
+    _headings: dict[str, list[tuple[str, str]]]
+    _cache: _ConversionCache | None = None
+    _conversion_digest: bytes
+    _preprocess_module: ModuleType | None = None
+    _executor: ThreadPoolExecutor | None = None
+    _pending: list[_PendingPage]
+    _serving: bool = False
+    _dirty: bool = False
+    _lazy: bool = False
+    _lazy_pages: dict[str, _LazyPage]
+    _lazy_pending: dict[str, _LazyPage]
+    _lazy_cache: dict[str, str]
+    _lazy_lock: threading.RLock
+    _building: bool = False
 
     def _expand_inputs(self, inputs: list[str | dict[str, str]], page_uris: list[str]) -> dict[str, str]:
         expanded: dict[str, str] = {}
@@ -73,6 +169,22 @@ class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
                 expanded[input_file] = description
         return expanded
 
+    def on_startup(self, *, command: str, dirty: bool) -> None:
+        """Remember whether the site is being served.
+
+        Hook for the [`on_startup` event](https://www.mkdocs.org/user-guide/plugins/#on_startup).
+        Defining it also keeps the plugin instance across rebuilds, to reuse lazily converted pages.
+
+        Parameters:
+            command: The MkDocs command being run.
+            dirty: Whether the build is dirty.
+        """
+        self._serving = command == "serve"
+        self._dirty = dirty
+        self._lazy_pages = {}
+        self._lazy_cache = {}
+        self._lazy_lock = threading.RLock()
+
     def on_config(self, config: MkDocsConfig) -> MkDocsConfig | None:
         """Save the global MkDocs configuration.
 
@@ -86,6 +198,12 @@ class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
         Returns:
             The same, untouched config.
         """
+        # When serving, requests convert pages lazily from the server threads, with the state of the build:
+        # wait for them to finish, and make them wait for the rebuild to complete, instead of seeing it half-reset.
+        if self._serving and not self._building:
+            self._lazy_lock.acquire()
+            self._building = True
+
         if config.site_url is None:
             raise ValueError("'site_url' must be set in the MkDocs configuration to be used with the 'llmstxt' plugin")
         self.mkdocs_config = config
@@ -99,9 +217,74 @@ class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
         if not self._base_url.endswith("/"):
             self._base_url += "/"
 
+        if self.config.full_output_index is not None and self.config.full_output is None:
+            _logger.warning("'full_output_index' is set but 'full_output' is not, no index will be generated")
+
+        if self.config.fragment_cache:
+            self._converter = _MarkdownConverter(
+                fragment_selectors=self.config.fragment_cache,
+                fragment_cache_size=self.config.fragment_cache_size,
+                **_CONVERTER_OPTIONS,
+            )
+        else:
+            self._converter = _converter
+
+        # The streaming engine never builds a soup, so it cannot run a `preprocess` function
+        # nor replace mkdocstrings objects.
+        self._streaming = self.config.engine == "streaming"
+        if self._streaming and self.config.preprocess:
+            _logger.warning("The 'streaming' engine does not support 'preprocess', falling back to 'markdownify'")
+            self._streaming = False
+        if self._streaming and self.config.mkdocstrings_objects:
+            _logger.warning(
+                "The 'streaming' engine does not support 'mkdocstrings_objects', falling back to 'markdownify'",
+            )
+            self._streaming = False
+        if self._streaming and self.config.size_report:
+            _logger.warning("The 'streaming' engine does not support 'size_report', falling back to 'markdownify'")
+            self._streaming = False
+
+        # Lazy conversions only make sense when serving, static builds always convert every page.
+        self._lazy = self.config.lazy_serve and self._serving
+
+        # Allocations of threads would be attributed to whichever page is being profiled.
+        self._threads = self.config.threads
+        if self._threads > 1 and self.config.memory_profile:
+            _logger.warning("'memory_profile' is not supported with 'threads', converting pages serially")
+            self._threads = 1
+
+        # Tokens are only counted when needed, since user-defined counters can be slow.
+        if self.config.token_counts or self.config.small_output is not None:
+            self._count_tokens = _load_token_counter(self.config.token_counter)
+        else:
+            self._count_tokens = None
+
+        if not self.config.convert and self.config.outline_output is None:
+            _logger.warning("'convert' is disabled and 'outline_output' is not set, no output will be generated")
+
+        # Fail early on unsupported archive formats.
+        if self.config.bundle is not None:
+            _bundle_format(self.config.bundle)
+
+        # Start from fresh metrics and profiles on each build, including rebuilds when serving.
+        if self._metrics is not None:
+            remove_trace_listener(self._metrics)
+            self._metrics = None
+        if self.config.metrics_file is not None:
+            self._metrics = _OpenMetricsExporter()
+            add_trace_listener(self._metrics)
+        if self._memory is not None:
+            remove_trace_listener(self._memory)
+            self._memory.stop()
+            self._memory = None
+        if self.config.memory_profile:
+            self._memory = _MemoryProfiler(self.config.memory_threshold)
+            self._memory.start()
+            add_trace_listener(self._memory)
+
         return config
 
-    def on_files(self, files: Files, *, config: MkDocsConfig) -> Files | None:  # noqa: ARG002
+    def on_files(self, files: Files, *, config: MkDocsConfig) -> Files | None:
         """Expand inputs for generated files.
 
         Hook for the [`on_files` event](https://www.mkdocs.org/user-guide/plugins/#on_files).
@@ -114,15 +297,116 @@ class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
         Returns:
             Modified collection or none.
         """
-        page_uris = list(files.src_uris)
+        # Other files can be listed explicitly, but patterns only match pages, not to include assets by mistake.
+        page_uris = [file.src_uri for file in files.documentation_pages()]
         self._sections = {
             section_name: self._expand_inputs(file_list, page_uris=page_uris)  # type: ignore[arg-type]
             for section_name, file_list in self.config.sections.items()
         }
-        self._file_uris = set(chain.from_iterable(self._sections.values()))
+        self._variants = [
+            _Variant("llms.txt", self._sections, self.config.markdown_description, self.config.full_output),
+            *(
+                _Variant(
+                    name,
+                    {
+                        section_name: self._expand_inputs(file_list, page_uris=page_uris)  # type: ignore[arg-type]
+                        for section_name, file_list in output.sections.items()
+                    },
+                    output.markdown_description,
+                    output.full_output,
+                )
+                for name, output in self.config.outputs.items()
+            ),
+        ]
+        # Pages selected in several outputs are converted once.
+        self._file_uris = set(
+            chain.from_iterable(chain.from_iterable(variant.sections.values()) for variant in self._variants),
+        )
+
+        # Links to selected pages point to their Markdown version, other links to the site.
+        # Selected files that are not pages are included as they are copied to the site.
+        self._links = _LinkIndex(self._base_url)
+        self._raw_files = {}
+        for file in files:
+            if file.src_uri in self._file_uris and file.is_documentation_page():
+                self._links.add(file.dest_uri, self._md_url(file.dest_uri))
+            else:
+                url = urljoin(self._base_url, file.url)
+                self._links.add(file.dest_uri, url)
+                if file.src_uri in self._file_uris:
+                    title = PurePosixPath(file.src_uri).name
+                    self._raw_files[file.src_uri] = _MDPageInfo(title, Path(file.abs_dest_path), url, "")
         self._md_pages = {}
+        self._anchors = {}
+        self._outlines = {}
+        self._headings = {}
+        self._fallbacks = []
+        self._sizes = _SizeReport() if self.config.size_report is not None else None
+        # Pages of the previous build are served until this one completes.
+        self._lazy_pending = {}
+        self._pending = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._threads > 1 and self.config.convert and not self._lazy:
+            self._executor = ThreadPoolExecutor(self._threads, thread_name_prefix="mkdocs-llmstxt")
+
+        # Conversion settings can change between builds when serving.
+        self._conversion_digest = self._conversion_fingerprint()
+
+        # Keys depend on the link index, so the cache is opened once files are known.
+        if self._cache is not None:
+            self._cache.close(prune=False)
+            self._cache = None
+        if self.config.cache_file is not None:
+            self._cache = self._open_cache(config, self.config.cache_file)
+        self._converter.fragment_cache.clear()
+
+        # The module is loaded once per build, so that its top-level code runs once,
+        # and so that changes are picked up when serving.
+        self._preprocess_module = None
+        if self.config.preprocess and self.config.convert:
+            self._preprocess_module = _load_preprocess_module(self.config.preprocess)
+
+        # mkdocstrings sets up its handlers in `on_config`, so they are only available from here.
+        self._objects = None
+        if self.config.mkdocstrings_objects:
+            if (handler := _get_python_handler(config)) is not None:
+                self._objects = _ObjectRenderer(handler)
+            else:
+                _logger.warning(
+                    "'mkdocstrings_objects' is enabled but the Python handler of mkdocstrings is not available, "
+                    "API objects will be converted from HTML",
+                )
         return files
 
+    def _conversion_fingerprint(self) -> bytes:
+        settings = {
+            "autoclean": self.config.autoclean,
+            "engine": "streaming" if self._streaming else "markdownify",
+            "mkdocstrings_objects": self.config.mkdocstrings_objects,
+        }
+        # Only the content of the pre-processing module matters, not its location.
+        preprocess = Path(self.config.preprocess).read_bytes() if self.config.preprocess else b""
+        return _fingerprint(settings, hashlib.blake2b(preprocess).digest())
+
+    def _open_cache(self, config: MkDocsConfig, cache_file: str) -> _ConversionCache:
+        config_dir = Path(config.config_file_path).parent if config.config_file_path else Path.cwd()
+        cache = _ConversionCache(config_dir.joinpath(cache_file), self._conversion_digest)
+        cache.merge(config_dir.joinpath(path) for path in self.config.cache_import)
+        return cache
+
+    def _cache_key(self, cache: _ConversionCache, html: str, page_uri: str) -> bytes:
+        # Pages only depend on the rewrites of their own links, not on the whole link index.
+        return cache.key(page_uri, html, self._links.page_digest(html, page_uri))
+
+    def _md_url(self, dest_uri: str) -> str:
+        md_url = Path(dest_uri).with_suffix(".md").as_posix()
+        # Apply the same logic as in the `Page.url` property.
+        if md_url in (".", "./"):
+            md_url = ""
+        return urljoin(self._base_url, md_url)
+
     def on_page_content(self, html: str, *, page: Page, **kwargs: Any) -> str | None:  # noqa: ARG002
         """Convert page content into a Markdown file and save the result to be processed in the `on_post_build` hook.
 
@@ -134,29 +418,201 @@ class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
         """
         if (src_uri := page.file.src_uri) in self._file_uris:
             path_md = Path(page.file.abs_dest_path).with_suffix(".md")
-            page_md = _generate_page_markdown(
+            if self.config.link_check is not None:
+                self._anchors[src_uri] = list(_toc_anchors(page.toc))
+            # Without conversion, the outline links to HTML pages.
+            url = self._md_url(page.file.dest_uri) if self.config.convert else urljoin(self._base_url, page.url)
+            if self.config.split_level is not None:
+                self._headings[src_uri] = _toc_headings(page.toc, self.config.split_level, _heading_ids(html))
+            if self.config.outline_output is not None:
+                self._outlines[src_uri] = (url, _page_outline(page.toc, url, self.config.outline_depth))
+            if not self.config.convert:
+                self._md_pages[src_uri] = _MDPageInfo(self._page_title(page), path_md, url, "")
+                return html
+            if self._lazy:
+                self._add_lazy_page(html, page, path_md)
+                return html
+            if self._executor is not None:
+                self._submit_page(html, page, path_md, url)
+                return html
+            with trace_span("page", page=src_uri):
+                page_md = None
+                if self._cache is not None:
+                    cache_key = self._cache_key(self._cache, html, page.file.dest_uri)
+                    page_md = self._cache.get(cache_key)
+                if page_md is None:
+                    page_md = self._convert_page(html, src_uri, path_md, page.file.dest_uri)
+                    # Plain-text fallbacks depend on the machine's speed, they are not cached.
+                    if self._cache is not None and src_uri not in self._fallbacks:
+                        self._cache.set(cache_key, page_md)
+                trace_count("pages")
+
+                self._md_pages[src_uri] = _MDPageInfo(
+                    title=self._page_title(page),
+                    path_md=path_md,
+                    md_url=url,
+                    content=page_md,
+                    tokens=self._count_tokens(page_md) if self._count_tokens else None,
+                )
+
+        return html
+
+    def _submit_page(self, html: str, page: Page, path_md: Path, url: str) -> None:
+        src_uri = page.file.src_uri
+        # SQLite connections and token counters are only used from the main thread.
+        cache_key = page_md = None
+        if self._cache is not None:
+            cache_key = self._cache_key(self._cache, html, page.file.dest_uri)
+            page_md = self._cache.get(cache_key)
+        if page_md is None:
+            future = cast("ThreadPoolExecutor", self._executor).submit(
+                self._convert_page_traced,
                 html,
-                should_autoclean=self.config.autoclean,
-                preprocess=self.config.preprocess,
-                path=str(path_md),
-                base_uri=self._base_url,
-                page_uri=page.file.dest_uri,
+                src_uri,
+                path_md,
+                page.file.dest_uri,
             )
+            self._pending.append(_PendingPage(future, src_uri, cache_key))
+            page_md = ""
+        else:
+            trace_count("pages")
+        # Pages are registered in build order, their content is filled in once converted.
+        self._md_pages[src_uri] = _MDPageInfo(
+            title=self._page_title(page),
+            path_md=path_md,
+            md_url=url,
+            content=page_md,
+            tokens=self._count_tokens(page_md) if self._count_tokens and page_md else None,
+        )
+
+    def _convert_page_traced(self, html: str, src_uri: str, path_md: Path, page_uri: str) -> str:
+        with trace_span("page", page=src_uri):
+            markdown = self._convert_page(html, src_uri, path_md, page_uri)
+            trace_count("pages")
+        return markdown
+
+    def _collect_pages(self) -> None:
+        for pending in self._pending:
+            page_md = pending.future.result()
+            if self._cache is not None and pending.cache_key is not None and pending.src_uri not in self._fallbacks:
+                self._cache.set(pending.cache_key, page_md)
+            tokens = self._count_tokens(page_md) if self._count_tokens else None
+            self._md_pages[pending.src_uri] = self._md_pages[pending.src_uri]._replace(content=page_md, tokens=tokens)
+        self._pending = []
+        cast("ThreadPoolExecutor", self._executor).shutdown()
+        self._executor = None
+
+    @staticmethod
+    def _page_title(page: Page) -> str:
+        return str(page.title) if page.title is not None else page.file.src_uri
+
+    def _add_lazy_page(self, html: str, page: Page, path_md: Path) -> None:
+        src_uri = page.file.src_uri
+        # Like keys of the conversion cache, entity tags change with conversion settings and link rewrites.
+        etag = hashlib.blake2b(self._conversion_digest, digest_size=16)
+        etag.update(self._links.page_digest(html, page.file.dest_uri))
+        etag.update(f"\0{page.file.dest_uri}\0{html}".encode())
+        md_path = Path(page.file.dest_uri).with_suffix(".md").as_posix()
+        self._lazy_pending[md_path] = _LazyPage(src_uri, html, path_md, page.file.dest_uri, f'"{etag.hexdigest()}"')
+        self._md_pages[src_uri] = _MDPageInfo(
+            title=self._page_title(page),
+            path_md=path_md,
+            md_url=self._md_url(page.file.dest_uri),
+            content="",
+        )
+
+    def _lazy_markdown(self, page: _LazyPage) -> str:
+        # Requests are served from another thread than the builds, one at a time, and never during a build.
+        with self._lazy_lock:
+            if (markdown := self._lazy_cache.get(page.etag)) is None:
+                with trace_span("page", page=page.src_uri):
+                    markdown = self._convert_page(page.html, page.src_uri, page.path_md, page.dest_uri)
+                self._lazy_cache[page.etag] = markdown
+                _logger.debug(f"Converted page '{page.src_uri}' on request")
+            if (info := self._md_pages.get(page.src_uri)) is not None and not info.content:
+                tokens = self._count_tokens(markdown) if self._count_tokens else None
+                self._md_pages[page.src_uri] = info._replace(content=markdown, tokens=tokens)
+        return markdown
+
+    def _resolve_lazy(self, path: str) -> tuple[str, Callable[[], str]] | None:
+        with self._lazy_lock:
+            pages = self._lazy_pages
+            if (page := pages.get(path)) is not None:
+                return page.etag, partial(self._lazy_markdown, page)
+            variant = next((variant for variant in self._variants if variant.full_output == path), None)
+        if path and variant is not None:
+            etag = hashlib.blake2b(digest_size=16)
+            for lazy_page in pages.values():
+                etag.update(lazy_page.etag.encode())
+
+            def generate() -> str:
+                with self._lazy_lock:
+                    for lazy_page in pages.values():
+                        self._lazy_markdown(lazy_page)
+                    full_output = Path(self.mkdocs_config.site_dir, path)
+                    context = self._output_context(self.mkdocs_config, variant)
+                    records = self._page_records(variant)
+                    self._full_output_writer(variant).write_full_output(full_output, records, context)
+                    return full_output.read_text(encoding="utf8")
+
+            return f'"{etag.hexdigest()}"', generate
+        return None
+
+    def on_serve(self, server: LiveReloadServer, *, config: MkDocsConfig, builder: Callable) -> LiveReloadServer | None:  # noqa: ARG002
+        """Serve Markdown outputs lazily, when `lazy_serve` is enabled.
+
+        Hook for the [`on_serve` event](https://www.mkdocs.org/user-guide/plugins/#on_serve).
 
-            md_url = Path(page.file.dest_uri).with_suffix(".md").as_posix()
-            # Apply the same logic as in the `Page.url` property.
-            if md_url in (".", "./"):
-                md_url = ""
-            md_url = urljoin(self._base_url, md_url)
-
-            self._md_pages[src_uri] = _MDPageInfo(
-                title=str(page.title) if page.title is not None else src_uri,
-                path_md=path_md,
-                md_url=md_url,
-                content=page_md,
-            )
+        Parameters:
+            server: The live-reload server.
+            config: The MkDocs configuration.
+            builder: The function rebuilding the site.
 
-        return html
+        Returns:
+            The same server, serving Markdown outputs on request.
+        """
+        if self._lazy and (app := server.get_app()) is not None:
+            server.set_app(_LazyApp(app, server.mount_path, self._resolve_lazy))
+        return server
+
+    def _convert_page(self, html: str, src_uri: str, path_md: Path, page_uri: str) -> str:
+        sizes = _PageSizes(src_uri) if self._sizes is not None else None
+        page_md, error = _convert_within_limits(
+            html,
+            partial(self._generate_markdown, html, path_md, page_uri, sizes),
+            max_size=self.config.max_html_size,
+            max_depth=self.config.max_nesting_depth,
+            max_time=self.config.max_conversion_time,
+        )
+        if error is not None:
+            _logger.warning(f"Could not convert page '{src_uri}' to Markdown ({error}), falling back to plain text")
+            self._fallbacks.append(src_uri)
+            trace_count("fallbacks")
+        elif self._sizes is not None and sizes is not None:
+            self._sizes.pages.append(sizes)
+        return page_md
+
+    def _generate_markdown(self, html: str, path_md: Path, page_uri: str, sizes: _PageSizes | None = None) -> str:
+        if self._streaming:
+            return _generate_page_markdown_streaming(
+                html,
+                should_autoclean=self.config.autoclean,
+                base_uri=self._base_url,
+                page_uri=page_uri,
+                links=self._links,
+            )
+        return _generate_page_markdown(
+            html,
+            should_autoclean=self.config.autoclean,
+            preprocess=self._preprocess_module,
+            path=str(path_md),
+            base_uri=self._base_url,
+            page_uri=page_uri,
+            converter=self._converter,
+            links=self._links,
+            objects=self._objects,
+            sizes=sizes,
+        )
 
     def on_post_build(self, *, config: MkDocsConfig, **kwargs: Any) -> None:  # noqa: ARG002
         """Create the final `llms.txt` file and the MD files for all selected pages.
@@ -166,138 +622,313 @@ class MkdocsLLMsTxtPlugin(BasePlugin[_PluginConfig]):
         Parameters:
             config: MkDocs configuration.
         """
-        output_file = Path(config.site_dir).joinpath("llms.txt")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        markdown = f"# {config.site_name}\n\n"
-
-        if config.site_description is not None:
-            markdown += f"> {config.site_description}\n\n"
+        if self._executor is not None:
+            with trace_span("collect"):
+                self._collect_pages()
+
+        # Batch hooks see all pages at once, and share the module used to pre-process pages.
+        # Lazy builds do not convert pages, so batch hooks are not run.
+        module = None
+        batch_pages: list[BatchPage] = []
+        if self._preprocess_module is not None and not self._lazy:
+            module = self._preprocess_module
+            batch_pages = [
+                BatchPage(src_uri, page.title, page.md_url, page.path_md, page.content)
+                for src_uri, page in self._md_pages.items()
+            ]
+            with trace_span("preprocess"):
+                if _run_batch_hook(module, "preprocess_batch", batch_pages):
+                    self._update_pages(batch_pages)
+
+        if self.config.link_check is not None and self.config.convert and not self._lazy:
+            with trace_span("check"):
+                self._check_links()
+
+        with trace_span("assemble"):
+            self._write_outputs(config)
+
+        if module is not None:
+            _run_batch_hook(module, "finalize", batch_pages)
+
+        if self.config.fragment_cache:
+            cache = self._converter.fragment_cache
+            _logger.debug(f"Fragment cache: {cache.hits} hits, {cache.misses} misses")
+            trace_count("fragment_cache_hits", cache.hits)
+            trace_count("fragment_cache_misses", cache.misses)
+
+        if self._objects is not None:
+            _logger.debug(
+                f"mkdocstrings objects: {self._objects.rendered} rendered from collected data, "
+                f"{self._objects.fallbacks} converted from HTML",
+            )
+            trace_count("mkdocstrings_objects", self._objects.rendered)
+
+        if self._fallbacks:
+            _logger.info(f"{len(self._fallbacks)} page(s) fell back to plain text: {', '.join(self._fallbacks)}")
+
+        if self._lazy:
+            self._lazy_pages = self._lazy_pending
+            # Forget conversions of pages that changed since the previous build.
+            etags = {page.etag for page in self._lazy_pages.values()}
+            self._lazy_cache = {etag: md for etag, md in self._lazy_cache.items() if etag in etags}
+            _logger.info(f"Markdown files of {len(self._lazy_pages)} page(s) will be generated on request")
+
+        if self._cache is not None:
+            # Dirty builds only convert some pages, lazy builds and builds without conversion none:
+            # entries of the other pages are kept.
+            self._cache.close(prune=self.config.convert and not self._lazy and not self._dirty)
+            _logger.debug(
+                f"Conversion cache: {self._cache.hits} hits, {self._cache.misses} misses, "
+                f"{self._cache.pruned} unused entries removed",
+            )
+            trace_count("cache_hits", self._cache.hits)
+            trace_count("cache_misses", self._cache.misses)
+            self._cache = None
+
+        if self._sizes is not None:
+            totals = self._sizes.write(Path(config.site_dir).joinpath(cast("str", self.config.size_report)))
+            _logger.debug(f"Generated file /{self.config.size_report}")
+            if removed := ", ".join(f"{step}: {size} bytes" for step, size in list(totals["removed"].items())[:3]):
+                _logger.info(f"Largest HTML reductions: {removed}")
+
+        if self._memory is not None:
+            remove_trace_listener(self._memory)
+            self._memory.stop()
+            _logger.info(self._memory.report())
+            for record, reason in self._memory.flagged():
+                _logger.warning(f"Page '{record.name}' exceeds the memory threshold: {reason}")
+            self._memory = None
+
+        if self._metrics is not None:
+            remove_trace_listener(self._metrics)
+            metrics_file = Path(config.site_dir).joinpath(cast("str", self.config.metrics_file))
+            self._metrics.write(metrics_file)
+            self._metrics = None
+            _logger.debug(f"Generated file /{self.config.metrics_file}")
+
+        self._end_build()
+
+    def on_build_error(self, *, error: Exception) -> None:  # noqa: ARG002
+        """Let lazy conversions resume after a failed build.
+
+        Hook for the [`on_build_error` event](https://www.mkdocs.org/user-guide/plugins/#on_build_error).
 
-        if self.config.markdown_description is not None:
-            markdown += f"{self.config.markdown_description}\n\n"
+        Parameters:
+            error: The exception raised during the build.
+        """
+        self._end_build()
 
-        full_markdown = markdown
+    def _end_build(self) -> None:
+        if self._building:
+            self._building = False
+            self._lazy_lock.release()
 
-        for section_name, page_uris in self._sections.items():
-            markdown += f"## {section_name}\n\n"
+    def _page_records(self, variant: _Variant) -> Iterator[PageRecord]:
+        for section_name, page_uris in variant.sections.items():
             for page_uri, desc in page_uris.items():
-                if page_uri not in self._md_pages:
+                if (page := self._md_pages.get(page_uri)) is not None:
+                    raw = False
+                elif (page := self._raw_files.get(page_uri)) is not None:
+                    raw = True
+                else:
                     _logger.warning(f"Page URI '{page_uri}' not found in the generated pages. Skipping.")
                     continue
-                page_title, path_md, md_url, content = self._md_pages[page_uri]
-                path_md.write_text(content, encoding="utf8")
-                _logger.debug(f"Generated MD file to {path_md}")
-                markdown += f"- [{page_title}]({md_url}){(': ' + desc) if desc else ''}\n"
-            markdown += "\n"
-
-        output_file.write_text(markdown, encoding="utf8")
-        _logger.debug("Generated file /llms.txt")
-
-        if self.config.full_output is not None:
-            full_output_file = Path(config.site_dir).joinpath(self.config.full_output)
-            for section_name, page_uris in self._sections.items():
-                list_content = "\n".join(
-                    self._md_pages[page_uri].content for page_uri in page_uris if page_uri in self._md_pages
+                yield PageRecord(
+                    section_name,
+                    page_uri,
+                    page.title,
+                    desc,
+                    page.md_url,
+                    page.path_md,
+                    page.content,
+                    page.tokens,
+                    raw=raw,
                 )
-                full_markdown += f"# {section_name}\n\n{list_content}"
-            full_output_file.write_text(full_markdown, encoding="utf8")
-            _logger.debug(f"Generated file /{self.config.full_output}.txt")
 
+    def _output_context(self, config: MkDocsConfig, variant: _Variant) -> OutputContext:
+        header = f"# {config.site_name}\n\n"
+        if config.site_description is not None:
+            header += f"> {config.site_description}\n\n"
+        if variant.markdown_description is not None:
+            header += f"{variant.markdown_description}\n\n"
+        return OutputContext(Path(config.site_dir), header, list(variant.sections))
+
+    def _full_output_writer(self, variant: _Variant, page_files: dict[str, Path] | None = None) -> _FullOutputWriter:
+        return _FullOutputWriter(
+            cast("str", variant.full_output),
+            # The byte-offset index is only written for the main full output.
+            index=self.config.full_output_index if variant is self._variants[0] else None,
+            dedupe_min_size=self.config.full_output_dedupe_min_size if self.config.full_output_dedupe else None,
+            page_files=page_files,
+        )
+
+    def _output_writers(self, variant: _Variant, page_files: dict[str, Path]) -> list[OutputWriter]:
+        # The outline is only generated for the main `llms.txt` file, and is the only output without conversion.
+        main = variant is self._variants[0]
+        outline: list[OutputWriter] = []
+        if main and self.config.outline_output is not None:
+            outline.append(_OutlineWriter(self.config.outline_output, self._outlines))
+        if not self.config.convert:
+            return outline
+        # The full output is generated on request when serving lazily, see `_resolve_lazy`.
+        if self._lazy:
+            return [_LlmsTxtWriter(variant.name, token_counts=False), *outline]
+        writers: list[OutputWriter] = [_LlmsTxtWriter(variant.name, token_counts=self.config.token_counts), *outline]
+        if variant.full_output is not None:
+            writers.append(self._full_output_writer(variant, page_files))
+        # Other outputs are only generated for the main `llms.txt` file.
+        if not main:
+            return writers
+        if self.config.small_output is not None:
+            count_tokens = cast("Callable[[str], int]", self._count_tokens)
+            writers.append(_SmallOutputWriter(self.config.small_output, self.config.small_output_budget, count_tokens))
+        if self.config.jsonl_output is not None:
+            writers.append(_JsonlWriter(self.config.jsonl_output))
+        writers.extend(_registered_writers())
+        return writers
+
+    def _check_links(self) -> None:
+        """Check that internal links of generated pages point to generated pages and anchors.
+
+        Raises:
+            PluginError: When links are broken and `link_check` is `fail`.
+        """
+        outputs = (
+            *chain.from_iterable((variant.name, variant.full_output) for variant in self._variants),
+            self.config.full_output_index,
+            self.config.small_output,
+            self.config.jsonl_output,
+            self.config.bundle,
+        )
+        output_urls = (urljoin(self._base_url, output) for output in outputs if output)
+        checker = _LinkChecker(self._base_url, chain(self._links.urls(), output_urls))
+        for src_uri, page in self._md_pages.items():
+            checker.add_page(page.md_url, self._anchors.get(src_uri, ()))
+        broken = [
+            link
+            for src_uri, page in self._md_pages.items()
+            for link in checker.check(src_uri, page.md_url, page.content)
+        ]
+        trace_count("broken_links", len(broken))
+        for link in broken:
+            _logger.warning(f"Broken link in '{link.page}': {link.url} ({link.reason})")
+        _logger.debug(
+            f"Checked {checker.checked} links, {checker.outside} point to site files outside of the llms outputs",
+        )
+        if broken and self.config.link_check == "fail":
+            raise PluginError(f"Found {len(broken)} broken link(s) in generated Markdown")
+
+    def _update_pages(self, batch_pages: list[BatchPage]) -> None:
+        for batch_page in batch_pages:
+            page = self._md_pages[batch_page.src_uri]
+            if batch_page.markdown != page.content:
+                tokens = self._count_tokens(batch_page.markdown) if self._count_tokens else None
+                self._md_pages[batch_page.src_uri] = page._replace(content=batch_page.markdown, tokens=tokens)
+
+    def _write_outputs(self, config: MkDocsConfig) -> None:
+        """Write the Markdown files of pages, `llms.txt`, and the other configured outputs.
+
+        Each writer consumes the page records once. Pages are converted before,
+        whatever the number of writers and of outputs.
 
-def _language_callback(tag: Tag) -> str:
-    for css_class in chain(tag.get("class") or (), (tag.parent.get("class") or ()) if tag.parent else ()):
-        if css_class.startswith("language-"):
-            return css_class[9:]
-    return ""
-
+        Parameters:
+            config: MkDocs configuration.
+        """
+        site_dir = Path(config.site_dir)
+        site_dir.mkdir(parents=True, exist_ok=True)
+        records = {variant.name: list(self._page_records(variant)) for variant in self._variants}
+
+        bundle_cm = (
+            _open_bundle(site_dir.joinpath(self.config.bundle), site_dir)
+            if self.config.bundle and not self._lazy
+            else nullcontext()
+        )
+        with bundle_cm as bundle:
+            # Full outputs copy the Markdown files of pages once they are written, see `_PagesWriter.files`.
+            pages_writer = _PagesWriter(self.config.split_level, self._headings)
+            outputs: list[tuple[OutputWriter, Iterable[PageRecord], OutputContext]] = []
+            for variant in self._variants:
+                context = self._output_context(config, variant)
+                if not outputs and self.config.convert and not self._lazy:
+                    # Pages selected in several outputs are written once.
+                    outputs.append((pages_writer, chain.from_iterable(records.values()), context))
+                outputs.extend(
+                    (writer, records[variant.name], context)
+                    for writer in self._output_writers(variant, pages_writer.files)
+                )
+            for writer, pages, context in outputs:
+                paths = writer.write(iter(pages), context)
+                if bundle:
+                    for path in paths:
+                        bundle.add(path)
 
-_converter = MarkdownConverter(
-    bullets="-",
-    code_language_callback=_language_callback,
-    escape_underscores=False,
-    heading_style=ATX,
-)
+        if bundle:
+            _logger.debug(f"Generated bundle /{self.config.bundle}")
 
 
 def _generate_page_markdown(
     html: str,
     *,
     should_autoclean: bool,
-    preprocess: str | None,
+    preprocess: ModuleType | None,
     path: str,
     base_uri: str,
     page_uri: str,
+    converter: MarkdownConverter = _converter,
+    links: _LinkIndex | None = None,
+    objects: _ObjectRenderer | None = None,
+    sizes: _PageSizes | None = None,
 ) -> str:
     """Convert HTML to Markdown.
 
     Parameters:
         html: The HTML content.
         should_autoclean: Whether to autoclean the HTML.
-        preprocess: An optional path of a Python module containing a `preprocess` function.
+        preprocess: An optional pre-processing module, possibly containing a `preprocess` function.
         path: The output path of the relevant Markdown file.
-        base_uri: The base URI of the site.
+        base_uri: The base URI of the site. Links are left untouched when it is empty and no index is given.
         page_uri: The destination URI of the page.
+        converter: The converter to use.
+        links: An optional index of the site's files, used to rewrite links to their target URL.
+        objects: An optional renderer of mkdocstrings objects, used instead of converting their HTML.
+        sizes: Optional page sizes, to record the size of the page at each step.
 
     Returns:
         The Markdown content.
     """
-    soup = Soup(html, "html.parser")
+    with trace_span("parse"):
+        soup = Soup(html, "html.parser")
+    if sizes is not None:
+        sizes.html = _size(soup)
+    rendered: dict[str, str] = {}
+    if objects is not None:
+        with trace_span("objects"), sizes.measure(soup, "mkdocstrings objects") if sizes else nullcontext():
+            rendered = objects.replace(soup)
     if should_autoclean:
-        autoclean(soup)
+        with trace_span("clean"):
+            if sizes is None:
+                autoclean(soup)
+            else:
+                sizes.measure_steps(soup, _autoclean_steps(soup))
     if preprocess:
-        _preprocess(soup, preprocess, path)
-    _convert_to_absolute_links(soup, base_uri, page_uri)
-    return mdformat.text(
-        _converter.convert_soup(soup),
-        options={"wrap": "no"},
-        extensions=("tables",),
-    )
-
-
-def _convert_to_absolute_links(soup: Soup, base_uri: str, page_uri: str) -> None:
-    """Convert relative links to absolute ones in the HTML.
-
-    Parameters:
-        soup: The soup to modify.
-        base_uri: The base URI of the site.
-        page_uri: The destination URI of the page.
-    """
-    current_dir = Path(page_uri).parent.as_posix()
-
-    # Find all anchor tags with `href` attributes.
-    for link in soup.find_all("a", href=True):
-        href = link.get("href")
-
-        # Skip if `href` is not a string or is empty.
-        if not isinstance(href, str) or not href:
-            continue
-
-        link["href"] = _convert_to_absolute_link(href, base_uri, current_dir)
-
-
-def _convert_to_absolute_link(href: str, base_uri: str, current_dir: str) -> str:
-    # Skip if it's an absolute path
-    if href.startswith("/"):
-        return href
-
-    # Skip if it's an anchor link (starts with `#`).
-    if href.startswith("#"):
-        return href
-
-    # Skip if it's an external link
-    try:
-        if urlparse(href).scheme:
-            return href
-    except ValueError:
-        # Invalid URL, return as is
-        return href
-
-    # Relative path from current directory.
-    relative_base = urljoin(base_uri, current_dir + "/") if current_dir else base_uri
-    final_href = urljoin(relative_base, href)
-
-    # Convert directory paths (ending with `/`) to point to `index.md` files.
-    if final_href.endswith("/"):
-        final_href = final_href + "index.md"
-
-    return final_href
+        with trace_span("preprocess"), sizes.measure(soup, "preprocess") if sizes else nullcontext():
+            _preprocess(soup, preprocess, path)
+    if base_uri or links is not None:
+        with trace_span("links"):
+            _convert_to_absolute_links(soup, base_uri, page_uri, links)
+    if sizes is not None:
+        sizes.measure_elements(soup)
+    with trace_span("convert"):
+        markdown = converter.convert_soup(soup)
+        for placeholder, text in rendered.items():
+            markdown = markdown.replace(placeholder, text, 1)
+    with trace_span("format"):
+        formatted = mdformat.text(
+            markdown,
+            options={"wrap": "no"},
+            extensions=("tables",),
+        )
+    if sizes is not None:
+        sizes.markdown = len(markdown.encode())
+        sizes.formatted = len(formatted.encode())
+    return formatted
@@ -2,20 +2,21 @@
 
 from __future__ import annotations
 
-import html
+import re
 import sys
+from dataclasses import dataclass
 from importlib.util import module_from_spec, spec_from_file_location
 from typing import TYPE_CHECKING
 
 from bs4 import BeautifulSoup as Soup
-from bs4 import NavigableString
+from bs4 import NavigableString, Tag
 from mkdocs.exceptions import PluginError
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
     from types import ModuleType
 
-    from bs4 import Tag
-
 
 def _load_module(module_path: str) -> ModuleType:
     module_name = module_path.rsplit("/", 1)[-1].rsplit(".", 1)[-1]
@@ -29,12 +30,12 @@ def _load_module(module_path: str) -> ModuleType:
     raise RuntimeError("Spec or loader is null")
 
 
-def _preprocess(soup: Soup, module_path: str, output: str) -> None:
+def _preprocess(soup: Soup, module: ModuleType, output: str) -> None:
     """Pre-process HTML with user-defined functions.
 
     Parameters:
         soup: The HTML (soup) to process before conversion to Markdown.
-        module_path: The path of a Python module containing a `preprocess` function.
+        module: The pre-processing module, loaded once per build, possibly containing a `preprocess` function.
             The function must accept one and only one argument called `soup`.
             The `soup` argument is an instance of [`bs4.BeautifulSoup`][].
         output: The output path of the relevant Markdown file.
@@ -42,37 +43,110 @@ def _preprocess(soup: Soup, module_path: str, output: str) -> None:
     Returns:
         The processed HTML.
     """
+    # Modules can define batch hooks only.
+    if (preprocess := getattr(module, "preprocess", None)) is None:
+        return
     try:
-        module = _load_module(module_path)
+        preprocess(soup, output)
+    except Exception as error:
+        raise PluginError(f"Could not pre-process HTML: {error}") from error
+
+
+def _load_preprocess_module(module_path: str) -> ModuleType:
+    try:
+        return _load_module(module_path)
     except Exception as error:
         raise PluginError(f"Could not load module: {error}") from error
+
+
+@dataclass
+class BatchPage:
+    """A converted page, as given to the batch hooks of the pre-processing module."""
+
+    src_uri: str
+    """The source URI of the page."""
+    title: str
+    """The page title."""
+    md_url: str
+    """The URL of the Markdown version of the page."""
+    output: Path
+    """The path of the Markdown version of the page in the site directory."""
+    markdown: str
+    """The Markdown content, which `preprocess_batch` can modify."""
+
+
+def _run_batch_hook(module: ModuleType, name: str, pages: list[BatchPage]) -> bool:
+    """Run a batch hook of the pre-processing module, if it defines it.
+
+    Parameters:
+        module: The pre-processing module.
+        name: The hook name, `preprocess_batch` or `finalize`.
+        pages: All the converted pages.
+
+    Raises:
+        PluginError: When the hook fails.
+
+    Returns:
+        Whether the hook was run.
+    """
+    if (hook := getattr(module, name, None)) is None:
+        return False
     try:
-        module.preprocess(soup, output)
+        hook(pages)
     except Exception as error:
-        raise PluginError(f"Could not pre-process HTML: {error}") from error
+        raise PluginError(f"Could not run '{name}': {error}") from error
+    return True
 
 
-def _to_remove(tag: Tag) -> bool:
+def _removal_reason(tag: Tag) -> str | None:
     # Remove images and SVGs.
     if tag.name in {"img", "svg"}:
-        return True
+        return "images"
     # Remove links containing images or SVGs.
-    if tag.name == "a" and tag.img and _to_remove(tag.img):
-        return True
+    if tag.name == "a" and tag.contents and tag.img and _to_remove(tag.img):
+        return "image links"
 
     classes = tag.get("class") or ()
 
     # Remove permalinks.
     if tag.name == "a" and "headerlink" in classes:
-        return True
+        return "permalinks"
     # Remove Twemojis.
     if "twemoji" in classes:
-        return True
+        return "twemojis"
     # Remove tab labels.
-    if "tabbed-labels" in classes:  # noqa: SIM103
-        return True
+    if "tabbed-labels" in classes:
+        return "tab labels"
+    # Remove line numbers of Pygments' inline style.
+    if tag.name == "span" and "linenos" in classes:
+        return "inline line numbers"
+
+    return None
+
+
+def _to_remove(tag: Tag) -> bool:
+    return _removal_reason(tag) is not None
 
-    return False
+
+_COMMENT_CLASSES = frozenset({"c", "c1", "ch", "cm", "cs"})
+_re_annotation = re.compile(r"\((\d+)\)!$")
+
+
+def _normalize_code(code: Tag) -> None:
+    # Highlighted code is made of many `span` and `a` elements (tokens, lines, line anchors).
+    # Markdownify would convert each of them, so we replace them with their text when possible.
+    # We also turn Material's annotation markers `# (1)!` into `# (1)`, the annotations being in the following list.
+    flat = True
+    for tag in code.descendants:
+        if not isinstance(tag, Tag):
+            continue
+        if tag.name == "span":
+            if _COMMENT_CLASSES.intersection(tag.get("class") or ()) and _re_annotation.search(text := tag.get_text()):
+                tag.string = _re_annotation.sub(r"(\1)", text)
+        elif tag.name != "a":
+            flat = False
+    if flat and code.contents:
+        code.string = code.get_text()
 
 
 def autoclean(soup: Soup) -> None:
@@ -81,22 +155,58 @@ def autoclean(soup: Soup) -> None:
     Parameters:
         soup: The soup to modify.
     """
-    # Remove unwanted elements.
+    for _ in _autoclean_steps(soup):
+        pass
+
+
+def _autoclean_steps(soup: Soup) -> Iterator[str]:
+    """Auto-clean the soup, one rule at a time.
+
+    Parameters:
+        soup: The soup to modify.
+
+    Yields:
+        The name of each rule, once it has been applied.
+    """
+    # Remove unwanted elements. Reasons are all determined before removing anything,
+    # since removing images changes the reason to remove the links containing them.
+    removed: dict[str | None, list[Tag]] = {}
     for element in soup.find_all(_to_remove):
-        element.decompose()
+        removed.setdefault(_removal_reason(element), []).append(element)
+    for reason, elements in removed.items():
+        for element in elements:
+            element.decompose()
+        yield str(reason)
 
     # Unwrap autoref elements.
     for element in soup.find_all("autoref"):
         element.replace_with(NavigableString(element.get_text()))
+    yield "autorefs"
 
     # Unwrap mkdocstrings div.doc-md-description.
     for element in soup.find_all("div", attrs={"class": "doc-md-description"}):
         element.replace_with(NavigableString(element.get_text().strip()))
+    yield "mkdocstrings descriptions"
 
     # Remove mkdocstrings labels.
     for element in soup.find_all("span", attrs={"class": "doc-labels"}):
         element.decompose()
+    yield "mkdocstrings labels"
+
+    # Normalize code blocks.
+    for element in soup.find_all("code"):
+        if any(parent.name == "pre" for parent in element.parents):
+            _normalize_code(element)
+    yield "code blocks"
 
     # Remove line numbers from code blocks.
     for element in soup.find_all("table", attrs={"class": "highlighttable"}):
-        element.replace_with(Soup(f"<pre>{html.escape(element.find('code').get_text())}</pre>", "html.parser"))  # type: ignore[union-attr]
+        if (code := element.find("code")) is None:
+            element.decompose()
+            continue
+        pre = soup.new_tag("pre")
+        if language := [css_class for css_class in code.get("class") or () if css_class.startswith("language-")]:
+            pre["class"] = language  # type: ignore[assignment]
+        pre.string = code.get_text()
+        element.replace_with(pre)
+    yield "line numbers tables"
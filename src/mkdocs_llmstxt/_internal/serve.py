@@ -0,0 +1,61 @@
+# Lazy serving of Markdown outputs during `mkdocs serve`.
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Tell whether an `If-None-Match` header matches an entity tag.
+
+    Parameters:
+        header: The header value, a list of entity tags or `*`.
+        etag: The entity tag of the resource, quoted.
+
+    Returns:
+        Whether the header matches, using weak comparison.
+    """
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class _LazyApp:
+    """A WSGI application serving Markdown outputs, generated on first request, and delegating other requests."""
+
+    def __init__(
+        self,
+        app: Callable[..., Iterable[bytes]],
+        mount_path: str,
+        resolve: Callable[[str], tuple[str, Callable[[], str]] | None],
+    ) -> None:
+        """Initialize the application.
+
+        Parameters:
+            app: The application serving other requests.
+            mount_path: The path the site is served under, with leading and trailing slashes.
+            resolve: A function returning the entity tag of an output and a function generating it,
+                given its path relative to the site directory, or none if the path is not a lazy output.
+        """
+        self.app = app
+        self.mount_path = mount_path
+        self.resolve = resolve
+
+    def __call__(self, environ: dict[str, Any], start_response: Callable[..., Any]) -> Iterable[bytes]:
+        path = environ["PATH_INFO"].encode("latin-1").decode("utf-8", "ignore")
+        if environ.get("REQUEST_METHOD", "GET") not in ("GET", "HEAD") or not path.startswith(self.mount_path):
+            return self.app(environ, start_response)
+        if (resolved := self.resolve(path[len(self.mount_path) :])) is None:
+            return self.app(environ, start_response)
+
+        etag, generate = resolved
+        headers = [("ETag", etag), ("Cache-Control", "no-cache")]
+        if _etag_matches(environ.get("HTTP_IF_NONE_MATCH", ""), etag):
+            start_response("304 Not Modified", headers)
+            return []
+        content = generate().encode()
+        headers += [("Content-Type", "text/markdown; charset=utf-8"), ("Content-Length", str(len(content)))]
+        start_response("200 OK", headers)
+        return [] if environ.get("REQUEST_METHOD") == "HEAD" else [content]
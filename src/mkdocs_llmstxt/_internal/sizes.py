@@ -0,0 +1,147 @@
+# Accounting of output sizes, per cleaning rule and per page.
+
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+from bs4 import Tag
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+    from bs4 import BeautifulSoup as Soup
+
+
+def _size(soup: Soup | Tag) -> int:
+    return len(soup.encode())
+
+
+def _children(element: Soup | Tag) -> list[Tag]:
+    return [child for child in element.children if isinstance(child, Tag)]
+
+
+def _describe(element: Tag) -> str:
+    description = element.name
+    if element_id := element.get("id"):
+        description += f"#{element_id}"
+    for css_class in list(element.get("class") or ())[:2]:
+        description += f".{css_class}"
+    return description
+
+
+class _PageSizes:
+    """Sizes of a page at each step of its conversion, in bytes."""
+
+    def __init__(self, src_uri: str, largest: int = 5) -> None:
+        """Initialize the page sizes.
+
+        Parameters:
+            src_uri: The source URI of the page.
+            largest: The number of largest elements to record.
+        """
+        self.src_uri = src_uri
+        self.largest = largest
+        self.html = 0
+        self.removed: dict[str, int] = {}
+        self.elements: list[tuple[str, int]] = []
+        self.markdown = 0
+        self.formatted = 0
+
+    def measure_steps(self, soup: Soup, steps: Iterable[str]) -> None:
+        """Record the HTML bytes removed by each step.
+
+        Parameters:
+            soup: The soup modified by the steps.
+            steps: The steps, yielding their name once applied.
+        """
+        before = _size(soup)
+        for step in steps:
+            after = _size(soup)
+            self.removed[step] = self.removed.get(step, 0) + before - after
+            before = after
+
+    @contextmanager
+    def measure(self, soup: Soup, step: str) -> Iterator[None]:
+        """Record the HTML bytes removed by the wrapped code.
+
+        Parameters:
+            soup: The soup modified by the wrapped code.
+            step: The step name.
+
+        Yields:
+            Nothing.
+        """
+        before = _size(soup)
+        yield
+        self.removed[step] = self.removed.get(step, 0) + before - _size(soup)
+
+    def measure_elements(self, soup: Soup) -> None:
+        """Record the largest top-level elements remaining in the soup.
+
+        Parameters:
+            soup: The soup, once cleaned.
+        """
+        # Descend into single wrappers, like `article` or `div.md-content`.
+        children = _children(soup)
+        while len(children) == 1 and (grandchildren := _children(children[0])):
+            children = grandchildren
+        sizes = sorted(((_describe(child), _size(child)) for child in children), key=lambda item: -item[1])
+        self.elements = sizes[: self.largest]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the sizes as a dictionary.
+
+        Returns:
+            The sizes.
+        """
+        return {
+            "src_uri": self.src_uri,
+            "html": self.html,
+            "removed": self.removed,
+            "markdown": self.markdown,
+            "formatted": self.formatted,
+            "largest_elements": [{"element": element, "size": size} for element, size in self.elements],
+        }
+
+
+class _SizeReport:
+    """Sizes of all the pages of a build, written as a JSON report."""
+
+    def __init__(self) -> None:
+        self.pages: list[_PageSizes] = []
+
+    def totals(self) -> dict[str, Any]:
+        """Aggregate the sizes of all pages.
+
+        Returns:
+            The total sizes, with the bytes removed by each step sorted from largest to smallest.
+        """
+        removed: dict[str, int] = {}
+        for page in self.pages:
+            for step, size in page.removed.items():
+                removed[step] = removed.get(step, 0) + size
+        return {
+            "pages": len(self.pages),
+            "html": sum(page.html for page in self.pages),
+            "removed": dict(sorted(removed.items(), key=lambda item: -item[1])),
+            "markdown": sum(page.markdown for page in self.pages),
+            "formatted": sum(page.formatted for page in self.pages),
+        }
+
+    def write(self, path: Path) -> dict[str, Any]:
+        """Write the report, with pages sorted from largest to smallest HTML.
+
+        Parameters:
+            path: The path of the report.
+
+        Returns:
+            The total sizes.
+        """
+        totals = self.totals()
+        pages = [page.as_dict() for page in sorted(self.pages, key=lambda page: -page.html)]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"totals": totals, "pages": pages}, indent=2), encoding="utf8")
+        return totals
@@ -0,0 +1,116 @@
+# Splitting of converted pages into per-heading fragments.
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+from mkdocs_llmstxt._internal.tokens import _re_fence
+
+if TYPE_CHECKING:
+    from mkdocs.structure.toc import AnchorLink, TableOfContents
+
+
+_re_atx_heading = re.compile(r"^ {0,3}(#{1,6})(?:\s|$)")
+_re_html_heading_id = re.compile(r"""<h[1-6]\s[^>]*?\bid\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+_re_unsafe_file_name = re.compile(r"[^\w-]+")
+
+
+def _heading_ids(html: str) -> set[str]:
+    """Return the ids of the headings rendered in HTML.
+
+    Parameters:
+        html: The HTML of the page.
+
+    Returns:
+        The ids.
+    """
+    return {match.group(1) for match in _re_html_heading_id.finditer(html)}
+
+
+def _toc_headings(
+    toc: TableOfContents | list[AnchorLink],
+    level: int,
+    rendered: set[str] | None = None,
+) -> list[tuple[str, str]]:
+    """Return the anchors and titles of the headings of a level, in document order.
+
+    Parameters:
+        toc: The table of contents of the page.
+        level: The heading level.
+        rendered: The ids of the headings rendered in the page. Other entries of the table of contents,
+            like the hidden root headings of mkdocstrings, are skipped.
+
+    Returns:
+        The anchor and title of each heading.
+    """
+    headings = []
+    for item in toc:
+        if item.level == level and (rendered is None or item.id in rendered):
+            headings.append((item.id, item.title))
+        elif item.level <= level:
+            headings.extend(_toc_headings(item.children, level, rendered))
+    return headings
+
+
+def _fragment_names(anchors: list[str]) -> list[str]:
+    """Return file names for the fragments of a page, from the anchors of their headings.
+
+    Characters other than letters, digits, underscores and dashes, invalid in file names on some platforms,
+    are replaced by dashes. Names are unique even on case-insensitive file systems:
+    empty or repeated names get a counter.
+
+    Parameters:
+        anchors: The anchors of the headings, in document order.
+
+    Returns:
+        The file names, without extension.
+    """
+    names = []
+    used: set[str] = set()
+    for anchor in anchors:
+        base = _re_unsafe_file_name.sub("-", anchor).strip("-") or "section"
+        name = base
+        counter = 1
+        while name.casefold() in used:
+            counter += 1
+            name = f"{base}-{counter}"
+        used.add(name.casefold())
+        names.append(name)
+    return names
+
+
+def _split_markdown(markdown: str, level: int) -> list[str]:
+    """Split Markdown at the headings of a level.
+
+    Each fragment starts with its heading and ends before the next heading of the same or a higher level.
+    Content before the first heading of the level, or under higher headings, belongs to no fragment.
+
+    Parameters:
+        markdown: The Markdown document.
+        level: The heading level.
+
+    Returns:
+        The fragments.
+    """
+    fragments: list[list[str]] = []
+    current: list[str] | None = None
+    fence = ""
+    for line in markdown.splitlines(keepends=True):
+        if match := _re_fence.match(line):
+            marker = match.group(1)
+            if not fence:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence) and not line.strip()[len(marker) :]:
+                fence = ""
+        elif not fence and (match := _re_atx_heading.match(line)):
+            heading_level = len(match.group(1))
+            if heading_level == level:
+                current = [line]
+                fragments.append(current)
+                continue
+            if heading_level < level:
+                current = None
+        if current is not None:
+            current.append(line)
+    return ["".join(fragment).rstrip("\n") + "\n" for fragment in fragments]
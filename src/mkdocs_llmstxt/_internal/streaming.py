@@ -0,0 +1,860 @@
+# Single-pass HTML to Markdown conversion.
+#
+# This engine is an alternative to building a BeautifulSoup tree, cleaning it,
+# and walking it with markdownify. It consumes the event stream of the standard library
+# `html.parser.HTMLParser`, and keeps only a stack of open elements, each holding the
+# already-converted Markdown of its children. The conversion rules mirror the ones
+# of markdownify's `MarkdownConverter` (as of markdownify 1.2, the lowest supported version,
+# with the options we use), and the cleaning rules mirror `autoclean`,
+# so that both engines produce the same Markdown.
+
+from __future__ import annotations
+
+import re
+from functools import partial
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, ClassVar
+
+import mdformat
+
+from mkdocs_llmstxt._internal.converter import _language_callback
+from mkdocs_llmstxt._internal.limits import _check_deadline
+from mkdocs_llmstxt._internal.links import _convert_to_absolute_link, _LinkIndex
+from mkdocs_llmstxt._internal.preprocess import _COMMENT_CLASSES, _re_annotation
+from mkdocs_llmstxt._internal.tracing import trace_span
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+_VOID_ELEMENTS = frozenset(
+    {
+        "area",
+        "base",
+        "basefont",
+        "bgsound",
+        "br",
+        "col",
+        "command",
+        "embed",
+        "frame",
+        "hr",
+        "image",
+        "img",
+        "input",
+        "isindex",
+        "keygen",
+        "link",
+        "menuitem",
+        "meta",
+        "nextid",
+        "param",
+        "source",
+        "spacer",
+        "track",
+        "wbr",
+    },
+)
+_BLOCK_ELEMENTS = frozenset(
+    {
+        "p",
+        "blockquote",
+        "article",
+        "div",
+        "section",
+        "ol",
+        "ul",
+        "li",
+        "dl",
+        "dt",
+        "dd",
+        "table",
+        "thead",
+        "tbody",
+        "tfoot",
+        "tr",
+        "td",
+        "th",
+    },
+)
+_PRESERVE_WHITESPACE_ELEMENTS = frozenset({"pre", "textarea"})
+_ASCII_SPACES = " \n\t\x0c\r"
+_NON_TEXT_ELEMENTS = frozenset({"script", "style", "template"})
+_DOCUMENT = "[document]"
+_BULLETS = "-"
+
+_re_heading = re.compile(r"h(\d+)")
+_re_whitespace = re.compile(r"[\t ]+")
+_re_all_whitespace = re.compile(r"[\t \r\n]+")
+_re_newline_whitespace = re.compile(r"[\t \r\n]*[\r\n][\t \r\n]*")
+_re_line_with_content = re.compile(r"^(.*)", flags=re.MULTILINE)
+_re_pre_lstrip = re.compile(r"^[ \n]*\n")
+_re_pre_rstrip = re.compile(r"[ \n]*$")
+_re_extract_newlines = re.compile(r"^(\n*)((?:.*[^\n])?)(\n*)$", flags=re.DOTALL)
+_re_backtick_runs = re.compile(r"`+")
+
+# Kinds of children.
+_TEXT = 0
+_TAG = 1
+_OTHER = 2  # Comments, declarations, processing instructions.
+
+
+class _Child:
+    """A child node of an open element, already converted if it is a tag."""
+
+    __slots__ = ("deferred", "kind", "name", "text")
+
+    def __init__(
+        self,
+        kind: int,
+        text: str = "",
+        name: str | None = None,
+        deferred: Callable[[_Element, int], str] | None = None,
+    ) -> None:
+        self.kind = kind
+        self.text = text
+        self.name = name
+        self.deferred = deferred
+
+
+class _Element:
+    """An open element.
+
+    It quacks enough like a BeautifulSoup tag (`get`, `parent`)
+    to be passed to `_language_callback`.
+    """
+
+    __slots__ = (
+        "attrs",
+        "capture",
+        "cells",
+        "child_tags",
+        "children",
+        "dropped",
+        "highlight",
+        "mergeable",
+        "name",
+        "parent",
+        "parent_tags",
+        "rows",
+        "text_unwrap",
+        "theads",
+        "unwrap",
+        "video_sources",
+    )
+
+    def __init__(self, name: str, attrs: dict[str, Any], parent: _Element | None) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.children: list[_Child] = []
+        self.parent_tags: frozenset[str] = frozenset()
+        self.child_tags: frozenset[str] = frozenset()
+        self.dropped = False
+        # Text capture, used to unwrap elements into their text.
+        self.capture: list[str] | None = None
+        self.unwrap: str | None = None
+        self.text_unwrap = False
+        # Highlight table being replaced by its code.
+        self.highlight: _HighlightTable | None = None
+        self.mergeable = False
+        # Descendants that an ancestor needs to know about.
+        # An element seen before one of its ancestors was dropped is ignored, see `kept_in`.
+        self.video_sources: list[_Element] = []
+        self.cells: list[_Element] = []
+        self.rows: list[_Element] = []
+        self.theads: list[_Element] = []
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.attrs.get(key, default)
+
+    def ancestors(self) -> Iterator[_Element]:
+        element = self.parent
+        while element is not None:
+            yield element
+            element = element.parent
+
+    def kept_in(self, ancestor: _Element) -> bool:
+        return not any(element.dropped for element in self.ancestors_until(ancestor))
+
+    def ancestors_until(self, ancestor: _Element) -> Iterator[_Element]:
+        for element in self.ancestors():
+            if element is ancestor:
+                return
+            yield element
+
+
+class _HighlightTable:
+    __slots__ = ("code", "code_seen", "language")
+
+    def __init__(self) -> None:
+        self.code_seen = False
+        self.code: str | None = None
+        self.language: list[str] = []
+
+
+def _remove_inside(name: str | None) -> bool:
+    if not name:
+        return False
+    return _re_heading.match(name) is not None or name in _BLOCK_ELEMENTS
+
+
+def _absent(child: _Child | None) -> bool:
+    # Empty strings and comments are falsy in BeautifulSoup, tags never are.
+    return child is None or (child.kind != _TAG and not child.text)
+
+
+def _remove_outside(child: _Child | None) -> bool:
+    if child is None or child.kind != _TAG:
+        return False
+    return _remove_inside(child.name) or child.name == "pre"
+
+
+def _is_content(child: _Child) -> bool:
+    if child.kind == _TAG:
+        return True
+    if child.kind == _TEXT:
+        return child.text.strip() != ""
+    return False
+
+
+def _collapse_whitespace(data: str) -> str:
+    # Like BeautifulSoup, replace strings made only of ASCII whitespace with a single space or newline.
+    if data.strip(_ASCII_SPACES):
+        return data
+    return "\n" if "\n" in data else " "
+
+
+def _chomp(text: str) -> tuple[str, str, str]:
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+
+def _colspan(element: _Element) -> int:
+    colspan = element.get("colspan")
+    if colspan is not None and colspan.isdigit():
+        return max(1, min(1000, int(colspan)))
+    return 1
+
+
+def _inline(markup: str) -> Callable[[_StreamingConverter, _Element, str], str]:
+    def convert(self: _StreamingConverter, element: _Element, text: str) -> str:  # noqa: ARG001
+        if "_noformat" in element.parent_tags:
+            return text
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ""
+        return f"{prefix}{markup}{text}{markup}{suffix}"
+
+    return convert
+
+
+class _StreamingConverter(HTMLParser):
+    """Convert HTML to Markdown in a single pass over the parser events."""
+
+    def __init__(self, *, should_autoclean: bool, rewrite_link: Callable[[str], str] | None = None) -> None:
+        """Initialize the converter.
+
+        Parameters:
+            should_autoclean: Whether to apply the same cleaning rules as `autoclean`.
+            rewrite_link: A function to rewrite the `href` of links.
+        """
+        super().__init__(convert_charrefs=True)
+        self.should_autoclean = should_autoclean
+        self.rewrite_link = rewrite_link
+        self.root = _Element(_DOCUMENT, {}, None)
+        self.root.child_tags = frozenset((_DOCUMENT,))
+        self.stack = [self.root]
+        self.closed_voids: list[str] = []
+        self.preserve_whitespace = 0
+
+    def convert(self, html: str) -> str:
+        """Convert HTML to Markdown.
+
+        Parameters:
+            html: The HTML to convert.
+
+        Returns:
+            The (unformatted) Markdown.
+        """
+        self.feed(html)
+        self.close()
+        self._end_data()
+        while len(self.stack) > 1:
+            self._close_element()
+        return self._process(self.root).strip("\n")
+
+    # Parser events.
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._start(tag, attrs)
+        if tag in _VOID_ELEMENTS:
+            self._close_element()
+            self.closed_voids.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._start(tag, attrs)
+        self._close_element()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.closed_voids:
+            self.closed_voids.remove(tag)
+            return
+        # Text is never merged across other end tags, even unmatched ones.
+        self._end_data()
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].name == tag:
+                while len(self.stack) > index:
+                    self._close_element()
+                return
+
+    def handle_data(self, data: str) -> None:
+        element = self.stack[-1]
+        if element.dropped:
+            return
+        if element.capture is not None:
+            if element.mergeable:
+                element.capture[-1] += data
+            else:
+                element.capture.append(data)
+                element.mergeable = True
+        elif element.highlight is None:
+            if element.mergeable:
+                element.children[-1].text += data
+            else:
+                element.children.append(_Child(_TEXT, data))
+                element.mergeable = True
+
+    def handle_comment(self, data: str) -> None:
+        self._other(data)
+
+    def handle_decl(self, decl: str) -> None:
+        self._other(decl)
+
+    def handle_pi(self, data: str) -> None:
+        self._other(data)
+
+    def unknown_decl(self, data: str) -> None:
+        self._other(data)
+
+    # Tree maintenance.
+
+    def _end_data(self) -> None:
+        element = self.stack[-1]
+        if not element.mergeable:
+            return
+        element.mergeable = False
+        if self.preserve_whitespace:
+            return
+        if element.capture is not None:
+            element.capture[-1] = _collapse_whitespace(element.capture[-1])
+        else:
+            element.children[-1].text = _collapse_whitespace(element.children[-1].text)
+
+    def _other(self, data: str) -> None:
+        self._end_data()
+        element = self.stack[-1]
+        if not element.dropped and element.capture is None and element.highlight is None:
+            element.children.append(_Child(_OTHER, data))
+
+    def _start(self, tag: str, attr_list: list[tuple[str, str | None]]) -> None:
+        _check_deadline()
+        self._end_data()
+        parent = self.stack[-1]
+        attrs: dict[str, Any] = {name: "" if value is None else value for name, value in attr_list}
+        if "class" in attrs:
+            attrs["class"] = attrs["class"].split()
+        element = _Element(tag, attrs, parent)
+        self.stack.append(element)
+        if tag in _PRESERVE_WHITESPACE_ELEMENTS:
+            self.preserve_whitespace += 1
+
+        if self.should_autoclean and tag == "img":
+            # Links containing images are removed too.
+            for ancestor in element.ancestors():
+                if ancestor.name == "a":
+                    ancestor.dropped = True
+
+        if parent.dropped or (self.should_autoclean and self._to_remove(element)):
+            element.dropped = True
+            return
+
+        if parent.capture is not None:
+            element.capture = []
+            element.text_unwrap = parent.text_unwrap
+            # Like `get_text`, ignore the text of scripts, stylesheets and templates.
+            if tag in _NON_TEXT_ELEMENTS or (not element.text_unwrap and self._is_label(element)):
+                element.dropped = True
+            return
+
+        if parent.highlight is not None:
+            # Autorefs, descriptions and labels are unwrapped or removed before highlight tables are replaced.
+            if self.should_autoclean and (self._is_unwrapped(element) or self._is_label(element)):
+                element.dropped = True
+            elif tag == "code" and not parent.highlight.code_seen:
+                parent.highlight.code_seen = True
+                parent.highlight.language = [
+                    css_class for css_class in attrs.get("class") or () if css_class.startswith("language-")
+                ]
+                element.capture = []
+                element.unwrap = "code"
+                element.highlight = parent.highlight
+            else:
+                element.highlight = parent.highlight
+            return
+
+        classes = attrs.get("class") or ()
+        if self.should_autoclean:
+            if self._is_unwrapped(element):
+                element.capture = []
+                element.unwrap = tag
+                element.text_unwrap = True
+                return
+            if self._is_label(element):
+                element.dropped = True
+                return
+            if tag == "table" and "highlighttable" in classes:
+                element.highlight = _HighlightTable()
+                return
+
+        if tag == "a" and self.rewrite_link and isinstance(href := attrs.get("href"), str) and href:
+            attrs["href"] = self.rewrite_link(href)
+        elif tag == "thead":
+            for ancestor in element.ancestors():
+                ancestor.theads.append(element)
+        elif tag == "source" and attrs.get("src"):
+            for ancestor in element.ancestors():
+                if ancestor.name == "video":
+                    ancestor.video_sources.append(element)
+
+        element.parent_tags = parent.child_tags
+        child_tags = {*parent.child_tags, tag}
+        if _re_heading.match(tag) or tag in {"td", "th"}:
+            child_tags.add("_inline")
+        if tag in {"pre", "code", "kbd", "samp"}:
+            child_tags.add("_noformat")
+        element.child_tags = frozenset(child_tags)
+
+    @staticmethod
+    def _to_remove(element: _Element) -> bool:
+        if element.name in {"img", "svg"}:
+            return True
+        classes = element.get("class") or ()
+        if element.name == "a" and "headerlink" in classes:
+            return True
+        if element.name == "span" and "linenos" in classes:
+            return True
+        return "twemoji" in classes or "tabbed-labels" in classes
+
+    def _is_annotation(self, element: _Element) -> bool:
+        # Comments in `pre code` elements, possibly ending with an annotation marker.
+        if not (
+            self.should_autoclean
+            and element.name == "span"
+            and _COMMENT_CLASSES.intersection(element.get("class") or ())
+        ):
+            return False
+        # Search a `code` ancestor, then a `pre` ancestor above it.
+        ancestors = element.ancestors()
+        return any(ancestor.name == "code" for ancestor in ancestors) and any(
+            ancestor.name == "pre" for ancestor in ancestors
+        )
+
+    @staticmethod
+    def _is_unwrapped(element: _Element) -> bool:
+        return element.name == "autoref" or (
+            element.name == "div" and "doc-md-description" in (element.get("class") or ())
+        )
+
+    @staticmethod
+    def _is_label(element: _Element) -> bool:
+        return element.name == "span" and "doc-labels" in (element.get("class") or ())
+
+    def _close_element(self) -> None:
+        element = self.stack.pop()
+        parent = self.stack[-1]
+        if element.name in _PRESERVE_WHITESPACE_ELEMENTS:
+            self.preserve_whitespace -= 1
+        if element.dropped:
+            return
+
+        if element.capture is not None:
+            text = "".join(element.capture)
+            if element.unwrap is None:
+                if not element.text_unwrap and self._is_annotation(element):
+                    text = _re_annotation.sub(r"(\1)", text)
+                if parent.capture is not None:
+                    parent.capture.append(text)
+            elif element.unwrap == "code":
+                element.highlight.code = text  # type: ignore[union-attr]
+            else:
+                if element.unwrap == "div":
+                    text = text.strip()
+                # Unwrapped text is not merged with adjacent text.
+                parent.children.append(_Child(_TEXT, text))
+                parent.mergeable = False
+            return
+
+        if element.highlight is not None:
+            if element.highlight is parent.highlight:
+                return
+            # The highlight table is replaced by a `pre` element containing its code, or removed if it has none.
+            if element.highlight.code_seen:
+                pre = _Element("pre", {"class": element.highlight.language}, parent)
+                pre.parent_tags = parent.child_tags
+                text = element.highlight.code or ""
+                parent.children.append(_Child(_TAG, self._convert_pre(pre, text) if text else "", "pre"))
+            return
+
+        text = self._process(element)
+        if self._is_annotation(element):
+            text = _re_annotation.sub(r"(\1)", text)
+        if element.name in {"td", "th"}:
+            for ancestor in element.ancestors():
+                if ancestor.name == "tr":
+                    ancestor.cells.append(element)
+        elif element.name == "tr":
+            for ancestor in element.ancestors():
+                ancestor.rows.append(element)
+        if element.name in {"ul", "ol"} and "li" not in element.parent_tags:
+            parent.children.append(_Child(_TAG, text, element.name, self._list_deferred))
+        elif element.name == "tr":
+            parent.children.append(_Child(_TAG, text, "tr", self._row_deferred(element)))
+        else:
+            parent.children.append(_Child(_TAG, self._convert(element, text), element.name))
+
+    # Conversion.
+
+    def _process(self, element: _Element) -> str:
+        children = element.children
+        remove_inside = _remove_inside(element.name)
+        noformat = "_noformat" in element.child_tags
+        in_pre = "pre" in element.child_tags
+        last = len(children) - 1
+        strings = []
+        for index, child in enumerate(children):
+            if child.kind == _OTHER:
+                continue
+            previous = children[index - 1] if index else None
+            following = children[index + 1] if index < last else None
+            if child.kind == _TEXT:
+                text = child.text
+                if text.strip() == "" and (
+                    (remove_inside and (_absent(previous) or _absent(following)))
+                    or _remove_outside(previous)
+                    or _remove_outside(following)
+                ):
+                    continue
+                if not in_pre:
+                    text = _re_newline_whitespace.sub("\n", text)
+                    text = _re_whitespace.sub(" ", text)
+                if not noformat and text:
+                    text = text.replace("*", r"\*")
+                if _remove_outside(previous) or (remove_inside and _absent(previous)):
+                    text = text.lstrip(" \t\r\n")
+                if _remove_outside(following) or (remove_inside and _absent(following)):
+                    text = text.rstrip()
+            elif child.deferred is not None:
+                text = child.deferred(element, index)
+            else:
+                text = child.text
+            if text:
+                strings.append(text)
+
+        if in_pre:
+            return "".join(strings)
+
+        # Collapse newlines at child element boundaries.
+        collapsed = [""]
+        for string in strings:
+            leading, content, trailing = _re_extract_newlines.match(string).groups()  # type: ignore[union-attr]
+            if collapsed[-1] and leading:
+                previous_trailing = collapsed.pop()
+                leading = "\n" * min(2, max(len(previous_trailing), len(leading)))
+            collapsed.extend((leading, content, trailing))
+        return "".join(collapsed)
+
+    def _convert(self, element: _Element, text: str) -> str:
+        converter = self._converters.get(element.name)
+        if converter is not None:
+            return converter(self, element, text)
+        if match := _re_heading.match(element.name):
+            return self._convert_heading(int(match.group(1)), element, text)
+        return text
+
+    def _convert_a(self, element: _Element, text: str) -> str:
+        if "_noformat" in element.parent_tags:
+            return text
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ""
+        href = element.get("href")
+        title = element.get("title")
+        if text.replace(r"\_", "_") == href and not title:
+            return f"<{href}>"
+        title_part = ' "{}"'.format(title.replace('"', r"\"")) if title else ""
+        return f"{prefix}[{text}]({href}{title_part}){suffix}" if href else text
+
+    def _convert_blockquote(self, element: _Element, text: str) -> str:
+        text = (text or "").strip(" \t\r\n")
+        if "_inline" in element.parent_tags:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        text = _re_line_with_content.sub(lambda match: "> " + match.group(1) if match.group(1) else ">", text)
+        return "\n" + text + "\n\n"
+
+    def _convert_br(self, element: _Element, text: str) -> str:
+        if "_inline" in element.parent_tags:
+            return text + " " if text else " "
+        return "  \n" + text
+
+    def _convert_code(self, element: _Element, text: str) -> str:
+        if "_noformat" in element.parent_tags:
+            return text
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ""
+        max_backticks = max((len(match) for match in _re_backtick_runs.findall(text)), default=0)
+        delimiter = "`" * (max_backticks + 1)
+        if max_backticks > 0:
+            text = " " + text + " "
+        return f"{prefix}{delimiter}{text}{delimiter}{suffix}"
+
+    def _convert_div(self, element: _Element, text: str) -> str:
+        if "_inline" in element.parent_tags:
+            return " " + text.strip() + " "
+        text = text.strip()
+        return f"\n\n{text}\n\n" if text else ""
+
+    def _convert_dd(self, element: _Element, text: str) -> str:
+        text = (text or "").strip()
+        if "_inline" in element.parent_tags:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        text = _re_line_with_content.sub(lambda match: "    " + match.group(1) if match.group(1) else "", text)
+        return ":" + text[1:] + "\n"
+
+    def _convert_dt(self, element: _Element, text: str) -> str:
+        text = _re_all_whitespace.sub(" ", (text or "").strip())
+        if "_inline" in element.parent_tags:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        return f"\n\n{text}\n"
+
+    def _convert_heading(self, level: int, element: _Element, text: str) -> str:
+        if "_inline" in element.parent_tags:
+            return text
+        level = max(1, min(6, level))
+        text = _re_all_whitespace.sub(" ", text.strip())
+        return f"\n\n{'#' * level} {text}\n\n"
+
+    def _convert_hr(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        return "\n\n---\n\n"
+
+    def _convert_img(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        alt = element.get("alt") or ""
+        src = element.get("src") or ""
+        title = element.get("title") or ""
+        title_part = ' "{}"'.format(title.replace('"', r"\"")) if title else ""
+        if "_inline" in element.parent_tags:
+            return alt
+        return f"![{alt}]({src}{title_part})"
+
+    def _convert_video(self, element: _Element, text: str) -> str:
+        if "_inline" in element.parent_tags:
+            return text
+        src = element.get("src") or next(
+            (source.get("src") for source in element.video_sources if source.kept_in(element)),
+            "",
+        )
+        poster = element.get("poster") or ""
+        if src and poster:
+            return f"[![{text}]({poster})]({src})"
+        if src:
+            return f"[{text}]({src})"
+        if poster:
+            return f"![{text}]({poster})"
+        return text
+
+    def _convert_list(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        # Only reached for nested lists, top-level ones are deferred
+        # until the next sibling is known, see `_list_deferred`.
+        return "\n" + text.rstrip()
+
+    @staticmethod
+    def _list_deferred(parent: _Element, index: int) -> str:
+        child = parent.children[index]
+        following = next((sibling for sibling in parent.children[index + 1 :] if _is_content(sibling)), None)
+        before_paragraph = following is not None and following.name not in {"ul", "ol"}
+        return "\n\n" + child.text + ("\n" if before_paragraph else "")
+
+    def _convert_li(self, element: _Element, text: str) -> str:
+        text = (text or "").strip()
+        if not text:
+            return "\n"
+        parent = element.parent
+        if parent is not None and parent.name == "ol":
+            start = parent.get("start")
+            start = int(start) if start and str(start).isnumeric() else 1
+            previous_items = sum(1 for child in parent.children if child.kind == _TAG and child.name == "li")
+            bullet = f"{start + previous_items}."
+        else:
+            depth = -1 + sum(1 for ancestor in element.ancestors() if ancestor.name == "ul")
+            bullet = _BULLETS[depth % len(_BULLETS)]
+        bullet += " "
+        indent = " " * len(bullet)
+        text = _re_line_with_content.sub(lambda match: indent + match.group(1) if match.group(1) else "", text)
+        return bullet + text[len(bullet) :] + "\n"
+
+    def _convert_p(self, element: _Element, text: str) -> str:
+        if "_inline" in element.parent_tags:
+            return " " + text.strip(" \t\r\n") + " "
+        text = text.strip(" \t\r\n")
+        return f"\n\n{text}\n\n" if text else ""
+
+    def _convert_pre(self, element: _Element, text: str) -> str:
+        if not text:
+            return ""
+        language = _language_callback(element)  # type: ignore[arg-type]
+        text = _re_pre_rstrip.sub("", _re_pre_lstrip.sub("", text))
+        return f"\n\n```{language}\n{text}\n```\n\n"
+
+    def _convert_q(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        return '"' + text + '"'
+
+    def _convert_nothing(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        return ""
+
+    def _convert_table(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        return "\n\n" + text.strip() + "\n\n"
+
+    def _convert_caption(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        return text.strip() + "\n\n"
+
+    def _convert_figcaption(self, element: _Element, text: str) -> str:  # noqa: ARG002
+        return "\n\n" + text.strip() + "\n\n"
+
+    def _convert_cell(self, element: _Element, text: str) -> str:
+        return " " + text.strip().replace("\n", " ") + " |" * _colspan(element)
+
+    @staticmethod
+    def _row_deferred(row: _Element) -> Callable[[_Element, int], str]:
+        # Whether a row is a header row depends on its siblings and on the table,
+        # so its conversion is finalized when its parent is closed.
+        cells = [cell for cell in row.cells if cell.kept_in(row)]
+        all_headers = all(cell.name == "th" for cell in cells)
+        full_colspan = sum(_colspan(cell) for cell in cells)
+
+        def convert(parent: _Element, index: int) -> str:
+            text = parent.children[index].text
+            is_first_row = not any(child.kind == _TAG for child in parent.children[:index])
+            is_headrow = all_headers or (
+                parent.name == "thead" and sum(other.kept_in(parent) for other in parent.rows) == 1
+            )
+            if parent.name != "tbody":
+                is_head_row_missing = is_first_row
+            else:
+                is_head_row_missing = is_first_row and not (
+                    parent.parent and any(thead.kept_in(parent.parent) for thead in parent.parent.theads)
+                )
+            overline = underline = ""
+            if is_headrow and is_first_row:
+                underline = "| " + " | ".join(["---"] * full_colspan) + " |\n"
+            elif is_head_row_missing or (
+                is_first_row
+                and (
+                    parent.name == "table"
+                    or (
+                        parent.name == "tbody"
+                        and parent.parent is not None
+                        and not any(child.kind == _TAG for child in parent.parent.children)
+                    )
+                )
+            ):
+                overline = "| " + " | ".join([""] * full_colspan) + " |\n"
+                overline += "| " + " | ".join(["---"] * full_colspan) + " |\n"
+            return overline + "|" + text + "\n" + underline
+
+        return convert
+
+    _converters: ClassVar[dict[str, Callable[[_StreamingConverter, _Element, str], str]]] = {
+        "a": _convert_a,
+        "b": _inline("**"),
+        "strong": _inline("**"),
+        "em": _inline("*"),
+        "i": _inline("*"),
+        "del": _inline("~~"),
+        "s": _inline("~~"),
+        "sub": _inline(""),
+        "sup": _inline(""),
+        "blockquote": _convert_blockquote,
+        "br": _convert_br,
+        "code": _convert_code,
+        "kbd": _convert_code,
+        "samp": _convert_code,
+        "div": _convert_div,
+        "article": _convert_div,
+        "section": _convert_div,
+        "dl": _convert_div,
+        "dd": _convert_dd,
+        "dt": _convert_dt,
+        "hr": _convert_hr,
+        "img": _convert_img,
+        "video": _convert_video,
+        "ul": _convert_list,
+        "ol": _convert_list,
+        "li": _convert_li,
+        "p": _convert_p,
+        "pre": _convert_pre,
+        "q": _convert_q,
+        "script": _convert_nothing,
+        "style": _convert_nothing,
+        "table": _convert_table,
+        "caption": _convert_caption,
+        "figcaption": _convert_figcaption,
+        "td": _convert_cell,
+        "th": _convert_cell,
+    }
+
+
+def _generate_page_markdown_streaming(
+    html: str,
+    *,
+    should_autoclean: bool,
+    base_uri: str,
+    page_uri: str,
+    links: _LinkIndex | None = None,
+) -> str:
+    """Convert HTML to Markdown in a single pass, without building a tree.
+
+    Parameters:
+        html: The HTML content.
+        should_autoclean: Whether to autoclean the HTML.
+        base_uri: The base URI of the site. Links are left untouched when it is empty and no index is given.
+        page_uri: The destination URI of the page.
+        links: An optional index of the site's files, used to rewrite links to their target URL.
+
+    Returns:
+        The Markdown content.
+    """
+    current_dir = Path(page_uri).parent.as_posix()
+    rewrite_link: Callable[[str], str] | None = None
+    if links is not None:
+        rewrite_link = partial(links.rewrite, current_dir=current_dir)
+    elif base_uri:
+        rewrite_link = partial(_convert_to_absolute_link, base_uri=base_uri, current_dir=current_dir)
+    converter = _StreamingConverter(should_autoclean=should_autoclean, rewrite_link=rewrite_link)
+    # Parsing, cleaning, link rewriting and conversion all happen in the same pass.
+    with trace_span("convert"):
+        markdown = converter.convert(html)
+    with trace_span("format"):
+        return mdformat.text(
+            markdown,
+            options={"wrap": "no"},
+            extensions=("tables",),
+        )
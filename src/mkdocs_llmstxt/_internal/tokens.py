@@ -0,0 +1,125 @@
+# Token counting and token-budgeted output.
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Callable
+
+from mkdocs.exceptions import PluginError
+
+from mkdocs_llmstxt._internal.preprocess import _load_module
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+def _count_tokens(text: str) -> int:
+    """Approximate the number of tokens of a text.
+
+    Tokenizers of current models average about four characters per token on English prose and code,
+    which is enough to compare pages against a budget without depending on a tokenizer.
+
+    Parameters:
+        text: The text.
+
+    Returns:
+        The approximate number of tokens.
+    """
+    return (len(text) + 3) // 4
+
+
+def _load_token_counter(module_path: str | None) -> Callable[[str], int]:
+    """Return the function counting tokens.
+
+    Parameters:
+        module_path: An optional path of a Python module containing a `count_tokens` function.
+
+    Raises:
+        PluginError: When the module cannot be loaded or has no `count_tokens` function.
+
+    Returns:
+        The user-defined function, or the default heuristic.
+    """
+    if module_path is None:
+        return _count_tokens
+    try:
+        module = _load_module(module_path)
+    except Exception as error:
+        raise PluginError(f"Could not load module: {error}") from error
+    try:
+        return module.count_tokens
+    except AttributeError as error:
+        raise PluginError(f"Module '{module_path}' has no 'count_tokens' function") from error
+
+
+_re_fence = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_re_heading = re.compile(r"^ {0,3}#{1,6}(?:\s|$)")
+
+
+def _headings(markdown: str) -> str:
+    """Reduce a Markdown document to its headings.
+
+    Parameters:
+        markdown: The Markdown document.
+
+    Returns:
+        The headings, one per line.
+    """
+    lines = []
+    fence = ""
+    for line in markdown.splitlines():
+        if match := _re_fence.match(line):
+            marker = match.group(1)
+            if not fence:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence) and not line.strip()[len(marker) :]:
+                fence = ""
+        elif not fence and _re_heading.match(line):
+            lines.append(line.strip())
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _fill_budget(
+    header: str,
+    sections: Iterable[tuple[str, Iterable[tuple[str, str, str]]]],
+    budget: int,
+    count_tokens: Callable[[str], int],
+) -> tuple[str, int]:
+    """Concatenate as many pages as fit in a token budget.
+
+    Sections and pages are considered in order. A page that does not fit is reduced to its headings
+    followed by a link to its full Markdown version, and is skipped if even that does not fit.
+    Pages listed in several sections are written once, identified by their URL.
+
+    Parameters:
+        header: The text preceding the sections.
+        sections: Section names with their pages, as tuples of title, URL and Markdown content.
+        budget: The maximum number of tokens.
+        count_tokens: The function counting tokens.
+
+    Returns:
+        The text and its number of tokens.
+    """
+    text = header
+    used = count_tokens(header)
+    seen: set[str] = set()
+    for section_name, pages in sections:
+        section_header = f"# {section_name}\n\n"
+        if not text.endswith("\n\n"):
+            section_header = "\n" + section_header
+        section_tokens = count_tokens(section_header)
+        written = False
+        for title, url, content in pages:
+            if url in seen:
+                continue
+            separator = "\n" if written else section_header
+            separator_tokens = count_tokens("\n") if written else section_tokens
+            for candidate in (content, f"{_headings(content)}\n[{title}]({url})\n"):
+                tokens = count_tokens(candidate)
+                if used + separator_tokens + tokens <= budget:
+                    text += separator + candidate
+                    used += separator_tokens + tokens
+                    written = True
+                    seen.add(url)
+                    break
+    return text, used
@@ -0,0 +1,191 @@
+# Tracing hooks for custom instrumentation, and an OpenMetrics exporter.
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+
+@dataclass(frozen=True)
+class Span:
+    """A timed step of the build, reported to trace listeners when it ends."""
+
+    name: str
+    """The step name, for example `parse`, `clean`, `preprocess`, `links`, `convert`, `format` or `write`."""
+    page: str | None
+    """The source URI of the page being processed, if any."""
+    start: float
+    """The start time, as returned by `time.perf_counter`."""
+    duration: float
+    """The duration, in seconds."""
+
+
+class TraceListener:
+    """Base class for trace listeners.
+
+    Subclass it and override the methods you need,
+    then register an instance with [`add_trace_listener`][mkdocs_llmstxt.add_trace_listener],
+    for example from your pre-processing module or from another plugin.
+    """
+
+    def on_span_start(self, name: str, page: str | None) -> None:
+        """Receive the name of a span when it starts.
+
+        Parameters:
+            name: The span name.
+            page: The source URI of the page being processed, if any.
+        """
+
+    def on_span(self, span: Span) -> None:
+        """Receive a span when it ends.
+
+        Parameters:
+            span: The span.
+        """
+
+    def on_counter(self, name: str, value: float, page: str | None) -> None:
+        """Receive a counter increment.
+
+        Parameters:
+            name: The counter name, for example `pages` or `written_bytes`.
+            value: The increment.
+            page: The source URI of the page being processed, if any.
+        """
+
+
+# A tuple, replaced on changes, so that listeners can be (un)registered while events are reported.
+_listeners: tuple[TraceListener, ...] = ()
+_page: ContextVar[str | None] = ContextVar("_page", default=None)
+
+
+def add_trace_listener(listener: TraceListener) -> None:
+    """Register a trace listener.
+
+    Parameters:
+        listener: The listener.
+    """
+    global _listeners  # noqa: PLW0603
+    if listener not in _listeners:
+        _listeners = (*_listeners, listener)
+
+
+def remove_trace_listener(listener: TraceListener) -> None:
+    """Unregister a trace listener. Unknown listeners are ignored.
+
+    Parameters:
+        listener: The listener.
+    """
+    global _listeners  # noqa: PLW0603
+    _listeners = tuple(registered for registered in _listeners if registered is not listener)
+
+
+@contextmanager
+def trace_span(name: str, *, page: str | None = None) -> Iterator[None]:
+    """Time a step and report it to trace listeners.
+
+    Spans nested in a span with a page inherit its page.
+    Nothing is measured when no listener is registered.
+
+    Parameters:
+        name: The step name.
+        page: The source URI of the page being processed.
+
+    Yields:
+        Nothing.
+    """
+    if not _listeners:
+        yield
+        return
+    token = _page.set(page) if page is not None else None
+    for listener in _listeners:
+        listener.on_span_start(name, _page.get())
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span = Span(name=name, page=_page.get(), start=start, duration=time.perf_counter() - start)
+        if token is not None:
+            _page.reset(token)
+        for listener in _listeners:
+            listener.on_span(span)
+
+
+def trace_count(name: str, value: float = 1) -> None:
+    """Report a counter increment to trace listeners.
+
+    Parameters:
+        name: The counter name.
+        value: The increment.
+    """
+    for listener in _listeners:
+        listener.on_counter(name, value, _page.get())
+
+
+_re_invalid_name = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.6f}"
+
+
+class _OpenMetricsExporter(TraceListener):
+    """Aggregate spans and counters of a build, to write them in the OpenMetrics text format."""
+
+    def __init__(self, prefix: str = "mkdocs_llmstxt") -> None:
+        self.prefix = prefix
+        self.spans: dict[str, list[float]] = defaultdict(lambda: [0, 0.0])
+        self.counters: dict[str, float] = defaultdict(float)
+        # Pages can be converted in several threads.
+        self._lock = threading.Lock()
+
+    def on_span(self, span: Span) -> None:
+        with self._lock:
+            stats = self.spans[span.name]
+            stats[0] += 1
+            stats[1] += span.duration
+
+    def on_counter(self, name: str, value: float, page: str | None) -> None:  # noqa: ARG002
+        with self._lock:
+            self.counters[_re_invalid_name.sub("_", name)] += value
+
+    def render(self) -> str:
+        """Render the metrics.
+
+        Returns:
+            The metrics, in the OpenMetrics text format.
+        """
+        lines = []
+        if self.spans:
+            family = f"{self.prefix}_span_seconds"
+            lines.append(f"# TYPE {family} summary")
+            lines.append(f"# UNIT {family} seconds")
+            lines.append(f"# HELP {family} Time spent in each step of the build.")
+            for name, (count, total) in sorted(self.spans.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{family}_count{{span="{label}"}} {_number(count)}')
+                lines.append(f'{family}_sum{{span="{label}"}} {_number(total)}')
+        for name, total in sorted(self.counters.items()):
+            family = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {family} counter")
+            lines.append(f"{family}_total {_number(total)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Write the metrics to a file.
+
+        Parameters:
+            path: The path of the file.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.render(), encoding="utf8")
@@ -0,0 +1,445 @@
+# Output writers, each consuming the records of converted pages once.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, NamedTuple
+from urllib.parse import quote
+
+from mkdocs_llmstxt._internal.dedupe import _Deduplicator
+from mkdocs_llmstxt._internal.logger import _get_logger
+from mkdocs_llmstxt._internal.split import _fragment_names, _split_markdown
+from mkdocs_llmstxt._internal.tokens import _fill_budget
+from mkdocs_llmstxt._internal.tracing import trace_count, trace_span
+from mkdocs_llmstxt._internal.zerocopy import _append_file
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from pathlib import Path
+
+
+_logger = _get_logger(__name__)
+
+_re_backtick_fence = re.compile(rb"^ {0,3}(`{3,})")
+
+
+class PageRecord(NamedTuple):
+    """A converted page, as given to output writers."""
+
+    section: str
+    """The name of the section listing the page."""
+    src_uri: str
+    """The source URI of the page."""
+    title: str
+    """The page title."""
+    description: str
+    """The description of the page in its section, possibly empty."""
+    md_url: str
+    """The URL of the Markdown version of the page."""
+    path_md: Path
+    """The path of the Markdown version of the page in the site directory."""
+    content: str
+    """The Markdown content."""
+    tokens: int | None
+    """The number of tokens of the content, if counted."""
+    raw: bool = False
+    """Whether the record is a file that is not a page, included verbatim.
+
+    Its content is not loaded: `content` is empty, and `path_md` is the path of the file in the site directory.
+    """
+
+
+@dataclass(frozen=True)
+class OutputContext:
+    """Information about the build, given to output writers."""
+
+    site_dir: Path
+    """The site directory."""
+    header: str
+    """The Markdown preceding sections in outputs: site name, description and Markdown description."""
+    sections: list[str]
+    """The names of all sections, in order, including sections without pages."""
+
+
+class OutputWriter(ABC):
+    """Base class for output writers.
+
+    Subclass it and implement [`write`][mkdocs_llmstxt.OutputWriter.write],
+    then register an instance with [`add_output_writer`][mkdocs_llmstxt.add_output_writer],
+    for example from a [hook](https://www.mkdocs.org/user-guide/configuration/#hooks).
+    Pages are converted once, whatever the number of writers.
+    """
+
+    @abstractmethod
+    def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:
+        """Write outputs from the converted pages.
+
+        Parameters:
+            pages: The pages, in section order. A page listed in several sections is given once per section.
+            context: Information about the build.
+
+        Returns:
+            The paths of the written files, added to the bundle if one is configured.
+        """
+
+
+# A tuple, replaced on changes, like trace listeners.
+_writers: tuple[OutputWriter, ...] = ()
+
+
+def add_output_writer(writer: OutputWriter) -> None:
+    """Register an output writer, run after the built-in ones.
+
+    Parameters:
+        writer: The writer.
+    """
+    global _writers  # noqa: PLW0603
+    if writer not in _writers:
+        _writers = (*_writers, writer)
+
+
+def remove_output_writer(writer: OutputWriter) -> None:
+    """Unregister an output writer. Unknown writers are ignored.
+
+    Parameters:
+        writer: The writer.
+    """
+    global _writers  # noqa: PLW0603
+    _writers = tuple(registered for registered in _writers if registered is not writer)
+
+
+def _registered_writers() -> tuple[OutputWriter, ...]:
+    return _writers
+
+
+def _group_sections(pages: Iterable[PageRecord], sections: list[str]) -> Iterator[tuple[str, list[PageRecord]]]:
+    """Group pages, given in section order, by section.
+
+    Parameters:
+        pages: The pages.
+        sections: The section names, in order.
+
+    Yields:
+        Each section name with its pages, even when it has none.
+    """
+    page_iter = iter(pages)
+    page = next(page_iter, None)
+    for section in sections:
+        group = []
+        while page is not None and page.section == section:
+            group.append(page)
+            page = next(page_iter, None)
+        yield section, group
+
+
+class _PagesWriter(OutputWriter):
+    """Write the Markdown file of each page, and optionally a file per heading of a given level."""
+
+    def __init__(
+        self,
+        split_level: int | None = None,
+        headings: dict[str, list[tuple[str, str]]] | None = None,
+    ) -> None:
+        """Initialize the writer.
+
+        Parameters:
+            split_level: The level of the headings to write fragment files for.
+            headings: The anchor and title of the headings of that level in each page, by source URI.
+        """
+        self.split_level = split_level
+        self.headings = headings or {}
+        self.files: dict[str, Path] = {}
+        """The files containing exactly the Markdown of their page, by source URI, that other outputs can copy."""
+
+    def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:  # noqa: ARG002
+        written = []
+        seen = set()
+        for page in pages:
+            # Pages listed in several sections are written once.
+            if page.path_md in seen:
+                continue
+            seen.add(page.path_md)
+            # Files that are not pages are already copied to the site, they are only returned to be bundled.
+            if page.raw:
+                written.append(page.path_md)
+                continue
+            with trace_span("write", page=page.src_uri):
+                fragments = self._write_fragments(page, self.split_level) if self.split_level is not None else []
+                content = page.content
+                if fragments:
+                    index = "".join(f"- [{title}]({url})\n" for title, url, _ in fragments)
+                    content = f"{content.rstrip()}\n\nSections of this page:\n\n{index}"
+                # Keep LF line endings on every platform, like the full output written in binary mode.
+                page.path_md.write_text(content, encoding="utf8", newline="")
+            if not fragments:
+                self.files[page.src_uri] = page.path_md
+            trace_count("written_files", 1 + len(fragments))
+            _logger.debug(f"Generated MD file to {page.path_md}")
+            written.append(page.path_md)
+            written.extend(path for _, _, path in fragments)
+        return written
+
+    def _write_fragments(self, page: PageRecord, level: int) -> list[tuple[str, str, Path]]:
+        headings = self.headings.get(page.src_uri, [])
+        if not headings:
+            return []
+        fragments = _split_markdown(page.content, level)
+        # Headings are matched by position, give up when the Markdown does not have the same ones.
+        if len(fragments) != len(headings):
+            _logger.debug(
+                f"Not splitting '{page.src_uri}': {len(headings)} headings in its table of contents, "
+                f"{len(fragments)} in its Markdown",
+            )
+            return []
+        directory = page.path_md.with_suffix("")
+        directory.mkdir(parents=True, exist_ok=True)
+        base_url = page.md_url.removesuffix(".md")
+        written = []
+        names = _fragment_names([anchor for anchor, _ in headings])
+        for (_, title), name, fragment in zip(headings, names, fragments):
+            path = directory.joinpath(f"{name}.md")
+            path.write_text(fragment, encoding="utf8", newline="")
+            written.append((title, f"{base_url}/{quote(name)}.md", path))
+        return written
+
+
+class _LlmsTxtWriter(OutputWriter):
+    """Write an `llms.txt` file, linking to the Markdown version of each page."""
+
+    def __init__(self, name: str = "llms.txt", *, token_counts: bool) -> None:
+        """Initialize the writer.
+
+        Parameters:
+            name: The path of the file, relative to the site directory.
+            token_counts: Whether to append token counts to page descriptions.
+        """
+        self.name = name
+        self.token_counts = token_counts
+
+    def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:
+        markdown = context.header
+        for section, section_pages in _group_sections(pages, context.sections):
+            markdown += f"## {section}\n\n"
+            for page in section_pages:
+                notes = page.description
+                if self.token_counts and page.tokens is not None:
+                    notes = f"{notes} ({page.tokens} tokens)" if notes else f"{page.tokens} tokens"
+                markdown += f"- [{page.title}]({page.md_url}){(': ' + notes) if notes else ''}\n"
+            markdown += "\n"
+
+        output_file = context.site_dir.joinpath(self.name)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with trace_span("write"):
+            output_file.write_text(markdown, encoding="utf8")
+        trace_count("written_files")
+        _logger.debug(f"Generated file /{self.name}")
+        return [output_file]
+
+
+def _code_fences(path: Path) -> tuple[bytes, bytes]:
+    """Return the code fences to write around a file included verbatim in Markdown.
+
+    The file is scanned line by line, without being loaded whole in memory,
+    so that the fences are longer than the ones it contains.
+
+    Parameters:
+        path: The path of the file.
+
+    Returns:
+        The opening fence, with the file extension as language, and the closing fence.
+    """
+    longest = 2
+    last = b"\n"
+    with path.open("rb") as file:
+        for line in file:
+            if match := _re_backtick_fence.match(line):
+                longest = max(longest, len(match.group(1)))
+            last = line[-1:]
+    fence = b"`" * (longest + 1)
+    opening = fence + path.suffix.removeprefix(".").encode() + b"\n"
+    closing = (b"" if last == b"\n" else b"\n") + fence + b"\n"
+    return opening, closing
+
+
+class _FullOutputWriter(OutputWriter):
+    """Write the full output file, concatenating all pages, and its byte-offset index."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        index: str | None = None,
+        dedupe_min_size: int | None = None,
+        page_files: dict[str, Path] | None = None,
+    ) -> None:
+        """Initialize the writer.
+
+        Parameters:
+            name: The path of the full output, relative to the site directory.
+            index: The path of the byte-offset index, relative to the site directory.
+            dedupe_min_size: The minimum size of de-duplicated blocks, or none to disable de-duplication.
+            page_files: The already written Markdown files of pages, by source URI, copied instead of encoding pages.
+        """
+        self.name = name
+        self.index = index
+        self.dedupe_min_size = dedupe_min_size
+        self.page_files = page_files or {}
+
+    def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:
+        full_output_file = context.site_dir.joinpath(self.name)
+        with trace_span("write"):
+            index = self.write_full_output(full_output_file, pages, context)
+        trace_count("written_files")
+        _logger.debug(f"Generated file /{self.name}")
+        if self.index is None:
+            return [full_output_file]
+
+        index_file = context.site_dir.joinpath(self.index)
+        with trace_span("write"):
+            index_file.write_text(json.dumps(index, indent=2), encoding="utf8")
+        trace_count("written_files")
+        _logger.debug(f"Generated file /{self.index}")
+        return [full_output_file, index_file]
+
+    def write_full_output(self, path: Path, pages: Iterable[PageRecord], context: OutputContext) -> dict[str, Any]:
+        """Write the full output file, recording the byte offsets of each section and page.
+
+        Offsets are counted in bytes of the UTF-8 encoded file.
+        Start offsets are inclusive, end offsets are exclusive,
+        so the HTTP range of a page is `bytes={start}-{end - 1}`.
+
+        When de-duplication is enabled, pages are written only once, and blocks already written
+        are replaced by references. Index entries of repeated pages point to their first occurrence.
+        Files that are not pages are copied verbatim in code blocks, without being loaded in memory,
+        and are not de-duplicated.
+        Without de-duplication, pages whose Markdown file is already written are copied from it the same way.
+
+        Parameters:
+            path: The path of the full output file.
+            pages: The pages, in section order.
+            context: Information about the build.
+
+        Returns:
+            The offsets index.
+        """
+        sections: list[dict[str, Any]] = []
+        dedupe = _Deduplicator(self.dedupe_min_size) if self.dedupe_min_size is not None else None
+        written: dict[str, tuple[int, int]] = {}
+        with path.open("wb") as file:
+            offset = file.write(context.header.encode("utf8"))
+            for section_name, section_pages in _group_sections(pages, context.sections):
+                section_start = offset
+                offset += file.write(f"# {section_name}\n\n".encode())
+                entries: list[dict[str, Any]] = []
+                separator = b""
+                for page in section_pages:
+                    first_uri = None
+                    if dedupe is not None and page.src_uri in written:
+                        first_uri = page.src_uri
+                    elif dedupe is not None and not page.raw:
+                        first_uri = dedupe.first_page(page.src_uri, page.content)
+                    if first_uri is not None:
+                        page_start, page_end = written[first_uri]
+                    else:
+                        offset += file.write(separator)
+                        separator = b"\n"
+                        page_start = offset
+                        if page.raw:
+                            # Files are fenced, so that their lines are not read as Markdown.
+                            opening, closing = _code_fences(page.path_md)
+                            offset += file.write(opening)
+                            offset += _append_file(page.path_md, file)
+                            offset += file.write(closing)
+                        elif dedupe is None and (page_file := self.page_files.get(page.src_uri)) is not None:
+                            offset += _append_file(page_file, file)
+                        else:
+                            content = page.content
+                            if dedupe is not None:
+                                content = dedupe.dedupe(content, page.title, page.md_url)
+                            offset += file.write(content.encode("utf8"))
+                        page_end = offset
+                        written[page.src_uri] = page_start, page_end
+                    entries.append(
+                        {
+                            "src_uri": page.src_uri,
+                            "title": page.title,
+                            "md_url": page.md_url,
+                            "start": page_start,
+                            "end": page_end,
+                        },
+                    )
+                sections.append({"name": section_name, "start": section_start, "end": offset, "pages": entries})
+        if dedupe is not None:
+            _logger.debug(f"De-duplicated full output: {dedupe.replaced} blocks replaced")
+        return {"file": self.name, "size": offset, "sections": sections}
+
+
+class _SmallOutputWriter(OutputWriter):
+    """Write the small output file, filling a token budget with pages in section order."""
+
+    def __init__(self, name: str, budget: int, count_tokens: Callable[[str], int]) -> None:
+        """Initialize the writer.
+
+        Parameters:
+            name: The path of the small output, relative to the site directory.
+            budget: The maximum number of tokens.
+            count_tokens: The function counting tokens.
+        """
+        self.name = name
+        self.budget = budget
+        self.count_tokens = count_tokens
+
+    def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:
+        # Files that are not pages are linked from `llms.txt` only, their token count is unknown.
+        sections = (
+            (section, ((page.title, page.md_url, page.content) for page in section_pages if not page.raw))
+            for section, section_pages in _group_sections(pages, context.sections)
+        )
+        small_output_file = context.site_dir.joinpath(self.name)
+        with trace_span("write"):
+            text, tokens = _fill_budget(context.header, sections, self.budget, self.count_tokens)
+            small_output_file.write_text(text, encoding="utf8")
+        trace_count("written_files")
+        _logger.debug(f"Generated file /{self.name} ({tokens}/{self.budget} tokens)")
+        return [small_output_file]
+
+
+class _JsonlWriter(OutputWriter):
+    """Write a JSON Lines corpus, one record per page, streamed to disk."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize the writer.
+
+        Parameters:
+            name: The path of the corpus, relative to the site directory.
+        """
+        self.name = name
+
+    def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:
+        jsonl_file = context.site_dir.joinpath(self.name)
+        jsonl_file.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        with trace_span("write"), jsonl_file.open("w", encoding="utf8") as file:
+            for page in pages:
+                # Files that are not pages are not part of the corpus.
+                if page.raw:
+                    continue
+                record = {
+                    "url": page.md_url,
+                    "src_uri": page.src_uri,
+                    "title": page.title,
+                    "section": page.section,
+                    "description": page.description,
+                    "markdown": page.content,
+                    "tokens": page.tokens,
+                    "sha256": hashlib.sha256(page.content.encode("utf8")).hexdigest(),
+                }
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        trace_count("written_files")
+        _logger.debug(f"Generated file /{self.name} ({count} records)")
+        return [jsonl_file]
@@ -0,0 +1,53 @@
+# Appending files to outputs without reading them in Python.
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, BinaryIO, Callable
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+_CHUNK_SIZE = 1024 * 1024
+
+# Kernel copies taking the source and target file descriptors, the offset in the source and a byte count,
+# and writing at the current offset of the target. `sendfile` only accepts regular files as target on Linux.
+_KERNEL_COPIES: list[Callable[[int, int, int, int], int]] = []
+if hasattr(os, "copy_file_range"):
+    _KERNEL_COPIES.append(lambda source, target, offset, count: os.copy_file_range(source, target, count, offset))
+if hasattr(os, "sendfile"):
+    _KERNEL_COPIES.append(lambda source, target, offset, count: os.sendfile(target, source, offset, count))
+
+
+def _append_file(source: Path, target: BinaryIO) -> int:
+    """Append a file to an open file.
+
+    The copy is done by the kernel with `os.copy_file_range` or `os.sendfile` when the platform
+    and file systems support it, and in chunks otherwise, so the file is never loaded whole in memory.
+
+    Parameters:
+        source: The path of the file to append.
+        target: The file to append to, opened in binary mode.
+
+    Returns:
+        The number of bytes appended.
+    """
+    # Kernel copies write directly at the file descriptor's offset, after Python's buffered data.
+    target.flush()
+    copied = 0
+    with source.open("rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        for kernel_copy in _KERNEL_COPIES:
+            try:
+                while copied < size and (count := kernel_copy(file.fileno(), target.fileno(), copied, size - copied)):
+                    copied += count
+            except OSError:
+                # Unsupported by the platform or file systems: try the next method from where this one stopped.
+                continue
+            break
+        # Copy the rest in chunks, if kernel copies are unavailable, or if the file grew while being copied.
+        file.seek(copied)
+        while chunk := file.read(_CHUNK_SIZE):
+            copied += target.write(chunk)
+    return copied
@@ -34,7 +34,8 @@ def fixture_mkdocs_conf(request: pytest.FixtureRequest, tmp_path: Path) -> MkDoc
     for page, content in pages.items():
         page_file = Path(conf.docs_dir, page)
         page_file.parent.mkdir(exist_ok=True)
-        page_file.write_text(content)
+        # Keep LF line endings on every platform, files that are not pages are copied verbatim.
+        page_file.write_bytes(content.encode())
     assert conf.validate() == ([], [])
     if "toc" not in conf.markdown_extensions:
         # Guaranteed to be added by MkDocs.
@@ -0,0 +1,63 @@
+"""Tests for the conversion API."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from mkdocs_llmstxt import ConversionOptions, convert_pages
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+def _pages(count: int, consumed: list[int] | None = None) -> Iterator[tuple[str, str]]:
+    for index in range(count):
+        if consumed is not None:
+            consumed.append(index)
+        yield f'<h1>Page {index}</h1><p>See <a href="../other/">other</a>.</p>', f"page{index}/index.html"
+
+
+@pytest.mark.parametrize("engine", ["markdownify", "streaming"])
+def test_convert_pages(engine: str) -> None:
+    """Test that pages are converted the same way serially and in threads."""
+    options = ConversionOptions(base_url="https://example.org/", engine=engine)  # type: ignore[arg-type]
+    serial = list(convert_pages(_pages(20), options))
+    assert serial[3].uri == "page3/index.html"
+    assert serial[3].markdown == "# Page 3\n\nSee [other](https://example.org/other/index.md).\n"
+    options = ConversionOptions(base_url="https://example.org/", engine=engine, threads=4)  # type: ignore[arg-type]
+    threaded = list(convert_pages(_pages(20), options))
+    assert sorted(threaded) == sorted(serial)
+
+
+def test_bounded_in_flight() -> None:
+    """Test that the input is consumed lazily, with a bounded number of pages in flight."""
+    consumed: list[int] = []
+    results = convert_pages(_pages(100, consumed), ConversionOptions(threads=2, max_in_flight=3))
+    next(results)
+    assert len(consumed) <= 4
+    results.close()
+    assert len(consumed) < 100
+
+
+def test_fallback() -> None:
+    """Test that pages exceeding limits are converted to plain text."""
+    (result,) = convert_pages([("<h1>Title</h1><p>Text</p>", "index.html")], ConversionOptions(max_html_size=10))
+    assert result.fallback
+    assert result.markdown == "Title\n\nText\n"
+
+
+@pytest.mark.parametrize("engine", ["markdownify", "streaming"])
+def test_relative_links(engine: str) -> None:
+    """Test that links are kept relative without a base URL."""
+    html = '<p><a href="sub/x.html">x</a> <a href="../other/">other</a></p>'
+    options = ConversionOptions(engine=engine)  # type: ignore[arg-type]
+    (result,) = convert_pages([(html, "usage/index.html")], options)
+    assert result.markdown == "[x](sub/x.html) [other](../other/)\n"
+
+
+def test_streaming_preprocess() -> None:
+    """Test that the streaming engine refuses a pre-processing module instead of ignoring it."""
+    with pytest.raises(ValueError, match="does not support 'preprocess'"):
+        ConversionOptions(engine="streaming", preprocess="missing.py")
@@ -0,0 +1,46 @@
+"""Tests for the Markdown converter."""
+
+from __future__ import annotations
+
+import pytest
+from bs4 import BeautifulSoup as Soup
+
+from mkdocs_llmstxt._internal.converter import _CONVERTER_OPTIONS, _converter, _FragmentCache, _MarkdownConverter
+
+SIGNATURE = '<div class="doc-signature highlight"><pre><code>func(a: int) -&gt; str</code></pre></div>'
+TABLE = "<table><thead><tr><th>Name</th></tr></thead><tbody><tr><td><code>a</code></td></tr></tbody></table>"
+HTML = f"<h2>First</h2>{SIGNATURE}{TABLE}<ul><li>{TABLE}</li></ul><h2>Second</h2>{SIGNATURE}{TABLE}"
+
+
+def test_fragment_cache_preserves_output() -> None:
+    """Memoized fragments are converted exactly like non-memoized ones."""
+    converter = _MarkdownConverter(fragment_selectors=["div.doc-signature", "table"], **_CONVERTER_OPTIONS)
+    expected = _converter.convert_soup(Soup(HTML, "html.parser"))
+    assert converter.convert_soup(Soup(HTML, "html.parser")) == expected
+    assert converter.fragment_cache.hits
+    assert converter.convert_soup(Soup(HTML, "html.parser")) == expected
+
+
+@pytest.mark.parametrize("selector", ["li", "ol", "ul", "tr", "tbody"])
+def test_fragment_cache_skips_context_dependent_elements(selector: str) -> None:
+    """Elements converted differently depending on their siblings are not memoized."""
+    html = (
+        "<ol><li>Item</li><li>Item</li></ol><p>Text</p><ul><li>Item</li></ul><ul><li>Item</li></ul>"
+        "<table><tbody><tr><td>Cell</td></tr><tr><td>Cell</td></tr></tbody></table>"
+        "<table><tbody><tr><td>Cell</td></tr><tr><td>Cell</td></tr></tbody></table>"
+    )
+    converter = _MarkdownConverter(fragment_selectors=[selector], **_CONVERTER_OPTIONS)
+    assert converter.convert_soup(Soup(html, "html.parser")) == _converter.convert_soup(Soup(html, "html.parser"))
+    assert not converter.fragment_cache.hits
+
+
+def test_fragment_cache_evicts_least_recently_used() -> None:
+    """The fragment cache is bounded."""
+    cache = _FragmentCache(maxsize=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
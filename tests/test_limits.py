@@ -0,0 +1,42 @@
+"""Tests for the conversion limits."""
+
+from __future__ import annotations
+
+import pytest
+from bs4 import BeautifulSoup as Soup
+
+from mkdocs_llmstxt._internal.converter import _converter
+from mkdocs_llmstxt._internal.limits import _check_limits, _ConversionLimitError, _extract_text, _time_limit
+from mkdocs_llmstxt._internal.streaming import _generate_page_markdown_streaming
+
+HTML = "<h1>Title</h1><p>Some <em>text</em>.</p>"
+
+
+def test_time_limit() -> None:
+    """Both engines abort conversions running past the deadline."""
+    with _time_limit(-1), pytest.raises(_ConversionLimitError, match="more than -1 seconds"):
+        _converter.convert_soup(Soup(HTML, "html.parser"))
+    with _time_limit(-1), pytest.raises(_ConversionLimitError):
+        _generate_page_markdown_streaming(HTML, should_autoclean=True, base_uri="https://example.org/", page_uri="")
+    with _time_limit(60):
+        assert _converter.convert_soup(Soup(HTML, "html.parser"))
+
+
+def test_check_limits() -> None:
+    """Size and depth limits are checked before conversion."""
+    _check_limits(HTML, max_size=len(HTML), max_depth=2)
+    with pytest.raises(_ConversionLimitError, match="more than 10"):
+        _check_limits(HTML, max_size=10)
+    with pytest.raises(_ConversionLimitError, match="more than 2 levels"):
+        _check_limits("<div><p>Un<em>closed</p><p><em>three</em></p></div><p><a><b>four</b></a></p>", max_depth=2)
+    # Unclosed elements are closed by the end tag of their parent.
+    _check_limits("<div><p>Un<em>closed</p></div>" * 3, max_depth=3)
+
+
+def test_extract_text() -> None:
+    """The plain-text fallback keeps block structure and code indentation."""
+    html = (
+        '<h1>Title<a class="headerlink" href="#title">¶</a></h1><p>Some\n  <em>text</em>.</p>'
+        "<script>var a;</script><pre><code>def f():\n    pass\n</code></pre><ul><li>One</li><li>Two<br>lines</li></ul>"
+    )
+    assert _extract_text(html) == "Title\n\nSome text.\n\ndef f():\n    pass\n\nOne\n\nTwo\nlines\n"
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import pytest
 
-from mkdocs_llmstxt._internal.plugin import _convert_to_absolute_link
+from mkdocs_llmstxt._internal.links import _convert_to_absolute_link, _LinkIndex
 
 BASE_URI = "https://example.org/en/0.1.34/"
 PAGE_DIR = "page2"
@@ -48,3 +48,51 @@ def test_external_links_are_preserved(href: str) -> None:
 def test_anchor_links_are_preserved(href: str) -> None:
     """Anchor links are not rewritten."""
     assert _convert_to_absolute_link(href, base_uri=BASE_URI, current_dir=PAGE_DIR) == href
+
+
+@pytest.fixture(name="links")
+def fixture_links() -> _LinkIndex:
+    """Return a link index for a site with directory URLs, where `index.md` and `page1.md` are selected."""
+    links = _LinkIndex(BASE_URI)
+    links.add("index.html", BASE_URI + "index.md")
+    links.add("page1/index.html", BASE_URI + "page1/index.md")
+    links.add("dummy/index.html", BASE_URI + "dummy/")
+    links.add("my page/index.html", BASE_URI + "my%20page/")
+    links.add("assets/logo.png", BASE_URI + "assets/logo.png")
+    return links
+
+
+@pytest.mark.parametrize(
+    ("href", "expected"),
+    [
+        ("../", "https://example.org/en/0.1.34/index.md"),
+        ("../page1/", "https://example.org/en/0.1.34/page1/index.md"),
+        ("../page1/#usage", "https://example.org/en/0.1.34/page1/index.md#usage"),
+        ("../page1/index.html?q=1#usage", "https://example.org/en/0.1.34/page1/index.md?q=1#usage"),
+        ("../page1", "https://example.org/en/0.1.34/page1/index.md"),
+        ("../page1.html", "https://example.org/en/0.1.34/page1/index.md"),
+        ("../dummy/", "https://example.org/en/0.1.34/dummy/"),
+        ("../my%20page/", "https://example.org/en/0.1.34/my%20page/"),
+        ("../assets/logo.png", "https://example.org/en/0.1.34/assets/logo.png"),
+        # Unknown targets are converted like before.
+        ("../unknown/", "https://example.org/en/0.1.34/unknown/index.md"),
+        ("../../outside/", "https://example.org/en/outside/index.md"),
+        ("#section", "#section"),
+        ("/abs1/", "/abs1/"),
+        ("https://example.com", "https://example.com"),
+    ],
+)
+def test_links_are_rewritten_with_index(links: _LinkIndex, href: str, expected: str) -> None:
+    """Links to selected pages point to their Markdown version, links to other files to the site."""
+    assert links.rewrite(href, PAGE_DIR) == expected
+    assert links.rewrite(href, PAGE_DIR) == expected
+
+
+def test_links_index_without_directory_urls() -> None:
+    """Links are resolved when `use_directory_urls` is disabled."""
+    links = _LinkIndex(BASE_URI)
+    links.add("index.html", BASE_URI + "index.md")
+    links.add("section/page1.html", BASE_URI + "section/page1.md")
+    assert links.rewrite("page1.html#usage", "section") == BASE_URI + "section/page1.md#usage"
+    assert links.rewrite("../index.html", "section") == BASE_URI + "index.md"
+    assert links.rewrite("section/page1/", ".") == BASE_URI + "section/page1.md"
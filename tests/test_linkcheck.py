@@ -0,0 +1,32 @@
+"""Tests for the link checker."""
+
+from __future__ import annotations
+
+from mkdocs_llmstxt._internal.linkcheck import _LinkChecker, _markdown_links
+
+
+def test_markdown_links() -> None:
+    """Test that links are found outside of code only."""
+    markdown = (
+        "See [A](https://a.org/) and <https://b.org/>, not `[C](https://c.org/)`.\n"
+        "```md\n[D](https://d.org/)\n```\n"
+        '[E](#e "Title")\n'
+    )
+    assert list(_markdown_links(markdown)) == ["https://a.org/", "https://b.org/", "#e"]
+
+
+def test_link_checker() -> None:
+    """Test that links are checked against generated pages, their anchors, and site files."""
+    checker = _LinkChecker("https://example.org/", ["https://example.org/other/", "https://example.org/a.md"])
+    checker.add_page("https://example.org/a.md", ["usage", "caf%C3%A9", "café"])
+    markdown = (
+        "[1](https://example.org/a.md#usage) [2](#caf%C3%A9) [3](https://example.org/a.md#missing) "
+        "[4](https://example.org/missing.md) [5](https://example.org/other/#x) [6](https://elsewhere.org/)"
+    )
+    broken = checker.check("a.md", "https://example.org/a.md", markdown)
+    assert [(link.url, link.reason) for link in broken] == [
+        ("https://example.org/a.md#missing", "unknown anchor"),
+        ("https://example.org/missing.md", "unknown page"),
+    ]
+    assert checker.checked == 5
+    assert checker.outside == 1
@@ -0,0 +1,34 @@
+"""Tests for the rendering of mkdocstrings objects."""
+
+from __future__ import annotations
+
+import griffe
+
+from mkdocs_llmstxt._internal.objects import _signature
+
+CODE = """
+def function(a, b: int = 1, /, c=2, *args: str, d, e: float = 3.0, **kwargs) -> None:
+    ...
+
+class Class:
+    def __init__(self, value: int, *, strict: bool = False):
+        ...
+
+    def method(self, long_parameter_name: dict[str, list[int]], other_long_parameter_name: tuple[int, ...]):
+        ...
+"""
+
+
+def test_signature() -> None:
+    """Signatures keep parameter markers, drop `self` and wrap long parameter lists."""
+    with griffe.temporary_visited_module(CODE) as module:
+        assert _signature(module["function"]) == (
+            "```python\nfunction(a, b: int = 1, /, c=2, *args: str, d, e: float = 3.0, **kwargs) -> None\n```"
+        )
+        assert _signature(module["Class"]) == "```python\nClass(value: int, *, strict: bool = False)\n```"
+        assert _signature(module["Class.method"]) == (
+            "```python\nmethod(\n"
+            "    long_parameter_name: dict[str, list[int]],\n"
+            "    other_long_parameter_name: tuple[int, ...],\n"
+            ")\n```"
+        )
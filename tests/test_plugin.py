@@ -1,11 +1,47 @@
 """Tests for the plugin."""
 
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import sysconfig
+import tarfile
+import threading
+import zipfile
+from contextlib import closing
 from pathlib import Path
 from textwrap import dedent
+from typing import TYPE_CHECKING
 
 import pytest
 from mkdocs.commands.build import build
-from mkdocs.config.defaults import MkDocsConfig
+from mkdocs.exceptions import Abort
+
+from mkdocs_llmstxt import (
+    OutputContext,
+    OutputWriter,
+    PageRecord,
+    TraceListener,
+    add_output_writer,
+    add_trace_listener,
+    remove_output_writer,
+    remove_trace_listener,
+)
+from mkdocs_llmstxt._internal import tracing
+from mkdocs_llmstxt._internal.links import _LinkIndex
+from mkdocs_llmstxt._internal.writers import _FullOutputWriter, _PagesWriter
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from mkdocs.config.defaults import MkDocsConfig
+
+    from mkdocs_llmstxt import Span
+    from mkdocs_llmstxt._internal.plugin import MkdocsLLMsTxtPlugin
 
 
 @pytest.mark.parametrize(
@@ -37,6 +73,8 @@ from mkdocs.config.defaults import MkDocsConfig
 
                     [Relative link 1](./index.md)
                     [Absolute link 1](/abs1/)
+                    [Not selected](./dummy.md)
+                    [Anchor](./page1.md#usage)
                     """,
                 ),
             },
@@ -75,6 +113,1090 @@ def test_plugin(mkdocs_conf: MkDocsConfig) -> None:
     # Check that relative links are made absolute in each page and in the full llmstxt file.
     assert "(https://example.org/en/0.1.34/index.md)" in page2md_content
     assert "(/abs1/)" in page2md_content
+    # Links to pages that are not selected point to their HTML version, anchors are preserved.
+    assert "(https://example.org/en/0.1.34/dummy/)" in page2md_content
+    assert "(https://example.org/en/0.1.34/page1/index.md#usage)" in page2md_content
 
     # Check that llmstxt pages (Markdown) contain links to other llmstxt pages, not HTML ones.
     assert '"https://example.org/en/0.1.34/index.html"' not in llmsfulltxt_content
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "full_output": "llms-full.txt",
+                            "bundle": bundle,
+                            "sections": {"Index": ["index.md", "page1.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "page1.md": "# Usage\n\nSome paragraph.",
+            },
+        }
+        for bundle in ("llms-bundle.tar.gz", "llms-bundle.zip")
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_bundle(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that all generated files are bundled in a single archive."""
+    build(config=mkdocs_conf)
+
+    bundle = mkdocs_conf.plugins["llmstxt"].config.bundle
+    archive = Path(mkdocs_conf.site_dir, bundle)
+    assert archive.exists()
+    if bundle.endswith(".zip"):
+        with zipfile.ZipFile(archive) as zip_file:
+            names = zip_file.namelist()
+            page1 = zip_file.read("page1/index.md").decode()
+    else:
+        with tarfile.open(archive) as tar_file:
+            names = tar_file.getnames()
+            page1 = tar_file.extractfile("page1/index.md").read().decode()  # type: ignore[union-attr]
+    assert sorted(names) == ["index.md", "llms-full.txt", "llms.txt", "page1/index.md"]
+    assert page1 == Path(mkdocs_conf.site_dir, "page1/index.md").read_text()
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "full_output": "llms-full.txt",
+                            "full_output_index": "llms-full.json",
+                            "sections": {
+                                "Index": ["index.md"],
+                                "Usage": ["page1.md", "page2.md"],
+                            },
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "page1.md": "# Usage\n\nSome paragraph with non-ASCII characters: éàü.",
+                "page2.md": "# More usage\n\nAnother paragraph.",
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_full_output_index(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that byte offsets of sections and pages in the full output are published."""
+    build(config=mkdocs_conf)
+
+    full_output = Path(mkdocs_conf.site_dir, "llms-full.txt").read_bytes()
+    index = json.loads(Path(mkdocs_conf.site_dir, "llms-full.json").read_text())
+    assert index["size"] == len(full_output)
+    assert [section["name"] for section in index["sections"]] == ["Index", "Usage"]
+
+    usage = index["sections"][1]
+    assert full_output[usage["start"] : usage["end"]].decode().startswith("# Usage\n\n")
+    for page in usage["pages"]:
+        page_md = Path(mkdocs_conf.site_dir, page["src_uri"].removesuffix(".md"), "index.md").read_bytes()
+        assert full_output[page["start"] : page["end"]] == page_md
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "full_output": "llms-full.txt",
+                            "sections": {"Index": ["index.md", "page1.md", "page2.md"]},
+                            **limits,
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "page1.md": "# Usage\n\nSome *paragraph*.\n\n" + "<div>" * 2000 + "Deep" + "</div>" * 2000,
+                "page2.md": "# Large\n\n" + "Some *text*. " * 1000,
+            },
+        }
+        for limits in ({"max_nesting_depth": 100, "max_html_size": 10_000}, {})
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_conversion_limits(mkdocs_conf: MkDocsConfig, caplog: pytest.LogCaptureFixture) -> None:
+    """Test that pages exceeding the conversion limits fall back to plain text."""
+    caplog.set_level(logging.INFO)
+    build(config=mkdocs_conf)
+
+    index = Path(mkdocs_conf.site_dir, "index.md").read_text()
+    assert index == "# Hello world\n"
+    page1 = Path(mkdocs_conf.site_dir, "page1/index.md").read_text()
+    assert page1 == "Usage\n\nSome paragraph.\n\nDeep\n"
+    assert "Could not convert page 'page1.md' to Markdown" in caplog.text
+
+    page2 = Path(mkdocs_conf.site_dir, "page2/index.md").read_text()
+    if mkdocs_conf.plugins["llmstxt"].config.max_html_size:
+        assert page2.startswith("Large\n\nSome text.")
+        assert "2 page(s) fell back to plain text: page1.md, page2.md" in caplog.text
+    else:
+        # Without limits, the deeply nested page still falls back when the converter hits the recursion limit.
+        assert page2.startswith("# Large\n\nSome *text*.")
+        assert "1 page(s) fell back to plain text: page1.md" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "token_counts": True,
+                            "small_output": "llms-small.txt",
+                            "small_output_budget": 100,
+                            "sections": {
+                                "Index": ["index.md"],
+                                "Usage": [{"page1.md": "Some usage docs."}, "page2.md", "page3.md"],
+                            },
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "page1.md": "# Usage\n\nSome paragraph.",
+                "page2.md": "# Large\n\n" + "Some text. " * 100 + "\n\n## Details\n\n```md\n# Not a heading\n```",
+                "page3.md": "# Small\n\nFits.",
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_token_budget(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that token counts are published and that the small output fits the budget."""
+    build(config=mkdocs_conf)
+
+    llmstxt = Path(mkdocs_conf.site_dir, "llms.txt").read_text()
+    assert "- [Hello world](https://example.org/index.md): 4 tokens\n" in llmstxt
+    assert "- [Usage](https://example.org/page1/index.md): Some usage docs. (7 tokens)\n" in llmstxt
+
+    small = Path(mkdocs_conf.site_dir, "llms-small.txt").read_text()
+    assert len(small) <= 400
+    assert "# Index\n\n# Hello world\n\n# Usage\n\n# Usage\n\nSome paragraph.\n" in small
+    # The large page is reduced to its headings, and following pages still fill the budget.
+    assert "\n# Large\n## Details\n\n[Large](https://example.org/page2/index.md)\n" in small
+    assert "Not a heading" not in small
+    assert small.endswith("\n# Small\n\nFits.\n")
+
+
+SHARED = "Install the package with your favorite installer, then add it to the plugins of your configuration. " * 3
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "full_output": "llms-full.txt",
+                            "full_output_index": "llms-full.json",
+                            "full_output_dedupe": True,
+                            "sections": {
+                                "Index": ["index.md", "page1.md"],
+                                "Usage": ["page1.md", "page2.md", "page3.md"],
+                            },
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "page1.md": f"# Usage\n\n{SHARED}\n\n```python\nimport this\n```",
+                "page2.md": f"# More usage\n\n- Item\n\n    {SHARED}\n\nShort paragraph.",
+                "page3.md": f"# Usage\n\n{SHARED}\n\n```python\nimport this\n```",
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_full_output_dedupe(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that repeated pages and blocks are written only once in the full output."""
+    build(config=mkdocs_conf)
+
+    full_output = Path(mkdocs_conf.site_dir, "llms-full.txt").read_text()
+    assert full_output.count(SHARED.strip()) == 1
+    assert full_output.count("# Usage\n") == 2
+    assert "# Usage\n\n# More usage\n" in full_output
+    assert "- Item\n\n  *Same as in [Usage](https://example.org/page1/index.md).*\n\nShort paragraph.\n" in full_output
+
+    # The page itself is not de-duplicated.
+    assert SHARED.strip() in Path(mkdocs_conf.site_dir, "page2/index.md").read_text()
+
+    index = json.loads(Path(mkdocs_conf.site_dir, "llms-full.json").read_text())
+    first_page1, *_ = (page for page in index["sections"][0]["pages"] if page["src_uri"] == "page1.md")
+    again_page1, _, page3 = index["sections"][1]["pages"]
+    assert again_page1["start"] == page3["start"] == first_page1["start"]
+    assert again_page1["end"] == page3["end"] == first_page1["end"]
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "mkdocstrings": {
+                            "handlers": {
+                                "python": {
+                                    "paths": [str(Path(__file__).parent.parent / "src")],
+                                    "options": {"show_root_heading": True, "separate_signature": True},
+                                },
+                            },
+                        },
+                    },
+                    {
+                        "llmstxt": {
+                            "mkdocstrings_objects": True,
+                            "sections": {"API": ["objects.md", "html.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "objects.md": "# API\n\n::: mkdocs_llmstxt._internal.tokens._load_token_counter",
+                "html.md": (
+                    "# API\n\n::: mkdocs_llmstxt._internal.tokens._count_tokens\n"
+                    "    options:\n      show_root_heading: false"
+                ),
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_mkdocstrings_objects(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that mkdocstrings objects are rendered from collected data, or converted from HTML without headings."""
+    build(config=mkdocs_conf)
+
+    objects = Path(mkdocs_conf.site_dir, "objects/index.md").read_text()
+    assert "## mkdocs_llmstxt.\\_internal.tokens.\\_load_token_counter\n\n```python\n" in objects
+    assert "\n_load_token_counter(module_path: str | None) -> Callable[[str], int]\n```" in objects
+    assert "**Parameters:**\n\n| Name " in objects
+    assert "| `module_path` | `str \\| None` |" in objects
+    assert "**Raises:**" in objects
+    assert "| `PluginError` | When the module cannot be loaded" in objects
+    assert "Source code" not in objects
+
+    # Objects without a heading cannot be looked up, and are converted from HTML.
+    html = Path(mkdocs_conf.site_dir, "html/index.md").read_text()
+    assert "Approximate the number of tokens of a text." in html
+    assert "_count_tokens(text: str) -> int" in html
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {"mkdocstrings": {"handlers": {"python": {"paths": [str(Path(__file__).parent.parent / "src")]}}}},
+                    {"llmstxt": {"mkdocstrings_objects": True, "sections": {"API": ["api.md"]}}},
+                ],
+            },
+            "pages": {"api.md": "# API\n\n::: mkdocs_llmstxt"},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_mkdocstrings_objects_default_options(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin) -> None:
+    """Test that members of objects rendered without a heading are rendered from collected data."""
+    build(config=mkdocs_conf)
+
+    api = Path(mkdocs_conf.site_dir, "api/index.md").read_text()
+    # The module itself has no heading, its docstring is converted from HTML.
+    assert api.startswith("# API\n\nmkdocs-llmstxt package.\n")
+    assert "\n## BatchPage\n\nA converted page, as given to the batch hooks" in api
+    assert "\n### markdown\n\n```python\nmarkdown: str\n```\n" in api
+    assert "Source code" not in api
+    assert plugin._objects is not None
+    assert plugin._objects.rendered > 10
+    assert plugin._objects.fallbacks == 1
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "metrics_file": "../metrics/llmstxt.prom",
+                            "full_output": "llms-full.txt",
+                            "sections": {"Pages": ["index.md", "page1.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage\n\nSome paragraph."},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_metrics_file(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that build metrics are written in the OpenMetrics text format."""
+    build(config=mkdocs_conf)
+
+    metrics = Path(mkdocs_conf.site_dir, "../metrics/llmstxt.prom").read_text()
+    for step in ("page", "parse", "clean", "links", "convert", "format", "write"):
+        assert f'mkdocs_llmstxt_span_seconds_count{{span="{step}"}}' in metrics
+    assert 'mkdocs_llmstxt_span_seconds_count{span="page"} 2\n' in metrics
+    assert 'mkdocs_llmstxt_span_seconds_count{span="convert"} 2\n' in metrics
+    assert "mkdocs_llmstxt_pages_total 2\n" in metrics
+    assert "mkdocs_llmstxt_written_files_total 4\n" in metrics
+    assert metrics.endswith("# EOF\n")
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "memory_profile": True,
+                            "memory_threshold": 100_000,
+                            "full_output": "llms-full.txt",
+                            "sections": {"Pages": ["index.md", "large.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "large.md": "# Large\n\n"
+                + "\n\n".join(f"- Item {i}\n\n    | a | b |\n    |---|---|" for i in range(50)),
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_memory_profile(mkdocs_conf: MkDocsConfig, caplog: pytest.LogCaptureFixture) -> None:
+    """Test that memory allocations are reported per page, and large pages flagged."""
+    caplog.set_level(logging.INFO)
+    build(config=mkdocs_conf)
+
+    report = next(record.getMessage() for record in caplog.records if "Memory profile:" in record.getMessage())
+    assert "outputs assembly: peak" in report
+    assert "top 2 of 2 page(s) by peak:\n" in report
+    assert "    large.md: peak " in report
+    assert ", tree " in report
+    flagged = [
+        record.getMessage() for record in caplog.records if "exceeds the memory threshold" in record.getMessage()
+    ]
+    assert any("Page 'large.md' exceeds the memory threshold: BeautifulSoup tree" in message for message in flagged)
+    assert not any("Page 'index.md' exceeds the memory threshold: BeautifulSoup tree" in message for message in flagged)
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "markdown_extensions": [{"toc": {"permalink": True}}],
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "size_report": "../reports/sizes.json",
+                            "sections": {"Pages": ["index.md", "page1.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world\n\n![Logo](logo.png)\n\nSome text.",
+                "page1.md": "# Usage\n\n## Section\n\nSome paragraph.\n\n```python\nprint('hello')\n```",
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_size_report(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that the size removed by each cleaning rule is reported per page and in total."""
+    build(config=mkdocs_conf)
+
+    report = json.loads(Path(mkdocs_conf.site_dir, "../reports/sizes.json").read_text())
+    totals = report["totals"]
+    assert totals["pages"] == 2
+    assert next(iter(totals["removed"])) == "permalinks"
+    pages = {page["src_uri"]: page for page in report["pages"]}
+    assert pages["index.md"]["removed"]["images"] == len('<img alt="Logo" src="logo.png"/>')
+    permalinks = [
+        f'<a class="headerlink" href="#{anchor}" title="Permanent link">¶</a>' for anchor in ("usage", "section")
+    ]
+    assert pages["page1.md"]["removed"]["permalinks"] == sum(len(permalink.encode()) for permalink in permalinks)
+    assert "preprocess" not in pages["page1.md"]["removed"]
+    assert totals["removed"]["permalinks"] == sum(page["removed"]["permalinks"] for page in report["pages"])
+    assert pages["page1.md"]["markdown"] > 0
+    assert pages["page1.md"]["formatted"] > 0
+    assert pages["page1.md"]["largest_elements"][0] == {
+        "element": "pre",
+        "size": len("<pre><code class=\"language-python\">print('hello')\n</code></pre>"),
+    }
+    assert totals["html"] == sum(page["html"] for page in report["pages"])
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {"plugins": [{"llmstxt": {"sections": {"Pages": ["index.md", "page1.md"]}}}]},
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage\n\n[Home](index.md)"},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_conversion_cache(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin, tmp_path: Path) -> None:
+    """Test that conversions are cached in a portable file, which can be imported on another machine."""
+    cache_file = tmp_path / "cache" / "llmstxt.sqlite"
+    plugin.config.cache_file = str(cache_file)
+    build(config=mkdocs_conf)
+    assert (
+        Path(mkdocs_conf.site_dir, "page1/index.md").read_text() == "# Usage\n\n[Home](https://example.org/index.md)\n"
+    )
+
+    # Tamper with the cache to check that it is used.
+    with closing(sqlite3.connect(cache_file)) as connection, connection:
+        assert connection.execute("SELECT COUNT(*) FROM pages").fetchone() == (2,)
+        connection.execute("UPDATE pages SET markdown = 'Cached.'")
+    build(config=mkdocs_conf)
+    assert Path(mkdocs_conf.site_dir, "page1/index.md").read_text() == "Cached."
+
+    # Keys do not depend on where the site is built, so caches can be shared between machines.
+    mkdocs_conf.site_dir = str(tmp_path / "elsewhere")
+    plugin.config.cache_file = str(tmp_path / "other.sqlite")
+    plugin.config.cache_import = [str(cache_file), str(tmp_path / "missing.sqlite")]
+    build(config=mkdocs_conf)
+    assert Path(mkdocs_conf.site_dir, "index.md").read_text() == "Cached."
+
+    # Adding files that pages do not link to keeps the cache valid.
+    Path(mkdocs_conf.docs_dir, "other.md").write_text("# Other")
+    Path(mkdocs_conf.docs_dir, "logo.png").write_bytes(b"")
+    build(config=mkdocs_conf)
+    assert Path(mkdocs_conf.site_dir, "page1/index.md").read_text() == "Cached."
+
+    # Changing the URL a page links to invalidates its entry, and unused entries are removed.
+    plugin.config.sections = {"Pages": ["page1.md"]}
+    build(config=mkdocs_conf)
+    assert Path(mkdocs_conf.site_dir, "page1/index.md").read_text() == "# Usage\n\n[Home](https://example.org/)\n"
+    with closing(sqlite3.connect(plugin.config.cache_file)) as connection:
+        assert connection.execute("SELECT markdown FROM pages").fetchall() == [
+            ("# Usage\n\n[Home](https://example.org/)\n",),
+        ]
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "lazy_serve": True,
+                            "full_output": "llms-full.txt",
+                            "sections": {"Pages": ["index.md", "page1.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage\n\n[Home](index.md)"},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_lazy_serve(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin) -> None:
+    """Test that pages are only converted when requested while serving."""
+    plugin.on_startup(command="serve", dirty=False)
+    build(config=mkdocs_conf)
+    site_dir = Path(mkdocs_conf.site_dir)
+    assert "[Usage](https://example.org/page1/index.md)" in site_dir.joinpath("llms.txt").read_text()
+    assert not site_dir.joinpath("page1/index.md").exists()
+    assert not site_dir.joinpath("llms-full.txt").exists()
+
+    resolved = plugin._resolve_lazy("page1/index.md")
+    assert resolved is not None
+    etag, generate = resolved
+    assert generate() == "# Usage\n\n[Home](https://example.org/index.md)\n"
+    assert plugin._resolve_lazy("page1/index.html") is None
+
+    # Unchanged pages keep their entity tag and conversion across rebuilds.
+    build(config=mkdocs_conf)
+    resolved = plugin._resolve_lazy("page1/index.md")
+    assert resolved is not None
+    assert resolved[0] == etag
+    assert len(plugin._lazy_cache) == 1
+
+    resolved = plugin._resolve_lazy("llms-full.txt")
+    assert resolved is not None
+    assert "# Usage" in resolved[1]()
+    assert len(plugin._lazy_cache) == 2
+
+    # Changing conversion settings changes entity tags, and stale conversions are not served.
+    plugin.config.preprocess = str(Path(mkdocs_conf.docs_dir).parent / "preprocess.py")
+    Path(plugin.config.preprocess).write_text("def preprocess(soup, output):\n    soup.find('a').decompose()\n")
+    build(config=mkdocs_conf)
+    resolved = plugin._resolve_lazy("page1/index.md")
+    assert resolved is not None
+    assert resolved[0] != etag
+    assert resolved[1]() == "# Usage\n"
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "lazy_serve": True,
+                            "full_output": "llms-full.txt",
+                            "sections": {"Pages": ["index.md", "page1.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage\n\n[Home](index.md)"},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_lazy_serve_during_rebuild(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin) -> None:
+    """Test that pages requested during a rebuild are converted once the build state is complete."""
+    plugin.on_startup(command="serve", dirty=False)
+    build(config=mkdocs_conf)
+    resolved = plugin._resolve_lazy("page1/index.md")
+    assert resolved is not None
+    results: list[str] = []
+    request = threading.Thread(target=lambda: results.append(resolved[1]()))
+
+    # Start a rebuild, resetting the state used by conversions, and request the page meanwhile.
+    plugin.on_config(mkdocs_conf)
+    plugin._links = _LinkIndex("https://example.org/")
+    request.start()
+    request.join(timeout=0.5)
+    assert request.is_alive()
+
+    build(config=mkdocs_conf)
+    request.join()
+    assert results == ["# Usage\n\n[Home](https://example.org/index.md)\n"]
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "jsonl_output": "corpus/llms.jsonl",
+                            "sections": {"Index": [{"index.md": "Home page."}], "Usage": ["page1.md"], "Empty": []},
+                        },
+                    },
+                ],
+            },
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage\n\nSome text."},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_output_writers(mkdocs_conf: MkDocsConfig) -> None:
+    """Test the JSON Lines corpus, and that registered writers receive every page once per build."""
+    received = []
+
+    class _Writer(OutputWriter):
+        def write(self, pages: Iterable[PageRecord], context: OutputContext) -> list[Path]:
+            received.append(([page.src_uri for page in pages], context.sections))
+            return []
+
+    writer = _Writer()
+    add_output_writer(writer)
+    try:
+        build(config=mkdocs_conf)
+    finally:
+        remove_output_writer(writer)
+    assert received == [(["index.md", "page1.md"], ["Index", "Usage", "Empty"])]
+    # Writers must implement `write`.
+    with pytest.raises(TypeError):
+        OutputWriter()  # type: ignore[abstract]
+
+    lines = Path(mkdocs_conf.site_dir, "corpus/llms.jsonl").read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[0] == {
+        "url": "https://example.org/index.md",
+        "src_uri": "index.md",
+        "title": "Hello world",
+        "section": "Index",
+        "description": "Home page.",
+        "markdown": "# Hello world\n",
+        "tokens": None,
+        "sha256": hashlib.sha256(b"# Hello world\n").hexdigest(),
+    }
+    assert records[1]["section"] == "Usage"
+    assert "## Empty" in Path(mkdocs_conf.site_dir, "llms.txt").read_text()
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {"plugins": [{"llmstxt": {"sections": {"Pages": ["index.md", "page1.md"]}}}]},
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage\n\nSome text."},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_batch_hooks(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin, tmp_path: Path) -> None:
+    """Test that batch hooks see all converted pages at once, before and after outputs are written."""
+    module = tmp_path / "batch.py"
+    module.write_text(
+        dedent(
+            """
+            from pathlib import Path
+
+            def preprocess_batch(pages):
+                titles = ", ".join(page.title for page in pages)
+                for page in pages:
+                    page.markdown += f"\\nSee also: {titles}\\n"
+
+            def finalize(pages):
+                site_dir = Path(pages[0].output).parent
+                written = sorted(page.md_url for page in pages if page.output.read_text() == page.markdown)
+                site_dir.joinpath("finalized.txt").write_text("\\n".join(written))
+            """,
+        ),
+    )
+    plugin.config.preprocess = str(module)
+    build(config=mkdocs_conf)
+    site_dir = Path(mkdocs_conf.site_dir)
+    assert site_dir.joinpath("page1/index.md").read_text().endswith("\nSee also: Hello world, Usage\n")
+    assert (
+        site_dir.joinpath("finalized.txt").read_text()
+        == "https://example.org/index.md\nhttps://example.org/page1/index.md"
+    )
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {"plugins": [{"llmstxt": {"sections": {"Pages": ["index.md", "page1.md", "page2.md"]}}}]},
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage", "page2.md": "# Development"},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_preprocess_module_loaded_once(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin, tmp_path: Path) -> None:
+    """Test that the pre-processing module is loaded once per build, as documented for trace listeners."""
+    module = tmp_path / "listening.py"
+    module.write_text(
+        dedent(
+            """
+            from pathlib import Path
+
+            from mkdocs_llmstxt import TraceListener, add_trace_listener, remove_trace_listener
+
+            class Listener(TraceListener):
+                pages = 0
+
+                def on_counter(self, name, value, page):
+                    if name == "pages":
+                        self.pages += value
+
+            listener = Listener()
+            add_trace_listener(listener)
+
+            def preprocess(soup, output):
+                pass
+
+            def finalize(pages):
+                remove_trace_listener(listener)
+                with Path(__file__).with_suffix(".log").open("a") as log:
+                    log.write(f"{listener.pages}\\n")
+            """,
+        ),
+    )
+    plugin.config.preprocess = str(module)
+    build(config=mkdocs_conf)
+    build(config=mkdocs_conf)
+    assert module.with_suffix(".log").read_text() == "3\n3\n"
+    assert not tracing._listeners
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [{"llmstxt": {"link_check": "warn", "sections": {"Pages": ["index.md", "page1.md"]}}}],
+            },
+            "pages": {
+                "index.md": "# Hello world\n\n## Install",
+                "page1.md": "# Usage\n\n[Install](index.md#install) [Nope](index.md#nope) [Page 2](page2.md) [Gone](gone.md)",
+                "page2.md": "# Page 2",
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_link_check(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin, caplog: pytest.LogCaptureFixture) -> None:
+    """Test that links to unknown anchors and pages are reported, or fail the build."""
+    caplog.set_level(logging.WARNING)
+    build(config=mkdocs_conf)
+    warnings = [record.getMessage() for record in caplog.records if "Broken link" in record.getMessage()]
+    assert len(warnings) == 2
+    assert "https://example.org/index.md#nope (unknown anchor)" in warnings[0]
+    assert "https://example.org/page1/gone.md (unknown page)" in warnings[1]
+
+    plugin.config.link_check = "fail"
+    caplog.clear()
+    with pytest.raises(Abort):
+        build(config=mkdocs_conf)
+    assert "Found 2 broken link(s) in generated Markdown" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "full_output": "llms-full.txt",
+                            "sections": {"Usage": ["index.md", "page1.md"]},
+                            "outputs": {
+                                "contributors/llms.txt": {
+                                    "markdown_description": "For contributors.",
+                                    "full_output": "contributors/llms-full.txt",
+                                    "sections": {"Development": [{"page1.md": "Usage."}, "page2.md"]},
+                                },
+                            },
+                        },
+                    },
+                ],
+            },
+            "pages": {"index.md": "# Hello world", "page1.md": "# Usage", "page2.md": "# Development"},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_multiple_outputs(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that additional outputs share the conversion of pages."""
+    converted = []
+
+    class _Listener(TraceListener):
+        def on_span(self, span: Span) -> None:
+            if span.name == "page":
+                converted.append(span.page)
+
+    listener = _Listener()
+    add_trace_listener(listener)
+    try:
+        build(config=mkdocs_conf)
+    finally:
+        remove_trace_listener(listener)
+    assert sorted(converted) == ["index.md", "page1.md", "page2.md"]
+
+    site_dir = Path(mkdocs_conf.site_dir)
+    assert site_dir.joinpath("page2/index.md").read_text() == "# Development\n"
+    assert "Development" not in site_dir.joinpath("llms.txt").read_text()
+    assert "# Development" not in site_dir.joinpath("llms-full.txt").read_text()
+    assert site_dir.joinpath("contributors/llms.txt").read_text() == dedent(
+        """\
+        # Test Project
+
+        For contributors.
+
+        ## Development
+
+        - [Usage](https://example.org/page1/index.md): Usage.
+        - [Development](https://example.org/page2/index.md)
+
+        """,
+    )
+    assert site_dir.joinpath("contributors/llms-full.txt").read_text() == dedent(
+        """\
+        # Test Project
+
+        For contributors.
+
+        # Development
+
+        # Usage
+
+        # Development
+        """,
+    )
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "full_output": "llms-full.txt",
+                            "full_output_index": "llms-full.json",
+                            "jsonl_output": "llms.jsonl",
+                            "bundle": "llms-bundle.tar.gz",
+                            "sections": {
+                                "Usage": ["index.md", "*.yaml"],
+                                "Reference": [{"openapi.yaml": "The API specification."}, "examples/demo.py"],
+                            },
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "openapi.yaml": "openapi: 3.1.0\ninfo:\n  title: Demo\n",
+                "examples/demo.py": '"""Demo.\n\n```pycon\n>>> 1\n```\n"""\n\n# Say hello.\nprint(\'hello\')',
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_raw_files(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that files that are not pages are linked and included verbatim."""
+    build(config=mkdocs_conf)
+
+    site_dir = Path(mkdocs_conf.site_dir)
+    llmstxt = site_dir.joinpath("llms.txt").read_text()
+    assert "- [openapi.yaml](https://example.org/openapi.yaml): The API specification.\n" in llmstxt
+    assert "- [demo.py](https://example.org/examples/demo.py)\n" in llmstxt
+    # Patterns only match pages.
+    assert llmstxt.count("openapi.yaml") == 2
+
+    full_output = site_dir.joinpath("llms-full.txt").read_bytes()
+    # Files are fenced with their extension as language, with longer fences than the ones they contain.
+    demo = b'````py\n"""Demo.\n\n```pycon\n>>> 1\n```\n"""\n\n# Say hello.\nprint(\'hello\')\n````\n'
+    assert full_output.endswith(b"# Reference\n\n```yaml\nopenapi: 3.1.0\ninfo:\n  title: Demo\n```\n\n" + demo)
+    index = json.loads(site_dir.joinpath("llms-full.json").read_text())
+    entry = index["sections"][1]["pages"][1]
+    assert full_output[entry["start"] : entry["end"]] == demo
+
+    assert [json.loads(line)["src_uri"] for line in site_dir.joinpath("llms.jsonl").read_text().splitlines()] == [
+        "index.md",
+    ]
+    assert not site_dir.joinpath("examples/demo.md").exists()
+    with tarfile.open(site_dir / "llms-bundle.tar.gz") as tar_file:
+        assert {"openapi.yaml", "examples/demo.py"} <= set(tar_file.getnames())
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "convert": False,
+                            "outline_output": "llms-outline.txt",
+                            "outline_depth": 3,
+                            "sections": {"Pages": ["index.md", {"page1.md": "How to use."}]},
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "page1.md": "# Usage\n\n## Install\n\n### With pip\n\n#### Details\n\n## Configure",
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_outline_without_conversion(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that the outline is built from tables of contents, without converting pages."""
+    build(config=mkdocs_conf)
+    site_dir = Path(mkdocs_conf.site_dir)
+    assert not site_dir.joinpath("llms.txt").exists()
+    assert not site_dir.joinpath("page1/index.md").exists()
+    assert site_dir.joinpath("llms-outline.txt").read_text() == dedent(
+        """\
+        # Test Project
+
+        ## Pages
+
+        - [Hello world](https://example.org/)
+        - [Usage](https://example.org/page1/): How to use.
+          - [Install](https://example.org/page1/#install)
+            - [With pip](https://example.org/page1/#with-pip)
+          - [Configure](https://example.org/page1/#configure)
+        """,
+    )
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "markdown_extensions": ["attr_list"],
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "split_level": 2,
+                            "full_output": "llms-full.txt",
+                            "sections": {"Pages": ["index.md", "page1.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {
+                "index.md": "# Hello world",
+                "page1.md": "# Usage\n\nIntro.\n\n## Install\n\nRun pip.\n\n### Details\n\nMore.\n\n## Configure { #std:configuré }\n\nEdit.",
+            },
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_split_pages(mkdocs_conf: MkDocsConfig) -> None:
+    """Test that pages are split into one file per heading, listed in the page."""
+    build(config=mkdocs_conf)
+    site_dir = Path(mkdocs_conf.site_dir)
+    assert site_dir.joinpath("page1/index/install.md").read_text() == "## Install\n\nRun pip.\n\n### Details\n\nMore.\n"
+    # Heading ids are sanitized in file names, and quoted in URLs.
+    assert site_dir.joinpath("page1/index/std-configuré.md").read_text() == "## Configure\n\nEdit.\n"
+    assert (
+        site_dir.joinpath("page1/index.md")
+        .read_text()
+        .endswith(
+            "Edit.\n\nSections of this page:\n\n"
+            "- [Install](https://example.org/page1/index/install.md)\n"
+            "- [Configure](https://example.org/page1/index/std-configur%C3%A9.md)\n",
+        )
+    )
+    assert site_dir.joinpath("index.md").read_text() == "# Hello world\n"
+    assert not site_dir.joinpath("index").exists()
+    # The full output copies the file of unsplit pages, and does not list fragments.
+    full_output = site_dir.joinpath("llms-full.txt").read_text()
+    assert "# Pages\n\n# Hello world\n\n# Usage\n" in full_output
+    assert full_output.endswith("## Configure\n\nEdit.\n")
+
+
+def test_full_output_copies_page_files(tmp_path: Path) -> None:
+    """Test that copying page files gives the same full output as encoding pages, with LF line endings."""
+    pages = [
+        PageRecord(
+            "Pages",
+            f"{name}.md",
+            name,
+            "",
+            f"/{name}.md",
+            tmp_path / f"{name}.md",
+            f"# {name}\n\nText.\n",
+            None,
+        )
+        for name in ("first", "second")
+    ]
+    context = OutputContext(site_dir=tmp_path, header="# Site\n\n", sections=["Pages"])
+    pages_writer = _PagesWriter()
+    pages_writer.write(pages, context)
+    assert tmp_path.joinpath("first.md").read_bytes() == b"# first\n\nText.\n"
+
+    _FullOutputWriter("copied.txt", page_files=pages_writer.files).write(pages, context)
+    _FullOutputWriter("encoded.txt").write(pages, context)
+    copied = tmp_path.joinpath("copied.txt").read_bytes()
+    assert copied == tmp_path.joinpath("encoded.txt").read_bytes()
+    assert copied == b"# Site\n\n# Pages\n\n# first\n\nText.\n\n# second\n\nText.\n"
+
+
+_STRESS_PAGES = {
+    f"page{index}.md": dedent(
+        f"""
+        # Page {index}
+
+        Some *text* linking to [the next page](page{index + 1}.md) and [home](index.md).
+
+        !!! note "Shared note"
+            This admonition is repeated on every page.
+
+        ```python
+        def function_{index}():
+            return {index}
+        ```
+
+        | Column | Value |
+        | ------ | ----- |
+        | index  | {index} |
+        """,
+    )
+    for index in range(40)
+}
+
+
+@pytest.mark.parametrize(
+    "mkdocs_conf",
+    [
+        {
+            "config": {
+                "markdown_extensions": ["admonition", "tables"],
+                "plugins": [
+                    {
+                        "llmstxt": {
+                            "full_output": "llms-full.txt",
+                            "fragment_cache": ["div.admonition"],
+                            "sections": {"Pages": ["index.md", "page*.md"]},
+                        },
+                    },
+                ],
+            },
+            "pages": {"index.md": "# Home", **_STRESS_PAGES},
+        },
+    ],
+    indirect=["mkdocs_conf"],
+)
+def test_threads(mkdocs_conf: MkDocsConfig, plugin: MkdocsLLMsTxtPlugin, tmp_path: Path) -> None:
+    """Test that converting pages in threads gives the same outputs as converting them serially.
+
+    On free-threaded builds of Python, threads convert pages truly in parallel.
+    """
+    if sysconfig.get_config_var("Py_GIL_DISABLED") and os.environ.get("PYTHON_GIL") == "0":
+        # Free-threaded CI jobs disable the GIL: make sure it stayed disabled, so that conversions race.
+        assert not sys._is_gil_enabled()
+    preprocess = tmp_path / "preprocess.py"
+    preprocess.write_text("def preprocess(soup, output):\n    for tag in soup.find_all('em'):\n        tag.unwrap()\n")
+    plugin.config.preprocess = str(preprocess)
+
+    outputs = []
+    for threads, site_dir in ((1, "serial"), (8, "threads")):
+        plugin.config.threads = threads
+        mkdocs_conf.site_dir = str(tmp_path / site_dir)
+        build(config=mkdocs_conf)
+        root = Path(mkdocs_conf.site_dir)
+        outputs.append({path.relative_to(root): path.read_text() for path in sorted(root.rglob("*.md"))})
+        outputs[-1][Path("llms-full.txt")] = root.joinpath("llms-full.txt").read_text()
+        outputs[-1][Path("llms.txt")] = root.joinpath("llms.txt").read_text()
+    assert len(outputs[0]) == 43
+    assert "Some text linking" in outputs[0][Path("page3/index.md")]
+    assert outputs[0] == outputs[1]
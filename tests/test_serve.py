@@ -0,0 +1,65 @@
+"""Tests for lazy serving."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from mkdocs_llmstxt._internal.serve import _etag_matches, _LazyApp
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"def", "abc"', True),
+        ("*", True),
+        ('"def"', False),
+        ("", False),
+    ],
+)
+def test_etag_matches(header: str, expected: bool) -> None:
+    """Test matching entity tags against `If-None-Match` headers."""
+    assert _etag_matches(header, '"abc"') is expected
+
+
+def test_lazy_app() -> None:
+    """Test that outputs are generated on request, and that other requests are delegated."""
+    generated = []
+
+    def generate() -> str:
+        generated.append(True)
+        return "# Hello"
+
+    def resolve(path: str) -> tuple[str, Any] | None:
+        return ('"abc"', generate) if path == "index.md" else None
+
+    def fallback(environ: dict[str, Any], start_response: Any) -> list[bytes]:  # noqa: ARG001
+        start_response("404 Not Found", [])
+        return [b"fallback"]
+
+    app = _LazyApp(fallback, "/docs/", resolve)
+    responses: list[tuple[str, dict[str, str]]] = []
+
+    def start_response(status: str, headers: list[tuple[str, str]]) -> None:
+        responses.append((status, dict(headers)))
+
+    assert app({"PATH_INFO": "/docs/index.md", "REQUEST_METHOD": "GET"}, start_response) == [b"# Hello"]
+    status, headers = responses.pop()
+    assert status == "200 OK"
+    assert headers["ETag"] == '"abc"'
+    assert headers["Content-Type"] == "text/markdown; charset=utf-8"
+
+    environ = {"PATH_INFO": "/docs/index.md", "REQUEST_METHOD": "GET", "HTTP_IF_NONE_MATCH": '"abc"'}
+    assert app(environ, start_response) == []
+    assert responses.pop()[0] == "304 Not Modified"
+    assert len(generated) == 1
+
+    assert app({"PATH_INFO": "/docs/index.md", "REQUEST_METHOD": "HEAD"}, start_response) == []
+    assert responses.pop()[1]["Content-Length"] == "7"
+
+    for path in ("/docs/other.md", "/index.md"):
+        assert app({"PATH_INFO": path, "REQUEST_METHOD": "GET"}, start_response) == [b"fallback"]
+    assert app({"PATH_INFO": "/docs/index.md", "REQUEST_METHOD": "POST"}, start_response) == [b"fallback"]
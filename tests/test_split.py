@@ -0,0 +1,48 @@
+"""Tests for the splitting of pages into fragments."""
+
+from __future__ import annotations
+
+from mkdocs.structure.toc import AnchorLink
+
+from mkdocs_llmstxt._internal.split import _fragment_names, _heading_ids, _split_markdown, _toc_headings
+
+
+def test_split_markdown() -> None:
+    """Test that Markdown is split at headings of a level, ignoring code blocks."""
+    markdown = (
+        "# Title\n\nIntro.\n\n## One\n\nText.\n\n```md\n## Not a heading\n```\n\n### Sub\n\nMore.\n\n"
+        "## Two\n\nText.\n\n# Other\n\nOutside.\n"
+    )
+    assert _split_markdown(markdown, 2) == [
+        "## One\n\nText.\n\n```md\n## Not a heading\n```\n\n### Sub\n\nMore.\n",
+        "## Two\n\nText.\n",
+    ]
+
+
+def test_toc_headings_skip_unrendered() -> None:
+    """Test that entries of the table of contents without a rendered heading are skipped."""
+    html = (
+        '<h1 id="api">API</h1><a id="package"></a>'
+        '<h2 class="doc doc-heading" id="package.Class">Class</h2><h2 id="package.func">func</h2>'
+    )
+    root = AnchorLink("package", "package", 2)
+    toc = [AnchorLink("API", "api", 1)]
+    toc[0].children = [root, AnchorLink("Class", "package.Class", 2), AnchorLink("func", "package.func", 2)]
+    assert _heading_ids(html) == {"api", "package.Class", "package.func"}
+    assert _toc_headings(toc, 2, _heading_ids(html)) == [("package.Class", "Class"), ("package.func", "func")]
+    assert len(_toc_headings(toc, 2)) == 3
+
+
+def test_fragment_names() -> None:
+    """Test that fragment file names only keep safe characters and are unique regardless of case."""
+    anchors = ["usage", "std:option", "100%", "configuración", "Usage", "usage-2", "%", ""]
+    assert _fragment_names(anchors) == [
+        "usage",
+        "std-option",
+        "100",
+        "configuración",
+        "Usage-2",
+        "usage-2-2",
+        "section",
+        "section-2",
+    ]
@@ -0,0 +1,108 @@
+"""Conformance tests for the streaming engine."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from mkdocs_llmstxt._internal.plugin import _generate_page_markdown
+from mkdocs_llmstxt._internal.streaming import _generate_page_markdown_streaming
+
+HTML_SNIPPETS = {
+    "headings": '<h1 id="title">Title<a class="headerlink" href="#title">¶</a></h1><h2>Sub <code>title</code></h2>',
+    "inline": "<p>Some <strong>bold</strong>, <em>emphasis</em>, <code>a_b * c</code> and a*b.</p>",
+    "whitespace": "<p>\n  Some   text\n  <em> spaced </em>  out.\n</p>\n\n<p>  </p><div>\n\n</div>",
+    "links": (
+        '<p><a href="other/">Other</a>, <a href="../up/#anchor">Up</a>, <a href="#local">Local</a>,'
+        ' <a href="https://example.com/">External</a>, <a href="mailto:a@b.c">Mail</a>,'
+        ' <a href="/abs/" title="Title">Absolute</a>, <a href="other/"><img src="i.png" alt="I"></a></p>'
+    ),
+    "lists": (
+        "<ul><li>One</li><li>Two<ul><li>Nested <em>item</em></li></ul></li>"
+        "<li><p>Paragraph</p><p>Second</p></li></ul>"
+        '<ol start="3"><li>Three</li><li>Four<ol><li>Sub</li></ol></li></ol>'
+    ),
+    "tables": (
+        "<table><thead><tr><th>Name</th><th>Type</th></tr></thead><tbody>"
+        "<tr><td><code>a</code></td><td>int</td></tr>"
+        '<tr><td colspan="2">Spanning<br>lines</td></tr></tbody></table>'
+        "<table><tr><td>No</td><td>header</td></tr><tr><td>at</td><td>all</td></tr></table>"
+    ),
+    "admonition": (
+        '<div class="admonition note"><p class="admonition-title">Note</p><p>Be careful.</p></div>'
+        '<details class="tip"><summary>Tip</summary><p>Hidden.</p></details>'
+    ),
+    "tabs": (
+        '<div class="tabbed-set tabbed-alternate"><input checked="checked" id="t1" name="t" type="radio">'
+        '<div class="tabbed-labels"><label for="t1">Python</label></div>'
+        '<div class="tabbed-content"><div class="tabbed-block"><p>Content</p></div></div></div>'
+    ),
+    "code": (
+        '<div class="language-python highlight"><pre><span></span><code><span class="k">def</span>'
+        ' <span class="nf">f</span><span class="p">():</span>\n    <span class="k">pass</span>\n</code></pre></div>'
+        "<pre><code>plain\n\n  indented\n</code></pre>"
+    ),
+    "highlighttable": (
+        '<div class="language-python highlight"><table class="highlighttable"><tr>'
+        '<td class="linenos"><div class="linenodiv"><pre><span></span>'
+        '<span class="normal"><a href="#__codelineno-0-1">1</a></span>\n'
+        '<span class="normal"><a href="#__codelineno-0-2">2</a></span></pre></div></td>'
+        '<td class="code"><div><pre><span></span><code>'
+        '<a id="__codelineno-0-1" name="__codelineno-0-1"></a><span class="n">a</span> <span class="o">=</span> 1\n'
+        '<a id="__codelineno-0-2" name="__codelineno-0-2"></a><span class="n">b</span> <span class="o">=</span> 2\n'
+        "</code></pre></div></td></tr></table></div>"
+    ),
+    "linenos": (
+        '<div class="highlight"><pre><span></span><code><span class="linenos">1</span>'
+        '<span class="k">import</span> <span class="n">this</span>  <span class="c1"># (1)!</span>\n'
+        '<a href="#__codelineno-1-2"><span class="linenos" data-linenos="2 "></span></a><span class="c1"># (2)</span>\n'
+        "</code></pre></div><ol><li>Annotation.</li></ol>"
+        '<table class="highlighttable"><tr><td class="linenos"><pre>1</pre></td>'
+        '<td class="code"><pre><code class="language-js"><span class="cm">/* (1)! */</span></code></pre></td></tr></table>'
+    ),
+    "mkdocstrings": (
+        '<div class="doc doc-object doc-function"><h2 id="pkg.f" class="doc doc-heading">'
+        '<code class="doc-symbol doc-symbol-heading doc-symbol-function"></code>'
+        '<span class="doc doc-object-name doc-function-name">f</span>'
+        '<span class="doc doc-labels"><small class="doc doc-label doc-label-async"><code>async</code></small></span>'
+        '<a href="#pkg.f" class="headerlink" title="Permanent link">¶</a></h2>'
+        '<div class="doc-signature highlight"><pre><span></span><code>f(x: <autoref identifier="pkg.X" optional>'
+        '<a class="autorefs autorefs-internal" href="#pkg.X">X</a></autoref>) -&gt; None</code></pre></div>'
+        '<div class="doc doc-contents"><p>Do things.</p><table><thead><tr><th>Name</th><th>Description</th></tr>'
+        "</thead><tbody><tr><td><code>x</code></td><td>"
+        '<div class="doc-md-description"><p>The <em>x</em>.</p></div></td></tr></tbody></table></div></div>'
+    ),
+    "media": (
+        '<p><img alt="Logo" src="logo.png" title="Logo"> <span class="twemoji"><svg></svg></span></p>'
+        '<video controls poster="p.png"><source src="v.mp4" type="video/mp4">Fallback</video>'
+    ),
+    "misc": (
+        "<blockquote><p>Quoted</p><blockquote><p>Nested</p></blockquote></blockquote><hr>"
+        "<dl><dt>Term</dt><dd>Definition</dd></dl><p>Line<br>break <kbd>Ctrl</kbd>+<kbd>C</kbd>"
+        " <sub>sub</sub> <sup>sup</sup> <del>del</del> <q>quote</q></p>"
+        "<script>var a = 1;</script><style>p {}</style><!-- comment --><p>&amp; &lt;tag&gt; &nbsp;</p>"
+    ),
+    "malformed": "<p>Unclosed <em>emphasis<p>Next <strong>bold</em> text</strong><li>Stray</li></div><br/>",
+}
+
+
+@pytest.mark.parametrize("should_autoclean", [True, False])
+@pytest.mark.parametrize("html", HTML_SNIPPETS.values(), ids=HTML_SNIPPETS.keys())
+def test_streaming_engine_conformance(html: str, should_autoclean: bool) -> None:
+    """The streaming engine produces the same Markdown as the default one."""
+    options: dict[str, Any] = {
+        "should_autoclean": should_autoclean,
+        "base_uri": "https://example.org/",
+        "page_uri": "page/index.html",
+    }
+    expected = _generate_page_markdown(html, preprocess=None, path="page/index.md", **options)
+    assert _generate_page_markdown_streaming(html, **options) == expected
+
+
+def test_streaming_engine_conformance_whole_document() -> None:
+    """The streaming engine handles concatenated snippets like a whole page."""
+    html = "\n".join(HTML_SNIPPETS.values())
+    options: dict[str, Any] = {"should_autoclean": True, "base_uri": "https://example.org/", "page_uri": "index.html"}
+    expected = _generate_page_markdown(html, preprocess=None, path="index.md", **options)
+    assert _generate_page_markdown_streaming(html, **options) == expected
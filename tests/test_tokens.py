@@ -0,0 +1,44 @@
+"""Tests for token counting."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from mkdocs.exceptions import PluginError
+
+from mkdocs_llmstxt._internal.tokens import _count_tokens, _fill_budget, _headings, _load_token_counter
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_load_token_counter(tmp_path: Path) -> None:
+    """Token counters are loaded from user modules, with a heuristic by default."""
+    assert _load_token_counter(None) is _count_tokens
+    assert _count_tokens("") == 0
+    assert _count_tokens("Hello world") == 3
+
+    counter = tmp_path / "counter.py"
+    counter.write_text("def count_tokens(text):\n    return len(text.split())\n")
+    assert _load_token_counter(str(counter))("Hello world") == 2
+
+    counter.write_text("def count(text):\n    return 0\n")
+    with pytest.raises(PluginError, match="no 'count_tokens' function"):
+        _load_token_counter(str(counter))
+
+
+def test_headings() -> None:
+    """Headings are extracted outside of code fences."""
+    markdown = "# Title\n\nText.\n\n````md\n```\n# Not a heading\n```\n````\n\n## Section\n\n#hashtag\n"
+    assert _headings(markdown) == "# Title\n## Section\n"
+    assert _headings("No headings.\n") == ""
+
+
+def test_fill_budget_skips_repeated_pages() -> None:
+    """Test that a page listed in several sections only uses the budget once."""
+    page = ("Home", "https://example.org/index.md", "# Home\n\nWelcome.\n")
+    other = ("Usage", "https://example.org/usage.md", "# Usage\n\nRun it.\n")
+    text, used = _fill_budget("# Site\n\n", [("Usage", [page]), ("API", [page, other])], 1000, _count_tokens)
+    assert text == "# Site\n\n# Usage\n\n# Home\n\nWelcome.\n\n# API\n\n# Usage\n\nRun it.\n"
+    assert (text, used) == _fill_budget("# Site\n\n", [("Usage", [page]), ("API", [other])], 1000, _count_tokens)
@@ -0,0 +1,74 @@
+"""Tests for the tracing hooks."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from mkdocs_llmstxt import Span, TraceListener, add_trace_listener, remove_trace_listener, trace_count, trace_span
+from mkdocs_llmstxt._internal.tracing import _OpenMetricsExporter
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+class _Recorder(TraceListener):
+    def __init__(self) -> None:
+        self.started: list[tuple[str, str | None]] = []
+        self.spans: list[Span] = []
+        self.counters: list[tuple[str, float, str | None]] = []
+
+    def on_span_start(self, name: str, page: str | None) -> None:
+        self.started.append((name, page))
+
+    def on_span(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def on_counter(self, name: str, value: float, page: str | None) -> None:
+        self.counters.append((name, value, page))
+
+
+def test_listeners() -> None:
+    """Listeners receive spans and counters, with the page of the enclosing span."""
+    recorder = _Recorder()
+    add_trace_listener(recorder)
+    add_trace_listener(recorder)
+    try:
+        with trace_span("page", page="index.md"):
+            with trace_span("parse"):
+                trace_count("items", 2)
+            trace_count("pages")
+        with trace_span("write"):
+            pass
+    finally:
+        remove_trace_listener(recorder)
+    with trace_span("ignored"):
+        trace_count("ignored")
+
+    assert recorder.started == [("page", "index.md"), ("parse", "index.md"), ("write", None)]
+    assert [(span.name, span.page) for span in recorder.spans] == [
+        ("parse", "index.md"),
+        ("page", "index.md"),
+        ("write", None),
+    ]
+    assert recorder.spans[0].duration <= recorder.spans[1].duration
+    assert recorder.counters == [("items", 2, "index.md"), ("pages", 1, "index.md")]
+
+
+def test_openmetrics_exporter(tmp_path: Path) -> None:
+    """The exporter aggregates spans and counters in the OpenMetrics text format."""
+    exporter = _OpenMetricsExporter()
+    for duration in (0.25, 0.5):
+        exporter.on_span(Span(name="parse", page="index.md", start=0, duration=duration))
+    exporter.on_counter("written-files", 1, None)
+    exporter.on_counter("written-files", 2, None)
+    exporter.write(tmp_path / "metrics" / "llmstxt.prom")
+    assert (tmp_path / "metrics" / "llmstxt.prom").read_text() == (
+        "# TYPE mkdocs_llmstxt_span_seconds summary\n"
+        "# UNIT mkdocs_llmstxt_span_seconds seconds\n"
+        "# HELP mkdocs_llmstxt_span_seconds Time spent in each step of the build.\n"
+        'mkdocs_llmstxt_span_seconds_count{span="parse"} 2\n'
+        'mkdocs_llmstxt_span_seconds_sum{span="parse"} 0.750000\n'
+        "# TYPE mkdocs_llmstxt_written_files counter\n"
+        "mkdocs_llmstxt_written_files_total 3\n"
+        "# EOF\n"
+    )
@@ -0,0 +1,48 @@
+"""Tests for appending files to outputs."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+
+from mkdocs_llmstxt._internal import zerocopy
+from mkdocs_llmstxt._internal.zerocopy import _append_file
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _unsupported(source: int, target: int, offset: int, count: int) -> int:  # noqa: ARG001
+    raise OSError("unsupported")
+
+
+def _partial(source: int, target: int, offset: int, count: int) -> int:  # noqa: ARG001
+    if offset:
+        raise OSError("unsupported")
+    return os.write(target, b"abc")
+
+
+@pytest.mark.parametrize(
+    "kernel_copies",
+    [
+        pytest.param(None, id="platform"),
+        pytest.param([], id="chunks"),
+        pytest.param([_unsupported], id="unsupported"),
+        pytest.param([_partial], id="partial"),
+    ],
+)
+def test_append_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, kernel_copies: list | None) -> None:
+    """Test that files are appended after buffered writes, whatever the copy method."""
+    if kernel_copies is not None:
+        monkeypatch.setattr(zerocopy, "_KERNEL_COPIES", kernel_copies)
+    monkeypatch.setattr(zerocopy, "_CHUNK_SIZE", 4)
+    source = tmp_path.joinpath("source.txt")
+    source.write_bytes(b"abcdefghij")
+    target = tmp_path.joinpath("target.txt")
+    with target.open("wb") as file:
+        file.write(b"header\n")
+        assert _append_file(source, file) == 10
+        file.write(b"\nfooter\n")
+    assert target.read_bytes() == b"header\nabcdefghij\nfooter\n"